@@ -11,12 +11,13 @@ Data Flow:
 5. Track payout rates for red flags
 """
 
-import requests
 import time
 import re
 from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass, asdict
 
+from regen_v3 import _http
+
 
 # Known foundation EINs for top billionaires (verified mappings)
 # Sources: ProPublica Nonprofit Explorer, Foundation Center, IRS 990 Search
@@ -125,7 +126,7 @@ def search_propublica(query: str, ntee_code: str = None) -> List[Dict]:
         if ntee_code:
             params["ntee[id]"] = ntee_code
 
-        resp = requests.get(url, params=params, timeout=15)
+        resp = _http.get(url, params=params, timeout=15)
         if resp.status_code == 200:
             return resp.json().get("organizations", [])
     except Exception as e:
@@ -142,7 +143,7 @@ def get_990_data(ein: str) -> List[FoundationFiling]:
 
     try:
         url = f"https://projects.propublica.org/nonprofits/api/v2/organizations/{ein_clean}.json"
-        resp = requests.get(url, timeout=15)
+        resp = _http.get(url, timeout=15)
 
         if resp.status_code != 200:
             return []
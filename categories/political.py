@@ -12,11 +12,11 @@ Research shows $1 political → $0.33 less charitable (NBER 26616).
 """
 
 import os
-import requests
-import time
 from typing import List, Dict, Optional
 from dataclasses import dataclass, asdict
 
+from regen_v3 import _http
+
 # Read from env at runtime. Get a real key at https://api.open.fec.gov/developers/
 # and set FEC_API_KEY in your shell. DEMO_KEY only works for a handful of requests
 # per hour — do not publish numbers that depended on it.
@@ -71,7 +71,7 @@ def search_fec_contributions(
                 "sort": "-contribution_receipt_amount",
             }
 
-            resp = requests.get(url, params=params, timeout=15)
+            resp = _http.get(url, params=params, timeout=15)
             if resp.status_code != 200:
                 continue
 
@@ -101,8 +101,6 @@ def search_fec_contributions(
                     source_url=f"https://www.fec.gov/data/receipts/individual-contributions/?contributor_name={name.replace(' ', '+')}&two_year_transaction_period={cycle}",
                 ))
 
-            time.sleep(0.5)  # Rate limit
-
     except Exception as e:
         print(f"    FEC API error: {e}")
 
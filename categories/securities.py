@@ -13,7 +13,6 @@ Note: Direct charity gifts are EXEMPT from Form 4.
 We only see stock transfers to the billionaire's own foundation.
 """
 
-import requests
 import xml.etree.ElementTree as ET
 import time
 import re
@@ -21,6 +20,8 @@ from typing import List, Dict, Optional, Tuple
 from dataclasses import dataclass, asdict
 from datetime import datetime
 
+from regen_v3 import _http
+
 
 # Known CIK mappings for major billionaires
 # Source: SEC EDGAR company search, verified against Form 4 filings
@@ -113,7 +114,7 @@ def lookup_cik(name: str) -> Optional[str]:
             "User-Agent": "Research Bot (research@example.com)",
         }
 
-        resp = requests.get(url, params=params, headers=headers, timeout=15)
+        resp = _http.get(url, params=params, headers=headers, timeout=15)
         if resp.status_code == 200:
             # Parse Atom feed for CIK
             root = ET.fromstring(resp.content)
@@ -149,7 +150,7 @@ def get_form4_filings(cik: str, limit: int = 50) -> List[Dict]:
             "User-Agent": "Research Bot (research@example.com)",
         }
 
-        resp = requests.get(url, headers=headers, timeout=15)
+        resp = _http.get(url, headers=headers, timeout=15)
         if resp.status_code != 200:
             return []
 
@@ -188,7 +189,7 @@ def parse_form4_for_gifts(cik: str, accession: str) -> List[StockGift]:
         }
 
         # Get index to find primary document
-        resp = requests.get(url + "index.json", headers=headers, timeout=10)
+        resp = _http.get(url + "index.json", headers=headers, timeout=10)
         if resp.status_code != 200:
             return []
 
@@ -207,7 +208,7 @@ def parse_form4_for_gifts(cik: str, accession: str) -> List[StockGift]:
             return []
 
         # Fetch and parse XML
-        xml_resp = requests.get(url + xml_file, headers=headers, timeout=10)
+        xml_resp = _http.get(url + xml_file, headers=headers, timeout=10)
         if xml_resp.status_code != 200:
             return []
 
@@ -2,19 +2,29 @@
 """
 URL liveness check for every source_url in every data/*.v3.json record.
 
-Slow (network-bound; HEAD per URL with a small delay). Keep out of the fast
-validation loop; run before publishing or on a cadence. Exits non-zero when
-a configurable fraction of URLs are unreachable (default 5%).
+Network-bound: HEAD per URL (ranged GET when HEAD is refused), run through
+regen_v3._liveness — one asyncio loop, hundreds of probes in flight, at most
+--per-host at a time against any one site. Dead links print as they are
+found. Keep out of the fast validation loop; run before publishing or on a
+cadence. Exits non-zero when a configurable fraction of URLs are unreachable
+(default 5%).
+
+Results are remembered in the `liveness` namespace of regen_v3.cache, shared
+with regen_v3.verify, for a status-dependent time (a month for 2xx/3xx, hours
+for timeouts; see cache.DEFAULT_TTLS). A repeat run only re-checks URLs whose
+result has expired, or that are older than --max-age.
 
 Run: python3 check_urls.py             # check all records, default timeout 8s
      python3 check_urls.py --timeout 4 # tighter timeout
      python3 check_urls.py --subject elon_musk  # only one subject
      python3 check_urls.py --fail-pct 0  # fail on first dead URL
+     python3 check_urls.py --max-age 1d  # re-check anything checked >1 day ago
+     python3 check_urls.py --max-age 0   # ignore remembered results
+     python3 check_urls.py --concurrency 500 --per-host 8
 """
 
 from __future__ import annotations
 import argparse
-import concurrent.futures as cf
 import json
 import sys
 import time
@@ -32,19 +42,12 @@ DATA_DIR = HERE / "data"
 
 
 # Bloomberg, OpenSecrets, Reuters, etc. aggressively reject non-browser UAs with 403/401.
-# Use a common Safari UA so the liveness check reflects whether a human browser could
-# reach the URL, not whether a bot can. This is a liveness check, not a scrape — we
-# don't download the content, we just confirm the endpoint exists.
-UA = (
-    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) "
-    "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15"
-)
-HEADERS = {
-    "User-Agent": UA,
-    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-    "Accept-Language": "en-US,en;q=0.9",
-    "Accept-Encoding": "gzip, deflate, br",
-}
+# The shared transport sends a common Safari UA by default so the liveness check
+# reflects whether a human browser could reach the URL, not whether a bot can.
+# This is a liveness check, not a scrape — we don't download the content, we
+# just confirm the endpoint exists. Re-exported here for existing importers.
+from regen_v3 import _http, _liveness, cache  # noqa: E402
+from regen_v3._http import HEADERS, UA  # noqa: E402,F401
 
 
 def collect_urls(rec: dict) -> list[tuple[str, str]]:
@@ -69,10 +72,10 @@ def check_one(url: str, timeout: int) -> tuple[int | str, str]:
     Returns (status, note). `status` is an int HTTP code, or a string for transport errors.
     """
     try:
-        r = requests.head(url, headers=HEADERS, allow_redirects=True, timeout=timeout)
+        r = _http.head(url, allow_redirects=True, timeout=timeout)
         if r.status_code == 405 or r.status_code >= 400:
             # Some hosts 405 HEAD; retry with GET range to avoid downloading.
-            r = requests.get(url, headers={**HEADERS, "Range": "bytes=0-0"}, allow_redirects=True, timeout=timeout, stream=True)
+            r = _http.get(url, headers={"Range": "bytes=0-0"}, allow_redirects=True, timeout=timeout, stream=True)
             r.close()
         return r.status_code, ""
     except requests.exceptions.SSLError as e:
@@ -85,12 +88,31 @@ def check_one(url: str, timeout: int) -> tuple[int | str, str]:
         return "ERR", str(e)[:80]
 
 
+def check_cached(url: str, timeout: int, *, max_age: float | None = None) -> tuple[int | str, str]:
+    """check_one, answered from the liveness cache when a result for `url`
+    hasn't expired and (given `max_age`, in seconds) is at most that old.
+    Fresh results are remembered with their status's TTL. For many URLs
+    use `_liveness.check_many`."""
+    hit = _liveness.lookup(url, max_age)
+    if hit is not None:
+        return hit
+    status, note = check_one(url, timeout)
+    _liveness.remember(url, status, note)
+    return status, note
+
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--timeout", type=int, default=8, help="Per-URL timeout in seconds")
     ap.add_argument("--subject", help="Restrict to one subject id (e.g. elon_musk)")
-    ap.add_argument("--workers", type=int, default=8)
+    ap.add_argument("--concurrency", "--workers", type=int, default=_liveness.CONCURRENCY,
+                    help="Probes in flight across all hosts")
+    ap.add_argument("--per-host", type=int, default=_liveness.PER_HOST,
+                    help="Probes in flight against any one host")
     ap.add_argument("--fail-pct", type=float, default=5.0, help="Exit non-zero if >X%% URLs are dead")
+    ap.add_argument("--max-age", type=cache.parse_duration, metavar="DURATION",
+                    help="Re-check URLs whose remembered result is older than this "
+                         "(e.g. 12h, 7d; 0 = check everything)")
     args = ap.parse_args()
 
     files = sorted(DATA_DIR.glob("*.v3.json"))
@@ -113,27 +135,33 @@ def main():
         by_url.setdefault(url, []).append((subject, field))
 
     total = len(by_url)
-    print(f"checking {total} unique URLs across {len(files)} subjects (timeout={args.timeout}s, workers={args.workers})")
+    print(f"checking {total} unique URLs across {len(files)} subjects (timeout={args.timeout}s, "
+          f"concurrency={args.concurrency}, per-host={args.per_host})")
 
     dead: list[tuple[int | str, str, list[tuple[str, str]]]] = []
     ok_count = 0
-
-    with cf.ThreadPoolExecutor(max_workers=args.workers) as ex:
-        fut_to_url = {ex.submit(check_one, url, args.timeout): url for url in by_url}
-        for i, fut in enumerate(cf.as_completed(fut_to_url), start=1):
-            url = fut_to_url[fut]
-            status, note = fut.result()
-            callers = by_url[url]
-            if isinstance(status, int) and 200 <= status < 400:
-                ok_count += 1
-            else:
-                dead.append((status, url, callers))
-                print(f"  [{status}] {url}  ← {callers[0][0]} {callers[0][1]}" + (f"  ({note})" if note else ""))
-            if i % 25 == 0:
-                print(f"  … {i}/{total} ({ok_count} ok)")
+    remembered = 0
+    t0 = time.monotonic()
+
+    results = _liveness.check_many(
+        by_url, timeout=args.timeout, max_age=args.max_age,
+        concurrency=args.concurrency, per_host=args.per_host,
+    )
+    for i, (url, status, note, cached) in enumerate(results, start=1):
+        remembered += cached
+        callers = by_url[url]
+        if isinstance(status, int) and 200 <= status < 400:
+            ok_count += 1
+        else:
+            dead.append((status, url, callers))
+            print(f"  [{status}] {url}  ← {callers[0][0]} {callers[0][1]}" + (f"  ({note})" if note else ""))
+        if i % 250 == 0:
+            print(f"  … {i}/{total} ({ok_count} ok, {time.monotonic() - t0:.0f}s)")
 
     dead_pct = (len(dead) / total * 100) if total else 0
-    print(f"\nSummary: {ok_count}/{total} live · {len(dead)} dead ({dead_pct:.1f}%)")
+    print(f"\nSummary: {ok_count}/{total} live · {len(dead)} dead ({dead_pct:.1f}%)"
+          f" · {total - remembered} checked, {remembered} remembered"
+          f" · {time.monotonic() - t0:.1f}s")
 
     if dead_pct > args.fail_pct:
         print(f"FAIL — {dead_pct:.1f}% dead exceeds --fail-pct {args.fail_pct}")
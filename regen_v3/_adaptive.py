@@ -0,0 +1,261 @@
+"""AIMD concurrency control for batch_runner, driven by upstream backpressure.
+
+Concurrency context: batch_runner used a hand-picked `--workers` and a fixed
+extract in-flight cap. The right numbers depend on which upstreams are
+throttling at the moment. Brave, Anthropic, ProPublica and SEC each push
+back independently, and a cohort of hundreds of subjects outlives any one
+setting.
+
+Two halves:
+
+* Worker side (every process). `record(upstream, status, latency)` counts
+  each upstream response into shared per-upstream counters: requests,
+  throttled (429/529), errors (other 5xx, transport failures), summed
+  latency. `_http.request` reports every HTTP attempt and
+  `extract._inflight_slot` every LLM call attempt.
+  `slot(upstream)` / `semaphore(upstream)` hold one of the upstream's
+  adaptive in-flight slots. They are no-ops until `install_shared()` has
+  run, so single-process cli runs behave as before.
+
+* Parent side (batch_runner). `Controller.tick()` runs every
+  `CONTROL_INTERVAL_SEC`. It reads and zeroes the window counters and
+  applies AIMD per upstream. A throttle or error rate above threshold halves
+  the upstream's in-flight limit; mean latency above `LATENCY_FACTOR` times
+  the best window seen cuts it by a quarter; a healthy window whose peak
+  in-flight reached the limit adds one. The number of active subjects
+  follows the same rule: it is halved when any upstream backs off and
+  grows by one when every upstream with traffic was healthy. Each change is
+  returned as a decision dict that batch_runner appends to the batch state
+  JSON.
+
+Shared state is three `mp.Array`s (window counters, limits, in-flight/peak)
+behind one `mp.Condition`, created by `make_shared()` in the parent and
+installed by the pool initializer — the same hand-off as `_ratelimit`.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from typing import Any, Iterator
+
+from regen_v3 import _ratelimit
+
+# Anthropic is not an `_http` upstream (the SDK has its own transport) but is
+# controlled the same way; it replaces extract's fixed in-flight semaphore.
+UPSTREAMS: tuple[str, ...] = ("anthropic",) + tuple(sorted(_ratelimit.DEFAULT_LIMITS))
+_IDX = {name: i for i, name in enumerate(UPSTREAMS)}
+
+CONTROL_INTERVAL_SEC = 15.0
+MIN_SAMPLES = 5             # window requests needed before growing a limit
+THROTTLE_RATE = 0.02        # >2% 429/529 in a window -> back off
+ERROR_RATE = 0.10           # >10% 5xx/transport errors -> back off
+LATENCY_FACTOR = 2.0        # mean latency > 2x best window -> back off
+THROTTLE_DECREASE = 0.5
+LATENCY_DECREASE = 0.75
+DEFAULT_INITIAL_INFLIGHT = 8
+DEFAULT_MAX_INFLIGHT = 32
+
+# Window counters per upstream: requests, throttled, errors, latency_sum.
+_NSTAT = 4
+# In-flight bookkeeping per upstream: current, peak-this-window.
+_NFLIGHT = 2
+
+_stats: Any = [0.0] * (_NSTAT * len(UPSTREAMS))
+_limits: Any = [float(DEFAULT_INITIAL_INFLIGHT)] * len(UPSTREAMS)
+_flight: Any = [0.0] * (_NFLIGHT * len(UPSTREAMS))
+_cond: Any = threading.Condition()
+_installed = False
+
+
+def make_shared(ctx, initial_limits: dict[str, int]) -> tuple[Any, Any, Any, Any]:
+    """Create the cross-process controller state (parent side)."""
+    limits = ctx.Array("d", len(UPSTREAMS), lock=False)
+    for name, i in _IDX.items():
+        limits[i] = float(initial_limits.get(name, DEFAULT_INITIAL_INFLIGHT))
+    return (
+        ctx.Array("d", _NSTAT * len(UPSTREAMS), lock=False),
+        limits,
+        ctx.Array("d", _NFLIGHT * len(UPSTREAMS), lock=False),
+        ctx.Condition(ctx.Lock()),
+    )
+
+
+def install_shared(stats, limits, flight, cond) -> None:
+    """Pool-initializer hook (also called in the parent so `Controller`
+    reads the same arrays)."""
+    global _stats, _limits, _flight, _cond, _installed
+    _stats, _limits, _flight, _cond = stats, limits, flight, cond
+    _installed = True
+
+
+def record(upstream: str | None, status: int, latency: float) -> None:
+    """Count one response (status 0 = transport error) for `upstream`."""
+    i = _IDX.get(upstream or "")
+    if i is None:
+        return
+    base = _NSTAT * i
+    with _cond:
+        _stats[base] += 1
+        if status in (429, 529):
+            _stats[base + 1] += 1
+        elif status == 0 or status >= 500:
+            _stats[base + 2] += 1
+        _stats[base + 3] += latency
+
+
+def _acquire(i: int) -> None:
+    base = _NFLIGHT * i
+    with _cond:
+        # Timed wait so a limit raised by the parent is seen even if the
+        # parent's notify_all lands between our check and wait.
+        while _flight[base] >= max(1.0, _limits[i]):
+            _cond.wait(timeout=0.5)
+        _flight[base] += 1
+        if _flight[base] > _flight[base + 1]:
+            _flight[base + 1] = _flight[base]
+
+
+def _release(i: int) -> None:
+    base = _NFLIGHT * i
+    with _cond:
+        _flight[base] = max(0.0, _flight[base] - 1)
+        _cond.notify()
+
+
+@contextmanager
+def slot(upstream: str | None) -> Iterator[None]:
+    """Hold one adaptive in-flight slot for `upstream` (no-op when the
+    controller isn't installed or the upstream isn't tracked)."""
+    i = _IDX.get(upstream or "")
+    if not _installed or i is None:
+        yield
+        return
+    _acquire(i)
+    try:
+        yield
+    finally:
+        _release(i)
+
+
+class _Semaphore:
+    """acquire/release view of one upstream's slots, for
+    extract.install_shared_inflight."""
+
+    def __init__(self, upstream: str) -> None:
+        self._i = _IDX[upstream]
+
+    def acquire(self) -> bool:
+        _acquire(self._i)
+        return True
+
+    def release(self) -> None:
+        _release(self._i)
+
+
+def semaphore(upstream: str) -> _Semaphore:
+    return _Semaphore(upstream)
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).isoformat(timespec="seconds")
+
+
+class Controller:
+    """Parent-side AIMD loop. Call `tick()` periodically; it returns the
+    list of decisions taken (possibly empty)."""
+
+    def __init__(self, *, active: int, max_active: int,
+                 max_limits: dict[str, int]) -> None:
+        self.active = max(1, active)
+        self.max_active = max(self.active, max_active)
+        self.max_limits = {n: max_limits.get(n, DEFAULT_MAX_INFLIGHT) for n in UPSTREAMS}
+        self._best_latency: dict[str, float] = {}
+        self._last_tick = time.monotonic()
+
+    def due(self) -> bool:
+        return time.monotonic() - self._last_tick >= CONTROL_INTERVAL_SEC
+
+    def _drain_window(self) -> dict[str, dict[str, float]]:
+        out: dict[str, dict[str, float]] = {}
+        with _cond:
+            for name, i in _IDX.items():
+                s, f = _NSTAT * i, _NFLIGHT * i
+                out[name] = {
+                    "requests": _stats[s], "throttled": _stats[s + 1],
+                    "errors": _stats[s + 2], "latency_sum": _stats[s + 3],
+                    "peak_inflight": _flight[f + 1], "limit": _limits[i],
+                }
+                for k in range(_NSTAT):
+                    _stats[s + k] = 0.0
+                _flight[f + 1] = _flight[f]
+        return out
+
+    def _set_limit(self, name: str, value: float) -> None:
+        with _cond:
+            _limits[_IDX[name]] = value
+            _cond.notify_all()
+
+    def limits(self) -> dict[str, int]:
+        with _cond:
+            return {n: int(_limits[i]) for n, i in _IDX.items()}
+
+    def tick(self, *, pending: int) -> list[dict[str, Any]]:
+        self._last_tick = time.monotonic()
+        window = self._drain_window()
+        decisions: list[dict[str, Any]] = []
+        backed_off = False
+        healthy_traffic = False
+        for name in UPSTREAMS:
+            w = window[name]
+            n = w["requests"]
+            if n <= 0:
+                continue
+            old = w["limit"]
+            mean_lat = w["latency_sum"] / n
+            new, reason, decrease = old, "", False
+            if w["throttled"] / n > THROTTLE_RATE:
+                new, reason, decrease = (old * THROTTLE_DECREASE,
+                                         f"throttled {int(w['throttled'])}/{int(n)}", True)
+            elif w["errors"] / n > ERROR_RATE:
+                new, reason, decrease = (old * THROTTLE_DECREASE,
+                                         f"errors {int(w['errors'])}/{int(n)}", True)
+            else:
+                best = self._best_latency.get(name)
+                if n >= MIN_SAMPLES and (best is None or mean_lat < best):
+                    self._best_latency[name] = best = mean_lat
+                if best and n >= MIN_SAMPLES and mean_lat > LATENCY_FACTOR * best:
+                    new, reason, decrease = old * LATENCY_DECREASE, (
+                        f"latency {mean_lat:.2f}s > {LATENCY_FACTOR:g}x {best:.2f}s"), True
+                elif n >= MIN_SAMPLES and w["peak_inflight"] >= int(old):
+                    new, reason = old + 1, "healthy + saturated"
+                    healthy_traffic = True
+                else:
+                    healthy_traffic = True
+            new = min(float(self.max_limits[name]), max(1.0, float(int(new))))
+            backed_off = backed_off or decrease
+            if new != old:
+                self._set_limit(name, new)
+                decisions.append({
+                    "t": _now_iso(), "target": name, "from": int(old), "to": int(new),
+                    "reason": reason,
+                    "window": {
+                        "requests": int(n), "throttled": int(w["throttled"]),
+                        "errors": int(w["errors"]), "mean_latency_sec": round(mean_lat, 3),
+                        "peak_inflight": int(w["peak_inflight"]),
+                    },
+                })
+        old_active = self.active
+        if backed_off:
+            self.active = max(1, int(self.active * THROTTLE_DECREASE))
+            reason = "upstream backoff"
+        elif healthy_traffic and pending > 0 and self.active < self.max_active:
+            self.active += 1
+            reason = "all upstreams healthy"
+        if self.active != old_active:
+            decisions.append({
+                "t": _now_iso(), "target": "subjects", "from": old_active,
+                "to": self.active, "reason": reason,
+            })
+        return decisions
@@ -13,24 +13,54 @@ final path. `os.replace` is atomic on POSIX (and on Windows, where it
 overwrites unlike `os.rename`). A reader observes either the old file
 or the fully-written new file — never an in-progress truncation.
 
-A canonical copy of this helper already lives in `regen_v3/search.py`
-(used for the Brave query cache). This module is the shared version
-imported by per-source caches that previously used `path.write_text(...)`.
+Source-module caches now live in the `regen_v3.cache` store; this helper
+remains for files that stay on disk — batch job state, and the store's
+`export` back to the per-file layout.
+
+Compression: `atomic_write_json(..., compress=True)` writes the JSON as a
+zstd frame (if the optional `zstandard` package is installed) or a gzip
+member. Both formats open with a fixed magic number and JSON text can
+never start with either, so every reader sniffs the first bytes and
+plain, gzip and zstd payloads all read through the same calls: files
+written before compression existed keep working. `iter_json_array`
+streams the elements of a top-level JSON array out of a (possibly
+compressed) file or blob without inflating the whole document, so a
+scan over a 280 MB Schedule I list holds one row at a time. The cache
+store uses the same frames for its large values (`regen_v3.cache`).
 
 The `sort_keys` argument matches the per-file JSON format decision —
-search.py serializes with `sort_keys=True` so cache hits re-serialize
-to a byte-identical payload, but the original source-module caches
-were written with `sort_keys=False` and we preserve that to avoid
-churning every existing cache file on next run.
+the old search.py writer serialized with `sort_keys=True` so cache hits
+re-serialize to a byte-identical payload, but the original source-module
+caches were written with `sort_keys=False` and we preserve that to avoid
+churning every exported cache file.
 """
 from __future__ import annotations
 
+import gzip
+import io
 import itertools
 import json
 import os
+import sys
 import threading
 from pathlib import Path
-from typing import Any
+from typing import IO, Any, Iterator
+
+try:
+    import zstandard as _zstd
+except ImportError:  # optional: gzip frames are written instead
+    _zstd = None
+
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+
+# gzip level 6 is zlib's default: most of level 9's ratio on this JSON at
+# a fraction of the CPU. zstd level 3 is its library default.
+GZIP_LEVEL = 6
+ZSTD_LEVEL = 3
+
+# Text chunk size for `iter_json_array`.
+STREAM_CHUNK = 1 << 16
 
 # Per-process counter so two threads in one process can't collide either.
 _tmp_counter = itertools.count()
@@ -43,12 +73,116 @@ def _next_tmp_suffix() -> str:
     return f".pid{os.getpid()}.t{threading.get_ident()}.{n}.tmp"
 
 
+def compress_bytes(raw: bytes) -> bytes:
+    """Frame `raw` as zstd when available, else gzip (mtime 0, so equal
+    input gives byte-identical output)."""
+    if _zstd is not None:
+        return _zstd.ZstdCompressor(level=ZSTD_LEVEL).compress(raw)
+    return gzip.compress(raw, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def is_compressed(data: bytes | str) -> bool:
+    return isinstance(data, bytes) and (
+        data.startswith(GZIP_MAGIC) or data.startswith(ZSTD_MAGIC))
+
+
+def open_stream(fp: IO[bytes]) -> IO[bytes]:
+    """Wrap a seekable binary stream so reads return decompressed bytes,
+    whatever framing it carries. Raises ValueError on a zstd frame when
+    `zstandard` isn't installed."""
+    head = fp.read(4)
+    fp.seek(-len(head), io.SEEK_CUR)
+    if head.startswith(GZIP_MAGIC):
+        return gzip.GzipFile(fileobj=fp, mode="rb")
+    if head.startswith(ZSTD_MAGIC):
+        if _zstd is None:
+            raise ValueError("zstd-compressed payload; install `zstandard` to read it")
+        return _zstd.ZstdDecompressor().stream_reader(fp)
+    return fp
+
+
+def loads(data: bytes | str) -> Any:
+    """Parse a JSON payload that may be plain, gzip- or zstd-framed."""
+    if is_compressed(data):
+        with open_stream(io.BytesIO(data)) as s:
+            data = s.read()
+    return json.loads(data)
+
+
+def read_json(path: Path) -> Any:
+    """Read a JSON file written by `atomic_write_json`, compressed or not."""
+    with open(path, "rb") as fp:
+        return json.load(open_stream(fp))
+
+
+def iter_json_array(source: bytes | Path | IO[bytes]) -> Iterator[Any]:
+    """Yield the elements of a top-level JSON array one at a time.
+
+    `source` is raw bytes (a cache blob), a path, or a seekable binary
+    stream, each plain or compressed. Memory is one decoded chunk plus
+    the element being parsed, not the whole document. Raises ValueError
+    if the document isn't an array or is truncated."""
+    if isinstance(source, (bytes, bytearray)):
+        source = io.BytesIO(source)
+    if isinstance(source, Path):
+        with open(source, "rb") as fp:
+            yield from iter_json_array(fp)
+        return
+    text = io.TextIOWrapper(open_stream(source), encoding="utf-8")
+    decoder = json.JSONDecoder()
+    buf, pos, eof = "", 0, False
+
+    def fill() -> None:
+        nonlocal buf, pos, eof
+        chunk = text.read(STREAM_CHUNK)
+        eof = not chunk
+        buf, pos = buf[pos:] + chunk, 0
+
+    def next_char() -> str:
+        # Skip whitespace, refilling as needed; "" at end of input.
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or eof:
+                return buf[pos] if pos < len(buf) else ""
+            fill()
+
+    if next_char() != "[":
+        raise ValueError("not a JSON array")
+    pos += 1
+    if next_char() == "]":
+        return
+    while True:
+        next_char()  # raw_decode doesn't skip leading whitespace
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+            # A number cut at the chunk edge ("12" of "123") still decodes;
+            # only trust a value that's followed by something.
+            if end == len(buf) and not eof:
+                raise json.JSONDecodeError("need more", buf, end)
+        except json.JSONDecodeError:
+            if eof:
+                raise ValueError("truncated JSON array") from None
+            fill()
+            continue
+        yield item
+        pos = end
+        c = next_char()
+        if c == "]":
+            return
+        if c != ",":
+            raise ValueError("malformed JSON array")
+        pos += 1
+
+
 def atomic_write_json(
     path: Path,
     payload: Any,
     *,
-    indent: int = 2,
+    indent: int | None = 2,
     sort_keys: bool = False,
+    compress: bool = False,
 ) -> None:
     """Write `payload` as JSON to `path` atomically.
 
@@ -58,14 +192,22 @@ def atomic_write_json(
     proc + multi-threaded) cannot share a tmp path and clobber each other's
     in-progress bytes. The last `os.replace` wins; readers see either the
     old file or a fully-written new file, never a partial write.
+
+    With `compress=True` the file holds a compressed frame and `indent`
+    is ignored (whitespace only costs CPU once compressed); read it back
+    with `read_json` / `iter_json_array`.
     """
     path.parent.mkdir(parents=True, exist_ok=True)
     tmp = path.with_suffix(path.suffix + _next_tmp_suffix())
     try:
-        tmp.write_text(
-            json.dumps(payload, indent=indent, sort_keys=sort_keys),
-            encoding="utf-8",
-        )
+        if compress:
+            raw = json.dumps(payload, separators=(",", ":"), sort_keys=sort_keys)
+            tmp.write_bytes(compress_bytes(raw.encode("utf-8")))
+        else:
+            tmp.write_text(
+                json.dumps(payload, indent=indent, sort_keys=sort_keys),
+                encoding="utf-8",
+            )
         os.replace(tmp, path)
     finally:
         # In the rare error path (e.g. disk full mid-replace), make sure we
@@ -75,3 +217,36 @@ def atomic_write_json(
                 tmp.unlink()
             except OSError:
                 pass
+
+
+def _selftest() -> None:
+    import tempfile
+
+    rows = [{"recipient": f"Org {i}", "amount_usd": i * 1000.5, "note": "é" * (i % 7)}
+            for i in range(5000)]
+    with tempfile.TemporaryDirectory() as tmp:
+        plain, packed = Path(tmp) / "plain.json", Path(tmp) / "packed.json"
+        atomic_write_json(plain, rows)
+        atomic_write_json(packed, rows, compress=True)
+        assert is_compressed(packed.read_bytes()[:4])
+        assert packed.stat().st_size * 5 < plain.stat().st_size
+        for p in (plain, packed):
+            assert read_json(p) == rows
+            assert list(iter_json_array(p)) == rows
+        assert list(iter_json_array(gzip.compress(b"[]"))) == []
+        assert list(iter_json_array(b' [1, 22 ,333, "x"] ')) == [1, 22, 333, "x"]
+        for bad in (b'{"a": 1}', b"[1, 2", b"[1 2]"):
+            try:
+                list(iter_json_array(bad))
+            except ValueError:
+                continue
+            raise AssertionError(f"accepted {bad!r}")
+    print(f"[ok] atomic json: plain/{'zstd' if _zstd else 'gzip'} round trip, streaming arrays")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["selftest"]:
+        _selftest()
+    else:
+        print("usage: python3 -m regen_v3._atomic selftest", file=sys.stderr)
+        sys.exit(2)
@@ -0,0 +1,254 @@
+"""Diagnostic: check the indexed grounding / relabel path of
+`extract._validate_event` against the reference scans, and time it.
+No LLM calls.
+
+Size context: `_diag_revalidate` and `relabel_existing` re-run validation
+over every cached event of a cohort — thousands of (event, snippet) pairs,
+several events per snippet. Each call used to re-normalize the haystack,
+rebuild the amount surface forms, run all five guard regexes and scan
+4-8-word windows with a substring search each.
+
+The hot path now reads a cached `extract._Haystack` per (url, title,
+snippet), runs only the guards whose keywords occur (`extract._GUARDS`)
+and reuses `_amount_variants` per amount. Both shortcuts must be exact:
+`_Haystack.anchored` has to agree with `_evidence_anchored` on every pair,
+and every guard that matches a text has to pass its keyword gate. `check`
+asserts both over the corpus; `bench` times reference vs indexed.
+
+Corpus: the extract-cache entries whose inputs `_diag_prefilter` recovers
+from the search cache, or a seeded synthetic one (`--synthetic`, also used
+when the caches are empty).
+
+Usage:
+    python3 -m regen_v3._bench_validate [--synthetic N] [--repeat 3]
+    python3 -m regen_v3._bench_validate --selftest
+"""
+from __future__ import annotations
+
+import argparse
+import copy
+import logging
+import random
+import sys
+import time
+from pathlib import Path
+
+HERE = Path(__file__).parent
+ROOT = HERE.parent
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from regen_v3 import extract as extract_mod  # noqa: E402
+
+_WORDS = (
+    "the a couple gave to university hospital museum board trustee million "
+    "new center research school city gift largest history said officials "
+    "on tuesday his her their family fund donors and of in for at by with "
+    "chair ceo company shares investor wife husband art science medical "
+    "record year students building library 2019 2021 $5 $40 30"
+).split()
+_NOISE = ("<strong>", "</strong>", "&amp;", "&quot;", "&#x27;", "\u00a0", "\u2028",
+          "\x1c", "\u0130", "\u0131", "\u017f", "\u212a", "PAC", "FEC", "Pledged", "\u2014", "...")
+_PHRASES = (
+    "pledged $25 million to", "super PAC", "across five universities",
+    "lifetime giving", "between 2010 and 2020", "has given $1.5 billion",
+    "contributed to his own foundation", "will donate", "America PAC",
+    "in total, she has given", "$100M gift", "25,000,000", "$2.5 billion",
+)
+_ROLES = ("direct_gift", "grant_out", "corporate_gift", "private_investment",
+          "pledge", "political", "transfer_in", "reference_only", "made_up_role")
+_AMOUNTS = (None, 0, 5_000, 250_000, 1_000_000, 2_500_000, 25_000_000,
+            100_000_000, 1_500_000_000, 2_500_000_000, "30000000", "n/a")
+
+
+def synthetic_corpus(n: int, seed: int = 0) -> list[dict]:
+    """`n` seeded (url, title, snippet, events) entries in the shape
+    `_diag_prefilter.recover_inputs` returns."""
+    rng = random.Random(seed)
+
+    def text(k: int) -> str:
+        out = []
+        for _ in range(k):
+            r = rng.random()
+            out.append(rng.choice(_PHRASES) if r < 0.1 else
+                       rng.choice(_NOISE) if r < 0.25 else rng.choice(_WORDS))
+        return " ".join(out)
+
+    entries = []
+    for i in range(n):
+        snippet = text(rng.randint(8, 60))
+        title = text(rng.randint(0, 10))
+        url = f"https://example.com/{i}/" + "-".join(rng.sample(_WORDS, 4))
+        words = extract_mod._normalize_text(snippet).split()
+        events = []
+        for _ in range(rng.randint(1, 4)):
+            a = rng.randrange(len(words) + 1)
+            b = min(len(words), a + rng.randint(1, 12))
+            evidence = " ".join(words[a:b])
+            r = rng.random()
+            if r < 0.3 and evidence:
+                # Cut into the boundary words: windows then match mid-token.
+                evidence = evidence[rng.randint(0, 3):len(evidence) - rng.randint(0, 3)]
+            elif r < 0.5:
+                evidence = text(rng.randint(2, 12))
+            elif r < 0.6:
+                evidence = evidence.upper()
+            events.append({
+                "event_role": rng.choice(_ROLES),
+                "source_url": url,
+                "amount_usd": rng.choice(_AMOUNTS),
+                "source_type": rng.choice(("news", "press_release", "weird")),
+                "confidence": rng.choice(("high", "medium", "low", None)),
+                "date_precision": rng.choice(("day", "year", None, "decade")),
+                "recipient": rng.choice(("Example University", "America PAC", "", text(3))),
+                "extraction_evidence": evidence,
+                "extraction_note": text(rng.randint(0, 8)),
+                "note": rng.choice(("", text(4))),
+            })
+        entries.append({"url": url, "title": title, "snippet": snippet, "events": events})
+    return entries
+
+
+def _reference_haystack(url: str, title: str, snippet: str) -> str:
+    url_text = (url or "").replace("/", " ").replace("-", " ").replace("_", " ")
+    return " ".join(s for s in (title or "", snippet or "", url_text) if s)
+
+
+def _guard_texts(ev: dict) -> list[str]:
+    blob = " | ".join(str(ev.get(k) or "") for k in ("extraction_evidence", "extraction_note", "note"))
+    return [blob, str(ev.get("recipient") or "")]
+
+
+def check(entries: list[dict]) -> dict[str, int]:
+    """Count pairs where the indexed path could diverge from the reference:
+    `anchored` disagreements and guard matches that fail the keyword gate."""
+    out = {"pairs": 0, "anchored_mismatch": 0, "gate_miss": 0}
+    for e in entries:
+        ref = _reference_haystack(e["url"], e["title"], e["snippet"])
+        hay = extract_mod._Haystack(ref)
+        for ev in e["events"]:
+            out["pairs"] += 1
+            evidence = ev.get("extraction_evidence") or ""
+            if evidence and extract_mod._evidence_anchored(evidence, ref) != hay.anchored(evidence):
+                out["anchored_mismatch"] += 1
+            for t in _guard_texts(ev):
+                folded = extract_mod._guard_text(t)
+                for pattern, keywords in extract_mod._GUARDS.values():
+                    if pattern.search(t) and not any(k in folded for k in keywords):
+                        out["gate_miss"] += 1
+    return out
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return best
+
+
+def bench(entries: list[dict], repeat: int = 3) -> list[tuple[str, float, float]]:
+    """[(stage, reference seconds, indexed seconds)], best of `repeat`."""
+    pairs = [(e, ev) for e in entries for ev in e["events"]]
+    refs = {id(e): _reference_haystack(e["url"], e["title"], e["snippet"]) for e in entries}
+    amounts = [ev["amount_usd"] for _, ev in pairs
+               if isinstance(ev.get("amount_usd"), int) and ev["amount_usd"] > 0]
+    blobs = [t for _, ev in pairs for t in _guard_texts(ev)]
+    patterns = [p for p, _ in extract_mod._GUARDS.values()]
+
+    def anchored_ref():
+        for e, ev in pairs:
+            extract_mod._evidence_anchored(ev.get("extraction_evidence") or "", refs[id(e)])
+
+    def anchored_idx():
+        extract_mod._haystack.cache_clear()
+        for e, ev in pairs:
+            extract_mod._haystack(e["url"], e["title"], e["snippet"]).anchored(
+                ev.get("extraction_evidence") or "")
+
+    def guards_ref():
+        for t in blobs:
+            for p in patterns:
+                p.search(t)
+
+    def guards_idx():
+        for t in blobs:
+            folded = extract_mod._guard_text(t)
+            for name in extract_mod._GUARDS:
+                extract_mod._guard(name, t, folded)
+
+    def amounts_ref():
+        for a in amounts:
+            extract_mod._amount_variants.__wrapped__(a)
+
+    def amounts_idx():
+        extract_mod._amount_variants.cache_clear()
+        for a in amounts:
+            extract_mod._amount_variants(a)
+
+    def validate(cold: bool):
+        def run():
+            extract_mod._haystack.cache_clear()
+            for e, ev in pairs:
+                if cold:
+                    extract_mod._haystack.cache_clear()
+                extract_mod._validate_event(copy.copy(ev), e["url"],
+                                            snippet=e["snippet"], title=e["title"])
+        return run
+
+    return [
+        ("evidence anchoring", _time(anchored_ref, repeat), _time(anchored_idx, repeat)),
+        ("guard regexes", _time(guards_ref, repeat), _time(guards_idx, repeat)),
+        ("amount variants", _time(amounts_ref, repeat), _time(amounts_idx, repeat)),
+        ("_validate_event (cold / warm)", _time(validate(True), repeat),
+         _time(validate(False), repeat)),
+    ]
+
+
+def _selftest() -> None:
+    entries = synthetic_corpus(400, seed=7)
+    res = check(entries)
+    assert res["anchored_mismatch"] == 0 and res["gate_miss"] == 0, res
+    anchored = sum(extract_mod._haystack(e["url"], e["title"], e["snippet"]).anchored(
+        ev["extraction_evidence"]) for e in entries for ev in e["events"] if ev["extraction_evidence"])
+    assert 0 < anchored < res["pairs"], anchored
+    # str.lower() turns dotted capital I into "i" + U+0307; the gate must still see "will".
+    t = "She W\u0130LL donate $5 million"
+    assert extract_mod._GUARDS["pledge"][0].search(t) and check([{
+        "url": "", "title": "", "snippet": t, "events": [{"extraction_evidence": t}]}])["gate_miss"] == 0
+    print(f"[ok] bench_validate: {res['pairs']} synthetic pairs agree with the reference scans")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--synthetic", type=int, default=0, metavar="N",
+                    help="use N seeded synthetic snippets instead of the caches")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--selftest", action="store_true")
+    args = ap.parse_args(argv)
+    logging.disable(logging.WARNING)  # drop / coerce warnings are the point here
+    if args.selftest:
+        _selftest()
+        return 0
+
+    entries: list[dict] = []
+    if not args.synthetic:
+        from regen_v3 import _diag_prefilter
+        entries, _ = _diag_prefilter.recover_inputs()
+        print(f"corpus: {len(entries)} extract entries recovered from the caches")
+    if not entries:
+        entries = synthetic_corpus(args.synthetic or 2000)
+        print(f"corpus: {len(entries)} synthetic snippets")
+    res = check(entries)
+    print(f"check: {res['pairs']} (event, snippet) pairs, "
+          f"{res['anchored_mismatch']} anchoring mismatches, {res['gate_miss']} keyword-gate misses")
+    print(f"  {'stage':<32} {'reference':>10} {'indexed':>10} {'speedup':>8}")
+    for stage, ref, idx in bench(entries, repeat=args.repeat):
+        print(f"  {stage:<32} {ref * 1e3:>8.1f}ms {idx * 1e3:>8.1f}ms {ref / idx:>7.1f}x")
+    return 0 if not (res["anchored_mismatch"] or res["gate_miss"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""Diagnostic: replay the extract cache through the giving-signal
+pre-filter and report recall lost against LLM calls saved, per threshold.
+No LLM calls.
+
+Extract entries don't keep their inputs, only a hash of
+url|snippet|role_hint|subject. This recovers them the way
+_diag_revalidate does: every search-cache result is a candidate (url,
+title, snippet), its query names the subject, and the role is one of the
+canonical roles; a candidate whose key is in the extract cache is that
+entry's input. Pre-filter answers themselves are left out (they never had
+an LLM answer to lose).
+
+Usage:
+    python3 -m regen_v3._diag_prefilter [--thresholds 1,2,3,4] [--show 10]
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import sys
+from pathlib import Path
+
+HERE = Path(__file__).parent
+ROOT = HERE.parent
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from aggregate_v3 import CANONICAL_EVENT_ROLES  # noqa: E402
+from regen_v3 import cache  # noqa: E402
+from regen_v3 import extract as extract_mod  # noqa: E402
+
+SEARCH_NS = "search"
+DATA_DIR = ROOT / "data"
+# High-stakes floor, as in merge.CORROBORATION_AMOUNT_FLOOR_USD.
+HIGH_STAKES_USD = 5_000_000
+
+
+def subject_names() -> list[str]:
+    names = []
+    for fp in sorted(DATA_DIR.glob("*.v3.json")):
+        person = json.loads(fp.read_text()).get("person") or {}
+        name = person.get("name_display") or person.get("name_legal")
+        if name:
+            names.append(name)
+    return names
+
+
+def recover_inputs() -> tuple[list[dict], int]:
+    """([{key, url, title, snippet, events}], unmatched LLM entries)."""
+    answered = {
+        key: payload.get("events") or []
+        for key, payload in cache.items(extract_mod.CACHE_NS)
+        if isinstance(payload, dict) and "prefilter" not in payload
+    }
+    names = subject_names()
+    roles = sorted(CANONICAL_EVENT_ROLES) + [""]
+    found: dict[str, dict] = {}
+    for payload in cache.values(SEARCH_NS):
+        if not isinstance(payload, dict):
+            continue
+        query = (payload.get("query") or "").lower()
+        subjects = [n for n in names if n.lower() in query] or \
+                   [n for n in names if n.split()[-1].lower() in query]
+        for r in payload.get("results") or []:
+            url = r.get("url") if isinstance(r, dict) else None
+            if not isinstance(url, str) or not url:
+                continue
+            snippet = r.get("description") or ""
+            for subject in subjects:
+                for role in roles:
+                    for make in (extract_mod._cache_key, extract_mod._legacy_cache_key):
+                        key = make(url, snippet, role, subject)
+                        if key in answered and key not in found:
+                            found[key] = {"key": key, "url": url, "title": r.get("title") or "",
+                                          "snippet": snippet, "events": answered[key]}
+    return list(found.values()), len(answered) - len(found)
+
+
+def evaluate(entries: list[dict], thresholds: list[int]) -> list[dict]:
+    """One row per threshold: calls saved vs entries / events lost."""
+    for e in entries:
+        e["score"] = extract_mod.giving_signal(title=e["title"], snippet=e["snippet"], url=e["url"])
+    with_events = [e for e in entries if e["events"]]
+    n_events = sum(len(e["events"]) for e in with_events)
+    n_high = sum(1 for e in with_events for ev in e["events"]
+                 if isinstance(ev.get("amount_usd"), int) and ev["amount_usd"] >= HIGH_STAKES_USD)
+    rows = []
+    for t in thresholds:
+        skipped = [e for e in entries if e["score"] < t]
+        lost = [e for e in skipped if e["events"]]
+        lost_events = [ev for e in lost for ev in e["events"]]
+        lost_high = [ev for ev in lost_events
+                     if isinstance(ev.get("amount_usd"), int) and ev["amount_usd"] >= HIGH_STAKES_USD]
+        rows.append({
+            "threshold": t,
+            "calls_saved": len(skipped),
+            "calls_saved_pct": 100 * len(skipped) / len(entries) if entries else 0.0,
+            "entries_lost": len(lost),
+            "recall_loss_pct": 100 * len(lost) / len(with_events) if with_events else 0.0,
+            "events_lost": len(lost_events),
+            "events_lost_pct": 100 * len(lost_events) / n_events if n_events else 0.0,
+            "high_stakes_lost": len(lost_high),
+            "high_stakes_total": n_high,
+            "lost": lost,
+        })
+    return rows
+
+
+def _selftest() -> None:
+    mk = lambda snippet, events: {"url": "https://example.com/x", "title": "", "snippet": snippet,
+                                  "events": events}
+    entries = [
+        mk("Net worth $8.1B, co-founder of KKR.", []),
+        mk("Shares rose 3% on Tuesday.", []),
+        mk("He gave $25 million to the hospital.", [{"amount_usd": 25_000_000}]),
+        mk("Trustee of the museum since 2001.", [{"amount_usd": None}]),
+    ]
+    rows = {r["threshold"]: r for r in evaluate(entries, [1, 2, 3])}
+    assert rows[1]["calls_saved"] == 1 and rows[1]["entries_lost"] == 0, rows[1]
+    assert rows[2]["calls_saved"] == 3 and rows[2]["entries_lost"] == 1, rows[2]
+    assert rows[2]["recall_loss_pct"] == 50.0 and rows[2]["high_stakes_lost"] == 0
+    assert rows[3]["calls_saved"] == 3
+    print("[ok] diag_prefilter: per-threshold calls saved / recall loss")
+
+
+def main(argv=None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("--thresholds", default="1,2,3,4",
+                    help="comma-separated MIN_GIVING_SIGNAL values to replay")
+    ap.add_argument("--show", type=int, default=0, metavar="N",
+                    help="print N lost entries at the current threshold")
+    ap.add_argument("--selftest", action="store_true")
+    args = ap.parse_args(argv)
+    if args.selftest:
+        _selftest()
+        return 0
+
+    entries, unmatched = recover_inputs()
+    print(f"recovered inputs for {len(entries)} extract entries "
+          f"({unmatched} LLM entries unmatched in the search cache)")
+    if not entries:
+        return 0
+    thresholds = sorted({int(t) for t in args.thresholds.split(",") if t.strip()}
+                        | {extract_mod.MIN_GIVING_SIGNAL})
+    rows = evaluate(entries, thresholds)
+    print(f"  {'min':>4} {'calls saved':>16} {'entries lost':>16} {'events lost':>16} "
+          f"{'$5M+ lost':>10}")
+    for r in rows:
+        mark = " *" if r["threshold"] == extract_mod.MIN_GIVING_SIGNAL else ""
+        print(f"  {r['threshold']:>4} {r['calls_saved']:>7} ({r['calls_saved_pct']:5.1f}%) "
+              f"{r['entries_lost']:>7} ({r['recall_loss_pct']:5.1f}%) "
+              f"{r['events_lost']:>7} ({r['events_lost_pct']:5.1f}%) "
+              f"{r['high_stakes_lost']:>4}/{r['high_stakes_total']:<5}{mark}")
+    current = next(r for r in rows if r["threshold"] == extract_mod.MIN_GIVING_SIGNAL)
+    for e in current["lost"][:args.show]:
+        print(f"\n  score={e['score']}  {e['url']}\n    {e['title'][:100]}\n    {e['snippet'][:200]}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -15,29 +15,29 @@ from pathlib import Path
 
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-SEARCH_CACHE = HERE / "cache" / "search"
-EXTRACT_CACHE = HERE / "cache" / "extract"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from regen_v3 import cache  # noqa: E402
+from regen_v3.extract import CACHE_NS as EXTRACT_NS  # noqa: E402
 from regen_v3.extract import _cache_key, _validate_event  # noqa: E402
 
+SEARCH_NS = "search"
+
 
 def load_search_meta_for_subject(record: dict) -> dict[str, list[dict]]:
-    """Build url -> [{title, snippet}, ...] from every search-cache file.
+    """Build url -> [{title, snippet}, ...] from every search-cache entry.
 
-    The search cache isn't keyed by subject, so we walk all files. Brave
+    The search cache isn't keyed by subject, so we walk all entries. Brave
     returns *query-tailored* snippets, so the same URL can appear with
     several different snippet texts depending on which query surfaced it.
     The LLM extractor saw ONE specific snippet at extraction time; we
     don't know which, so we check the evidence against ALL of them and
     accept if any matches."""
     meta: dict[str, list[dict]] = {}
-    for fp in SEARCH_CACHE.glob("*.json"):
-        try:
-            d = json.loads(fp.read_text())
-        except Exception:
+    for d in cache.values(SEARCH_NS):
+        if not isinstance(d, dict):
             continue
         for r in d.get("results") or []:
             if not isinstance(r, dict):
@@ -60,13 +60,9 @@ def find_extract_cache_for_event(
     # Try a small set; if none hit, return None.
     for rh in ("grant_out", "direct_gift", "announcement", "pledge", "no_pledge",
                "transfer_in", "political", "reference_only", "")  :
-        key = _cache_key(url, snippet, rh, subject_name)
-        fp = EXTRACT_CACHE / f"{key}.json"
-        if fp.exists():
-            try:
-                return json.loads(fp.read_text())
-            except Exception:
-                continue
+        hit = cache.get(EXTRACT_NS, _cache_key(url, snippet, rh, subject_name))
+        if hit is not None:
+            return hit
     return None
 
 
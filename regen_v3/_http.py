@@ -0,0 +1,266 @@
+"""Shared HTTP transport: one pooled `requests.Session` per upstream host.
+
+Every source module used bare `requests.get`, which builds a throwaway
+Session per call — so each Brave query, ProPublica page, EDGAR index and
+liveness probe paid a fresh TCP + TLS handshake even when the previous
+request hit the same host milliseconds earlier.
+
+Pattern: `get(url, ...)` / `head(url, ...)` look up (or lazily create) the
+Session for the URL's scheme+host and send through it. Sessions keep
+HTTP keep-alive connections in a bounded urllib3 pool (`POOL_MAXSIZE` per
+host; extra concurrent requests open a short-lived connection rather than
+block). Hosts that serve pages get the Safari browser header set
+check_urls.py has always used; `API_HOSTS` get requests' plain client
+headers instead, so no browser UA or HTML Accept goes to an API. Per-call
+`headers=` override either key-by-key (e.g. SEC's contact UA, Brave's JSON
+Accept). gzip/deflate bodies are decoded transparently by requests; `br`
+is advertised only when the optional `brotli` module is installed so we
+never receive a body we can't decode.
+
+Sessions are shared across threads and subjects, so they are stateless:
+their cookie jar refuses every cookie (a redirect chain still carries the
+cookies set along it, and an explicit `cookies=` is still sent). We only
+issue GET/HEAD requests through them, and the connection pool itself is
+thread-safe. Per process — batch_runner workers each build their own
+pools.
+
+Rate limiting: requests to a host listed in `_ratelimit.HOST_UPSTREAMS`
+first take a token from that upstream's shared bucket (SEC, ProPublica,
+FEC, Brave, Wayback, NY registry). The wait is recorded against the
+calling function (or an explicit `caller=`). Under batch_runner's adaptive
+mode the request also holds one of the upstream's `_adaptive` in-flight
+slots, and its status and latency are reported to the controller.
+
+Reuse accounting: every request sent and every new connection opened is
+counted per host, so `stats()` reports how many requests rode an existing
+keep-alive connection. `python3 -m regen_v3._http URL [URL ...]` fetches
+the URLs and prints the counters.
+"""
+from __future__ import annotations
+
+import http.cookiejar
+import importlib.util
+import os
+import sys
+import threading
+import time
+from typing import Any
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+
+from regen_v3 import _adaptive, _ratelimit
+
+# Bloomberg, OpenSecrets, Reuters, etc. aggressively reject non-browser UAs with 403/401.
+# Use a common Safari UA so the liveness check reflects whether a human browser could
+# reach the URL, not whether a bot can.
+UA = (
+    "Mozilla/5.0 (Macintosh; Intel Mac OS X 14_0) "
+    "AppleWebKit/605.1.15 (KHTML, like Gecko) Version/17.0 Safari/605.1.15"
+)
+
+_ACCEPT_ENCODING = ("gzip, deflate, br" if importlib.util.find_spec("brotli")
+                    else "gzip, deflate")
+
+HEADERS = {
+    "User-Agent": UA,
+    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+    "Accept-Language": "en-US,en;q=0.9",
+    "Accept-Encoding": _ACCEPT_ENCODING,
+}
+
+# JSON APIs: requests' own User-Agent and Accept, not the browser set.
+API_HOSTS = frozenset({
+    "api.search.brave.com",
+    "data.sec.gov",
+    "efts.sec.gov",
+    "api.open.fec.gov",
+    "charities-search-api.ag.ny.gov",
+})
+API_HEADERS = {**requests.utils.default_headers(), "Accept-Encoding": _ACCEPT_ENCODING}
+
+# Keep-alive connections retained per host. Liveness probes don't come
+# through here; they go through `_liveness` (httpx, its own pool).
+POOL_MAXSIZE = int(os.environ.get("REGEN_HTTP_POOL_SIZE", "16"))
+
+_sessions: dict[str, requests.Session] = {}
+_sessions_lock = threading.Lock()
+
+_stats_lock = threading.Lock()
+_requests_by_host: dict[str, int] = {}
+_new_conns_by_host: dict[str, int] = {}
+
+
+def _bump(counter: dict[str, int], host: str) -> None:
+    with _stats_lock:
+        counter[host] = counter.get(host, 0) + 1
+
+
+class _CountingHTTPPool(HTTPConnectionPool):
+    def _new_conn(self):
+        _bump(_new_conns_by_host, self.host)
+        return super()._new_conn()
+
+
+class _CountingHTTPSPool(HTTPSConnectionPool):
+    def _new_conn(self):
+        _bump(_new_conns_by_host, self.host)
+        return super()._new_conn()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """HTTPAdapter whose pools count the connections they open. Redirects to
+    another host go through the same adapter, so they are counted too."""
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _CountingHTTPPool,
+            "https": _CountingHTTPSPool,
+        }
+
+    def send(self, request, *args, **kwargs):
+        _bump(_requests_by_host, urlsplit(request.url).hostname or "")
+        return super().send(request, *args, **kwargs)
+
+
+class _NoCookies(http.cookiejar.CookiePolicy):
+    """Accept and return no cookies: one subject's or thread's session
+    state never leaks into another's requests."""
+
+    netscape = True
+    rfc2965 = hide_cookie2 = False
+
+    def set_ok(self, cookie, request) -> bool:
+        return False
+
+    def return_ok(self, cookie, request) -> bool:
+        return False
+
+    def domain_return_ok(self, domain, request) -> bool:
+        return False
+
+    def path_return_ok(self, path, request) -> bool:
+        return False
+
+
+def _host_key(url: str) -> str:
+    parts = urlsplit(url)
+    return f"{parts.scheme}://{(parts.netloc or '').lower()}"
+
+
+def session_for(url: str) -> requests.Session:
+    """Return the shared Session for `url`'s scheme+host, creating it once."""
+    key = _host_key(url)
+    sess = _sessions.get(key)
+    if sess is not None:
+        return sess
+    with _sessions_lock:
+        sess = _sessions.get(key)
+        if sess is None:
+            sess = requests.Session()
+            sess.headers.clear()
+            host = (urlsplit(url).hostname or "").lower()
+            sess.headers.update(API_HEADERS if host in API_HOSTS else HEADERS)
+            sess.cookies.set_policy(_NoCookies())
+            adapter = _CountingAdapter(
+                pool_connections=4, pool_maxsize=POOL_MAXSIZE, pool_block=False,
+            )
+            sess.mount("http://", adapter)
+            sess.mount("https://", adapter)
+            _sessions[key] = sess
+        return sess
+
+
+def _caller_name() -> str:
+    """`module.function` of the first frame outside this module."""
+    f = sys._getframe(1)
+    while f is not None and f.f_globals.get("__name__") == __name__:
+        f = f.f_back
+    if f is None:
+        return ""
+    return f"{f.f_globals.get('__name__', '?')}.{f.f_code.co_name}"
+
+
+def request(method: str, url: str, *, caller: str | None = None,
+            **kwargs: Any) -> requests.Response:
+    """`requests.request` through the pooled Session for `url`'s host,
+    after taking a token from the host's upstream rate-limit bucket.
+    Same keyword arguments and exceptions as requests."""
+    upstream = _ratelimit.upstream_for_host(urlsplit(url).hostname)
+    if upstream is not None:
+        _ratelimit.acquire(upstream, caller or _caller_name())
+    with _adaptive.slot(upstream):
+        t0 = time.monotonic()
+        try:
+            resp = session_for(url).request(method, url, **kwargs)
+        except requests.exceptions.RequestException:
+            _adaptive.record(upstream, 0, time.monotonic() - t0)
+            raise
+    _adaptive.record(upstream, resp.status_code, time.monotonic() - t0)
+    return resp
+
+
+def get(url: str, **kwargs: Any) -> requests.Response:
+    return request("GET", url, **kwargs)
+
+
+def head(url: str, **kwargs: Any) -> requests.Response:
+    return request("HEAD", url, **kwargs)
+
+
+def stats() -> dict[str, Any]:
+    """Requests sent, connections opened and connections reused, overall and
+    per host, since process start (or the last `reset_stats()`)."""
+    with _stats_lock:
+        reqs = dict(_requests_by_host)
+        conns = dict(_new_conns_by_host)
+    by_host = {}
+    for host in sorted(set(reqs) | set(conns)):
+        r, c = reqs.get(host, 0), conns.get(host, 0)
+        by_host[host] = {"requests": r, "new_connections": c, "reused": max(0, r - c)}
+    total_r = sum(reqs.values())
+    total_c = sum(conns.values())
+    return {
+        "requests": total_r,
+        "new_connections": total_c,
+        "reused": max(0, total_r - total_c),
+        "by_host": by_host,
+    }
+
+
+def reset_stats() -> None:
+    with _stats_lock:
+        _requests_by_host.clear()
+        _new_conns_by_host.clear()
+
+
+def format_stats(s: dict[str, Any] | None = None) -> str:
+    """One-line summary for CLI footers: `http: 42 req · 7 conn · 35 reused`."""
+    s = s if s is not None else stats()
+    return (f"http: {s['requests']} req · {s['new_connections']} conn · "
+            f"{s['reused']} reused")
+
+
+def _main(argv: list[str]) -> int:
+    if not argv:
+        print("usage: python3 -m regen_v3._http URL [URL ...]")
+        return 2
+    for url in argv:
+        try:
+            resp = get(url, timeout=15)
+            print(f"  [{resp.status_code}] {url} ({len(resp.content)} bytes)")
+        except requests.exceptions.RequestException as e:
+            print(f"  [ERR] {url}: {type(e).__name__}: {e}")
+    s = stats()
+    print(format_stats(s))
+    for host, row in s["by_host"].items():
+        print(f"  {host}: {row['requests']} req · {row['new_connections']} conn · "
+              f"{row['reused']} reused")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(_main(sys.argv[1:]))
@@ -0,0 +1,395 @@
+"""Array-backed (CSR) graph over every ICIJ relationship, for multi-hop
+`leaks` lookups.
+
+Size context: the Offshore Leaks dump has ~2M nodes and ~3.3M
+relationships of a dozen types (officer_of, intermediary_of,
+connected_to, same_as, registered_address, ...). As a dict of lists of
+node-id strings that is several GB per process, and batch_runner runs
+several processes.
+
+Pattern: compressed sparse row arrays in one binary file written next to
+the ICIJ index (`index.graph`) by `_icij_index.build`, and `mmap`ped
+read-only by every process, so the pages are shared through the OS page
+cache (same model as the SQLite index). Nodes are the index's dense
+integer `idx`; each relationship is stored twice, once in each
+endpoint's row, with a reverse bit, so outgoing and incoming edges are
+one slice each:
+
+  offsets   uint32[n_nodes + 1]  row i is targets[offsets[i]:offsets[i+1]]
+  targets   uint32[n_edges]      neighbour idx, CSV order within a row
+  labels    uint16[n_edges]      link text ("shareholder of"), vocab code
+  rels      uint8[n_edges]       rel type code | REVERSE
+  kinds     uint8[n_nodes]       officer / intermediary / entity / ...
+  juris     uint16[n_nodes]      resolved entity jurisdiction, vocab code
+
+A JSON header carries the vocabularies and the build id of the index the
+file belongs to; `load()` refuses a graph from a different build.
+
+`Graph.bfs` is a bounded-depth breadth-first search from a set of seed
+nodes: edge filters (relationship types, role text, direction) decide
+what is traversed, node filters (kind, jurisdiction) decide what is
+reported, and hubs above `max_degree` (registered agents, shared
+addresses) are reported but not expanded. Order is fully deterministic:
+seeds in the order given, neighbours in CSV order, first path wins.
+
+CLI:
+    python3 -m regen_v3._icij_graph selftest
+"""
+from __future__ import annotations
+
+import json
+import mmap
+import os
+import struct
+import sys
+import threading
+from array import array
+from collections import deque
+from pathlib import Path
+from typing import Iterable, Iterator, NamedTuple
+
+MAGIC = b"ICIJCSR\x01"
+REVERSE = 0x80
+
+# Relationship types whose direction carries no meaning; traversed both
+# ways even when `reverse=False`.
+SYMMETRIC = frozenset({
+    "connected_to", "same_as", "same_company_as", "same_id_as",
+    "same_intermediary_as", "same_name_as", "similar",
+    "probably_same_officer_as",
+})
+# Relationship types whose link text is a role ("director of").
+ROLE_TYPES = frozenset({"officer_of", "intermediary_of"})
+
+_MAX_LABELS = 1 << 16
+
+_local = threading.local()
+
+
+class Hop(NamedTuple):
+    """A node reached by `Graph.bfs`. `via` is the hop it was reached
+    from (None for a seed); `rel` / `label` describe that edge."""
+    node: int
+    depth: int
+    via: "Hop | None"
+    rel: str
+    label: str
+    reverse: bool
+
+    def path(self) -> list["Hop"]:
+        """Seed-first list of hops ending at this one."""
+        out = []
+        h: Hop | None = self
+        while h is not None:
+            out.append(h)
+            h = h.via
+        return out[::-1]
+
+
+class Vocab:
+    """Append-only string -> small int code, code 0 = ""."""
+
+    def __init__(self, limit: int) -> None:
+        self.codes: dict[str, int] = {"": 0}
+        self.limit = limit
+
+    def code(self, s: str) -> int:
+        c = self.codes.get(s)
+        if c is None:
+            if len(self.codes) >= self.limit:
+                return 0
+            c = self.codes[s] = len(self.codes)
+        return c
+
+    def strings(self) -> list[str]:
+        return list(self.codes)
+
+
+class Builder:
+    """Collects nodes and edges during `_icij_index.build`, then writes
+    the CSR file in one pass."""
+
+    def __init__(self) -> None:
+        self.kinds = array("B")
+        self.juris = array("H")
+        self.src = array("I")
+        self.dst = array("I")
+        self.edge_rel = array("B")
+        self.edge_label = array("H")
+        self.kind_vocab = Vocab(256)
+        self.juris_vocab = Vocab(_MAX_LABELS)
+        self.rel_vocab = Vocab(REVERSE)
+        self.label_vocab = Vocab(_MAX_LABELS)
+
+    def node(self, idx: int, kind: str, jurisdiction: str = "") -> None:
+        """Record node `idx`; ids must arrive as 0, 1, 2, ..."""
+        assert idx == len(self.kinds), (idx, len(self.kinds))
+        self.kinds.append(self.kind_vocab.code(kind))
+        self.juris.append(self.juris_vocab.code(jurisdiction))
+
+    def edge(self, start: int, end: int, rel_type: str, label: str) -> None:
+        self.src.append(start)
+        self.dst.append(end)
+        self.edge_rel.append(self.rel_vocab.code(rel_type))
+        self.edge_label.append(self.label_vocab.code(label))
+
+    def write(self, path: Path, build_id: str) -> dict[str, int]:
+        """Write the graph to `path` (atomically). Returns counts."""
+        n = len(self.kinds)
+        m = 2 * len(self.src)
+        # Counting sort by row; each relationship lands in both endpoint
+        # rows, and a stable fill keeps CSV order within a row.
+        offsets = array("I", bytes(4 * (n + 1)))
+        for a, b in zip(self.src, self.dst):
+            offsets[a + 1] += 1
+            offsets[b + 1] += 1
+        for i in range(n):
+            offsets[i + 1] += offsets[i]
+        fill = array("I", offsets[:n])
+        targets = array("I", bytes(4 * m))
+        labels = array("H", bytes(2 * m))
+        rels = array("B", bytes(m))
+        for a, b, r, lab in zip(self.src, self.dst, self.edge_rel, self.edge_label):
+            p = fill[a]
+            targets[p], rels[p], labels[p] = b, r, lab
+            fill[a] = p + 1
+            p = fill[b]
+            targets[p], rels[p], labels[p] = a, r | REVERSE, lab
+            fill[b] = p + 1
+        header = json.dumps({
+            "build_id": build_id,
+            "n_nodes": n,
+            "n_edges": m,
+            "kinds": self.kind_vocab.strings(),
+            "jurisdictions": self.juris_vocab.strings(),
+            "rel_types": self.rel_vocab.strings(),
+            "labels": self.label_vocab.strings(),
+        }).encode()
+        pad = -(len(MAGIC) + 4 + len(header)) % 8
+        tmp = path.with_name(f"{path.name}.pid{os.getpid()}.tmp")
+        try:
+            with open(tmp, "wb") as fh:
+                fh.write(MAGIC + struct.pack("<I", len(header)) + header + b" " * pad)
+                # 4-byte arrays first, then 2, then 1: every array stays aligned.
+                for arr in (offsets, targets, labels, rels, self.juris, self.kinds):
+                    if sys.byteorder != "little":
+                        arr = array(arr.typecode, arr)
+                        arr.byteswap()
+                    arr.tofile(fh)
+            os.replace(tmp, path)
+        finally:
+            tmp.unlink(missing_ok=True)
+        return {"graph_nodes": n, "graph_edges": len(self.src)}
+
+
+class Graph:
+    """Read-only view over a graph file. Use `load()`."""
+
+    def __init__(self, path: Path) -> None:
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        if self._mm[:len(MAGIC)] != MAGIC:
+            raise ValueError(f"{path}: not an ICIJ graph file")
+        (hlen,) = struct.unpack_from("<I", self._mm, len(MAGIC))
+        start = len(MAGIC) + 4
+        meta = json.loads(self._mm[start:start + hlen])
+        self.build_id: str = meta["build_id"]
+        self.n_nodes: int = meta["n_nodes"]
+        self.n_edges: int = meta["n_edges"]
+        self.kinds: list[str] = meta["kinds"]
+        self.jurisdictions: list[str] = meta["jurisdictions"]
+        self.rel_types: list[str] = meta["rel_types"]
+        self.labels: list[str] = meta["labels"]
+        view = memoryview(self._mm)
+        pos = start + hlen
+        pos += -pos % 8
+        arrays = []
+        for fmt, count in (("I", self.n_nodes + 1), ("I", self.n_edges),
+                           ("H", self.n_edges), ("B", self.n_edges),
+                           ("H", self.n_nodes), ("B", self.n_nodes)):
+            size = struct.calcsize(fmt) * count
+            arrays.append(view[pos:pos + size].cast(fmt))
+            pos += size
+        (self._offsets, self._targets, self._labels, self._rels,
+         self._juris, self._kinds) = arrays
+
+    def degree(self, node: int) -> int:
+        return self._offsets[node + 1] - self._offsets[node]
+
+    def kind(self, node: int) -> str:
+        return self.kinds[self._kinds[node]]
+
+    def jurisdiction(self, node: int) -> str:
+        return self.jurisdictions[self._juris[node]]
+
+    def edges(self, node: int) -> Iterator[tuple[int, str, str, bool]]:
+        """(neighbour, rel type, link text, reverse) in CSV order."""
+        for p in range(self._offsets[node], self._offsets[node + 1]):
+            r = self._rels[p]
+            yield (self._targets[p], self.rel_types[r & ~REVERSE],
+                   self.labels[self._labels[p]], bool(r & REVERSE))
+
+    def bfs(
+        self,
+        seeds: Iterable[int],
+        *,
+        max_depth: int = 3,
+        rel_types: Iterable[str] | None = None,
+        roles: Iterable[str] | None = None,
+        reverse: bool = False,
+        kinds: Iterable[str] | None = None,
+        jurisdictions: Iterable[str] | None = None,
+        max_degree: int = 1000,
+        max_results: int = 1000,
+    ) -> list[Hop]:
+        """Nodes within `max_depth` edges of `seeds`, nearest first.
+
+        Traversal: an edge is followed if its type is in `rel_types` (all
+        types if None), it runs forward or is SYMMETRIC (or `reverse` is
+        set), and, for ROLE_TYPES, its link text contains one of `roles`
+        (case-insensitive; any role if None). Nodes with more than
+        `max_degree` edges are reported but not expanded.
+
+        Reporting: seeds are never reported; other nodes are if their kind
+        is in `kinds` and their jurisdiction contains one of
+        `jurisdictions` (case-insensitive; None = no filter). At most
+        `max_results` hops are returned."""
+        rel_ok = self._codes(self.rel_types, rel_types)
+        kind_ok = self._codes(self.kinds, kinds)
+        juris_ok = None
+        if jurisdictions is not None:
+            wanted = [j.lower() for j in jurisdictions]
+            juris_ok = {i for i, s in enumerate(self.jurisdictions)
+                        if s and any(w in s.lower() for w in wanted)}
+        role_labels = None
+        if roles is not None:
+            wanted = [r.lower() for r in roles]
+            role_labels = {i for i, s in enumerate(self.labels)
+                           if any(w in s.lower() for w in wanted)}
+        symmetric = {i for i, s in enumerate(self.rel_types) if s in SYMMETRIC}
+        role_types = {i for i, s in enumerate(self.rel_types) if s in ROLE_TYPES}
+
+        offsets, targets, rels, labels = self._offsets, self._targets, self._rels, self._labels
+        seen: set[int] = set()
+        queue: deque[Hop] = deque()
+        for s in seeds:
+            if 0 <= s < self.n_nodes and s not in seen:
+                seen.add(s)
+                queue.append(Hop(s, 0, None, "", "", False))
+        out: list[Hop] = []
+        while queue:
+            hop = queue.popleft()
+            if hop.depth >= max_depth or self.degree(hop.node) > max_degree:
+                continue
+            for p in range(offsets[hop.node], offsets[hop.node + 1]):
+                nxt = targets[p]
+                if nxt in seen:
+                    continue
+                r = rels[p]
+                code, back = r & ~REVERSE, bool(r & REVERSE)
+                if rel_ok is not None and code not in rel_ok:
+                    continue
+                if back and not reverse and code not in symmetric:
+                    continue
+                if role_labels is not None and code in role_types and labels[p] not in role_labels:
+                    continue
+                seen.add(nxt)
+                h = Hop(nxt, hop.depth + 1, hop, self.rel_types[code],
+                        self.labels[labels[p]], back)
+                queue.append(h)
+                if ((kind_ok is None or self._kinds[nxt] in kind_ok)
+                        and (juris_ok is None or self._juris[nxt] in juris_ok)):
+                    out.append(h)
+                    if len(out) >= max_results:
+                        return out
+        return out
+
+    @staticmethod
+    def _codes(vocab: list[str], wanted: Iterable[str] | None) -> set[int] | None:
+        if wanted is None:
+            return None
+        wanted = set(wanted)
+        return {i for i, s in enumerate(vocab) if s in wanted}
+
+
+def load(path: Path, build_id: str | None = None) -> Graph | None:
+    """The graph at `path`, mapped once per process and file. None if it
+    is missing, unreadable, or (given `build_id`) from another build."""
+    path = Path(path)
+    try:
+        key = (os.getpid(), str(path), path.stat().st_ino)
+    except OSError:
+        return None
+    graphs = getattr(_local, "graphs", None)
+    if graphs is None:
+        graphs = _local.graphs = {}
+    g = graphs.get(key)
+    if g is None:
+        try:
+            g = graphs[key] = Graph(path)
+        except (OSError, ValueError, KeyError):
+            return None
+    if build_id is not None and g.build_id != build_id:
+        return None
+    return g
+
+
+def _selftest() -> None:
+    import tempfile
+
+    # 0 person -> 1 holding -> 2 trust (connected_to) -> 3 foundation
+    # 0 -> 4 hub (director of); hub -> 5..(5 + 1200) below it
+    # 6 co-officer -> 1 (reached only with reverse=True)
+    b = Builder()
+    kinds = ["officer", "entity", "entity", "entity", "entity", "entity", "officer"]
+    juris = ["", "British Virgin Islands", "Jersey", "Panama", "Panama", "Panama", ""]
+    for i, (k, j) in enumerate(zip(kinds, juris)):
+        b.node(i, k, j)
+    for i in range(7, 1207):
+        b.node(i, "entity", "Cayman Islands")
+    b.edge(0, 1, "officer_of", "shareholder of")
+    b.edge(1, 2, "connected_to", "connected to")
+    b.edge(3, 2, "same_as", "")
+    b.edge(0, 4, "officer_of", "director of")
+    b.edge(4, 5, "officer_of", "nominee of")
+    for i in range(7, 1207):
+        b.edge(4, i, "registered_address", "")
+    b.edge(6, 1, "officer_of", "director of")
+    b.edge(0, 0, "similar", "")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        path = Path(tmp) / "index.graph"
+        assert b.write(path, "b1") == {"graph_nodes": 1207, "graph_edges": 1207}
+        assert load(path, "other") is None
+        g = load(path, "b1")
+        assert g is not None and load(path) is g
+        assert g.degree(1) == 3 and g.kind(1) == "entity" and g.jurisdiction(3) == "Panama"
+        assert list(g.edges(1)) == [(0, "officer_of", "shareholder of", True),
+                                    (2, "connected_to", "connected to", False),
+                                    (6, "officer_of", "director of", True)]
+
+        # Hub 4 has 1202 edges > max_degree: reported, not expanded.
+        hops = g.bfs([0])
+        assert [h.node for h in hops] == [1, 4, 2, 3], [h.node for h in hops]
+        assert [h.depth for h in hops] == [1, 1, 2, 3]
+        assert [(h.node, h.rel, h.label) for h in hops[-1].path()] == [
+            (0, "", ""), (1, "officer_of", "shareholder of"),
+            (2, "connected_to", "connected to"), (3, "same_as", "")]
+        assert [h.node for h in g.bfs([0], max_degree=5000, max_results=6)][:5] == [1, 4, 2, 5, 7]
+        assert [h.node for h in g.bfs([0], max_depth=1)] == [1, 4]
+        assert [h.node for h in g.bfs([0], reverse=True)] == [1, 4, 2, 6, 3]
+        assert [h.node for h in g.bfs([0], roles=["shareholder"])] == [1, 2, 3]
+        assert [h.node for h in g.bfs([0], rel_types=["officer_of"])] == [1, 4]
+        assert [h.node for h in g.bfs([0], jurisdictions=["panama"])] == [4, 3]
+        assert [h.node for h in g.bfs([0], kinds=["officer"], reverse=True)] == [6]
+        assert g.bfs([404, -1]) == [] and g.bfs([]) == []
+        assert g.bfs([0, 1])[0].node == 4  # seeds are never reported
+    print("[ok] icij graph: CSR build/load, bfs filters, hubs, paths")
+
+
+if __name__ == "__main__":
+    if sys.argv[1:] == ["selftest"]:
+        _selftest()
+    else:
+        print("usage: python3 -m regen_v3._icij_graph selftest", file=sys.stderr)
+        sys.exit(2)
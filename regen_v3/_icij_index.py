@@ -0,0 +1,647 @@
+"""Prebuilt on-disk index of the ICIJ Offshore Leaks CSVs for `leaks`.
+
+Size context: the bulk dump is ~626 MB of CSV (officers, intermediaries,
+entities, relationships). `leaks` used to parse all four into Python
+dicts on first use in every process — under batch_runner's spawn pool
+that is tens of seconds and several GB of RSS per worker, repeated for
+every worker.
+
+Pattern: parse the CSVs once into one SQLite file next to them
+(`regen_v3/data/icij/index.sqlite3`) holding only what `leaks` reads:
+
+  nodes      node_id -> kind, name, countries, jurisdiction, source
+             (officers + intermediaries + entities; the entity
+             jurisdiction is pre-resolved the way `_matches_for_name`
+             resolves it)
+  name_keys  normalized token-set key -> node_ids, in CSV first-seen order
+  postings   token -> key_ids containing it (inverted index over name_keys)
+  links      officer_of / intermediary_of edges, person -> entity
+
+and, beside it, `index.graph`: every relationship type as a CSR graph
+over the nodes' dense `idx` (see `_icij_graph`), for multi-hop lookups.
+The two files carry the same build id, so a reader never pairs a graph
+with an index from another build; a rebuild replaces the index first,
+and in between `graph()` is None (leaks then doesn't cache the name).
+
+Opening the index is a read-only connection with a large `mmap_size`, so
+rows are paged in from the OS page cache on demand instead of parsed.
+Name lookups go through `postings`: `candidate_keys` intersects the query
+tokens' posting lists in SQL and returns only the keys sharing two of
+them (one being the surname anchor, when there is one), so a lookup loads
+a handful of keys instead of a whole posting list or millions of rows.
+
+Sharing across processes: nothing is parsed into per-process structures,
+so N processes reading the same file share one copy of it in the OS page
+cache (the mmap'd pages are clean and file-backed). batch_runner builds
+and `warm()`s the index in the parent before starting its spawn pool, and
+workers attach to that file read-only; per-worker RSS is then the pages a
+worker actually touches, not a private copy of the dump.
+
+Freshness: the build records each CSV's size and mtime plus
+FORMAT_VERSION in a `meta` table; `ensure_built()` rebuilds whenever they
+differ (a weekly ICIJ refresh, or a format change here). Builds write a
+per-process temp file and `os.replace` it into place, so a reader holding
+the old file keeps a consistent snapshot and concurrent builders can't
+interleave.
+
+CLI:
+    python3 -m regen_v3._icij_index build [--force]
+    python3 -m regen_v3._icij_index info
+    python3 -m regen_v3._icij_index selftest
+"""
+from __future__ import annotations
+
+import argparse
+import contextlib
+import csv
+import json
+import os
+import random
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Iterable, Iterator
+
+try:
+    from regen_v3 import _icij_graph  # type: ignore
+except Exception:  # pragma: no cover - in-package fallback
+    import _icij_graph  # type: ignore
+
+HERE = Path(__file__).parent
+ICIJ_DIR = HERE / "data" / "icij"
+INDEX_PATH = ICIJ_DIR / "index.sqlite3"
+
+# Bump when the schema or the normalization feeding `name_keys` changes;
+# existing indexes are then rebuilt on next use.
+FORMAT_VERSION = 3
+
+SOURCE_FILES = (
+    "nodes-officers.csv",
+    "nodes-intermediaries.csv",
+    "nodes-entities.csv",
+    "relationships.csv",
+    # Graph-only node files; indexed when the dump includes them.
+    "nodes-others.csv",
+    "nodes-addresses.csv",
+)
+PEOPLE_FILES = (("nodes-officers.csv", "officer"), ("nodes-intermediaries.csv", "intermediary"))
+OTHER_FILES = (("nodes-others.csv", "other"), ("nodes-addresses.csv", "address"))
+LINK_TYPES = ("officer_of", "intermediary_of")
+
+# Map the whole file; SQLite caps this at the file size.
+MMAP_SIZE = 1 << 36
+# Rows per executemany during the build.
+BATCH = 50_000
+
+csv.field_size_limit(sys.maxsize)
+
+_SCHEMA = (
+    "CREATE TABLE meta (k TEXT PRIMARY KEY, v TEXT NOT NULL)",
+    """CREATE TABLE nodes (
+        node_id      TEXT PRIMARY KEY,
+        idx          INTEGER NOT NULL,
+        kind         TEXT NOT NULL,
+        name         TEXT NOT NULL,
+        countries    TEXT NOT NULL,
+        jurisdiction TEXT NOT NULL,
+        source       TEXT NOT NULL
+    ) WITHOUT ROWID""",
+    "CREATE UNIQUE INDEX nodes_by_idx ON nodes (idx)",
+    """CREATE TABLE name_keys (
+        key_id   INTEGER PRIMARY KEY,
+        key      TEXT NOT NULL,
+        node_ids TEXT NOT NULL
+    )""",
+    """CREATE TABLE postings (
+        token  TEXT NOT NULL,
+        key_id INTEGER NOT NULL,
+        PRIMARY KEY (token, key_id)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE links (
+        start  TEXT NOT NULL,
+        seq    INTEGER NOT NULL,
+        end    TEXT NOT NULL,
+        link   TEXT NOT NULL,
+        source TEXT NOT NULL,
+        PRIMARY KEY (start, seq)
+    ) WITHOUT ROWID""",
+)
+
+_local = threading.local()
+
+
+def fingerprint(src_dir: Path = ICIJ_DIR) -> dict:
+    """{file: [size, mtime_ns]} for the CSVs present, plus the format."""
+    files = {}
+    for name in SOURCE_FILES:
+        p = src_dir / name
+        if p.exists():
+            st = p.stat()
+            files[name] = [st.st_size, st.st_mtime_ns]
+    return {"format": FORMAT_VERSION, "files": files}
+
+
+def _read_meta(path: Path) -> dict | None:
+    try:
+        conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    except sqlite3.Error:
+        return None
+    try:
+        return {k: json.loads(v) for k, v in conn.execute("SELECT k, v FROM meta")}
+    except sqlite3.Error:
+        return None
+    finally:
+        conn.close()
+
+
+def graph_path(index_path: Path | None = None) -> Path:
+    return (index_path or INDEX_PATH).with_suffix(".graph")
+
+
+def is_current(src_dir: Path = ICIJ_DIR, index_path: Path | None = None) -> bool:
+    meta = _read_meta(index_path or INDEX_PATH)
+    return (bool(meta) and meta.get("fingerprint") == fingerprint(src_dir)
+            and graph_path(index_path).exists())
+
+
+def _rows(path: Path) -> Iterator[dict]:
+    if not path.exists():
+        return
+    with open(path, "r", encoding="utf-8", newline="") as fh:
+        yield from csv.DictReader(fh)
+
+
+def _batched(rows: Iterable[tuple], n: int = BATCH) -> Iterator[list[tuple]]:
+    batch: list[tuple] = []
+    for r in rows:
+        batch.append(r)
+        if len(batch) >= n:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def build(
+    tokens: Callable[[str], frozenset[str]],
+    *,
+    src_dir: Path = ICIJ_DIR,
+    index_path: Path | None = None,
+) -> dict[str, int]:
+    """Parse the CSVs in `src_dir` into a fresh index at `index_path`, and
+    its graph next to it. `tokens` is the caller's name normalizer
+    (`leaks._tokens`); keys with fewer than two tokens aren't indexed.
+    Returns row counts."""
+    index_path = index_path or INDEX_PATH
+    fp = fingerprint(src_dir)
+    build_id = uuid.uuid4().hex
+    tmp = index_path.with_name(f"{index_path.name}.pid{os.getpid()}.tmp")
+    tmp.unlink(missing_ok=True)
+    conn = sqlite3.connect(str(tmp), isolation_level=None)
+    counts = {"people": 0, "entities": 0, "others": 0, "name_keys": 0, "links": 0}
+    # node_id -> dense idx, in first-seen order; the graph's node numbering.
+    ids: dict[str, int] = {}
+    graph = _icij_graph.Builder()
+
+    def idx_for(nid: str, kind: str, jurisdiction: str = "") -> int:
+        i = ids.get(nid)
+        if i is None:
+            i = ids[nid] = len(ids)
+            graph.node(i, kind, jurisdiction)
+        return i
+
+    try:
+        conn.execute("PRAGMA journal_mode=OFF")
+        conn.execute("PRAGMA synchronous=OFF")
+        for stmt in _SCHEMA:
+            conn.execute(stmt)
+        conn.execute("BEGIN")
+
+        # People: officers + intermediaries, and the token-set name index.
+        # Keys keep first-seen order (key_id) and node order within a key,
+        # which is the order the old in-memory dict iterated in.
+        name_index: dict[frozenset[str], list[str]] = {}
+
+        def people() -> Iterator[tuple]:
+            for fname, kind in PEOPLE_FILES:
+                for row in _rows(src_dir / fname):
+                    nid = row.get("node_id")
+                    name = (row.get("name") or "").strip()
+                    if not nid or not name:
+                        continue
+                    counts["people"] += 1
+                    key = tokens(name)
+                    if len(key) >= 2:
+                        name_index.setdefault(key, []).append(nid)
+                    yield (nid, idx_for(nid, kind), kind, row.get("name") or "",
+                           row.get("countries") or "", "", row.get("sourceID") or "")
+
+        for batch in _batched(people()):
+            conn.executemany("INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        for batch in _batched(
+            (i, " ".join(sorted(k)), ",".join(ids))
+            for i, (k, ids) in enumerate(name_index.items(), 1)
+        ):
+            conn.executemany("INSERT INTO name_keys VALUES (?, ?, ?)", batch)
+        for batch in _batched(
+            (tok, i)
+            for i, k in enumerate(name_index, 1)
+            for tok in k
+        ):
+            conn.executemany("INSERT INTO postings VALUES (?, ?)", batch)
+        counts["name_keys"] = len(name_index)
+        name_index.clear()
+
+        def entities() -> Iterator[tuple]:
+            for row in _rows(src_dir / "nodes-entities.csv"):
+                nid = row.get("node_id")
+                if not nid:
+                    continue
+                counts["entities"] += 1
+                juris = (row.get("jurisdiction_description")
+                         or row.get("jurisdiction")
+                         or row.get("countries")
+                         or "")
+                yield (nid, idx_for(nid, "entity", juris), "entity", row.get("name") or "",
+                       row.get("countries") or "", juris, row.get("sourceID") or "")
+
+        for batch in _batched(entities()):
+            conn.executemany("INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+
+        def others() -> Iterator[tuple]:
+            for fname, kind in OTHER_FILES:
+                for row in _rows(src_dir / fname):
+                    nid = row.get("node_id")
+                    if not nid:
+                        continue
+                    counts["others"] += 1
+                    yield (nid, idx_for(nid, kind), kind,
+                           row.get("name") or row.get("address") or "",
+                           row.get("countries") or "", "", row.get("sourceID") or "")
+
+        for batch in _batched(others()):
+            conn.executemany("INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+
+        # Every relationship goes into the graph; officer_of /
+        # intermediary_of also into `links`. Endpoints missing from the
+        # node files still get an idx (and a bare "unknown" row).
+        known = len(ids)
+        seq: dict[str, int] = {}
+
+        def links() -> Iterator[tuple]:
+            for row in _rows(src_dir / "relationships.csv"):
+                rel_type = row.get("rel_type") or ""
+                start, end = row.get("node_id_start"), row.get("node_id_end")
+                if not start or not end:
+                    continue
+                label = (row.get("link") or rel_type).strip()
+                graph.edge(idx_for(start, "unknown"), idx_for(end, "unknown"), rel_type, label)
+                if rel_type not in LINK_TYPES:
+                    continue
+                n = seq[start] = seq.get(start, 0) + 1
+                counts["links"] += 1
+                yield (start, n, end, label, (row.get("sourceID") or "").strip())
+
+        for batch in _batched(links()):
+            conn.executemany("INSERT INTO links VALUES (?, ?, ?, ?, ?)", batch)
+        seq.clear()
+        for batch in _batched(
+            (nid, i, "unknown", "", "", "", "")
+            for nid, i in ids.items() if i >= known
+        ):
+            conn.executemany("INSERT INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?)", batch)
+        ids.clear()
+
+        counts.update(graph.write(graph_path(tmp), build_id))
+        conn.executemany("INSERT INTO meta VALUES (?, ?)", [
+            ("fingerprint", json.dumps(fp)),
+            ("counts", json.dumps(counts)),
+            ("build_id", json.dumps(build_id)),
+            ("built_at", json.dumps(time.time())),
+        ])
+        conn.execute("COMMIT")
+        conn.execute("ANALYZE")
+        conn.close()
+        # Index first, then its graph: until the graph lands, readers see
+        # the new build id with the old graph and get no graph (`graph`),
+        # never a graph whose idx numbering doesn't match the nodes.
+        os.replace(tmp, index_path)
+        os.replace(graph_path(tmp), graph_path(index_path))
+    finally:
+        with contextlib.suppress(sqlite3.Error):
+            conn.close()
+        tmp.unlink(missing_ok=True)
+        graph_path(tmp).unlink(missing_ok=True)
+    return counts
+
+
+def ensure_built(
+    tokens: Callable[[str], frozenset[str]],
+    *,
+    src_dir: Path = ICIJ_DIR,
+    force: bool = False,
+) -> bool:
+    """Build (or rebuild) the index if it's missing or stale. Returns
+    False if there are no CSVs to build from."""
+    if not (src_dir / "nodes-officers.csv").exists():
+        return False
+    if force or not is_current(src_dir):
+        t0 = time.monotonic()
+        print(f"    [leaks] building ICIJ index at {INDEX_PATH} (one-time)")
+        counts = build(tokens, src_dir=src_dir)
+        print(f"    [leaks] index built in {time.monotonic() - t0:.0f}s: "
+              + ", ".join(f"{v} {k}" for k, v in counts.items()))
+    return True
+
+
+def warm(path: Path | None = None) -> None:
+    """Ask the kernel to read the whole index into the page cache ahead of
+    use, so the first lookups in every worker hit memory. Advisory and
+    non-blocking; a no-op where posix_fadvise doesn't exist."""
+    path = Path(path or INDEX_PATH)
+    if not hasattr(os, "posix_fadvise"):
+        return
+    for p in (path, graph_path(path)):
+        if not p.exists():
+            continue
+        fd = os.open(p, os.O_RDONLY)
+        try:
+            os.posix_fadvise(fd, 0, 0, os.POSIX_FADV_WILLNEED)
+        finally:
+            os.close(fd)
+
+
+def _conn() -> sqlite3.Connection:
+    """Read-only connection to INDEX_PATH for this thread of this process."""
+    key = (os.getpid(), str(INDEX_PATH), INDEX_PATH.stat().st_ino)
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    conn = conns.get(key)
+    if conn is None:
+        conn = sqlite3.connect(f"file:{INDEX_PATH}?mode=ro", uri=True)
+        conn.execute(f"PRAGMA mmap_size={MMAP_SIZE}")
+        conn.execute("PRAGMA query_only=1")
+        conns[key] = conn
+    return conn
+
+
+@contextlib.contextmanager
+def use(path: Path) -> Iterator[Path]:
+    """Point lookups at another index file for the duration of the block."""
+    global INDEX_PATH
+    saved = INDEX_PATH
+    INDEX_PATH = Path(path)
+    try:
+        yield INDEX_PATH
+    finally:
+        INDEX_PATH = saved
+
+
+def iter_name_keys() -> Iterator[tuple[frozenset[str], list[str]]]:
+    """(token set, node_ids) for every indexed name, in CSV first-seen order."""
+    for key, ids in _conn().execute("SELECT key, node_ids FROM name_keys ORDER BY key_id"):
+        yield frozenset(key.split(" ")), ids.split(",")
+
+
+def candidate_keys(
+    tokens: Iterable[str], anchor: str | None = None,
+) -> list[tuple[frozenset[str], list[str]]]:
+    """(token set, node_ids) for every indexed name sharing at least two of
+    `tokens` — and, given an `anchor` (one of `tokens`), the anchor plus
+    at least one other — in the same order as `iter_name_keys`.
+
+    The posting lists are intersected in SQL, so only candidate keys are
+    loaded: with an anchor, each key on its list is kept if a primary-key
+    seek finds it under another token (no other list is read); without
+    one, every key listed under two or more."""
+    toks = sorted(set(tokens) - {anchor})
+    if anchor is not None:
+        if not toks:
+            return []
+        marks = ",".join("?" * len(toks))
+        sql = ("SELECT p.key_id FROM postings p WHERE p.token = ? AND EXISTS ("
+               "SELECT 1 FROM postings q WHERE q.token IN "
+               f"({marks}) AND q.key_id = p.key_id)")
+        args = [anchor, *toks]
+    else:
+        if len(toks) < 2:
+            return []
+        marks = ",".join("?" * len(toks))
+        sql = (f"SELECT key_id FROM postings WHERE token IN ({marks}) "
+               "GROUP BY key_id HAVING COUNT(*) >= 2")
+        args = toks
+    rows = _conn().execute(
+        f"SELECT k.key, k.node_ids FROM name_keys k WHERE k.key_id IN ({sql}) "
+        "ORDER BY k.key_id",
+        args,
+    )
+    return [(frozenset(key.split(" ")), ids.split(",")) for key, ids in rows]
+
+
+def _node_rows(column: str, keys: Iterable) -> Iterator[dict]:
+    keys = list(dict.fromkeys(keys))
+    conn = _conn()
+    for i in range(0, len(keys), 500):
+        chunk = keys[i:i + 500]
+        for nid, idx, kind, name, countries, juris, source in conn.execute(
+            "SELECT node_id, idx, kind, name, countries, jurisdiction, source FROM nodes "
+            f"WHERE {column} IN ({','.join('?' * len(chunk))})", chunk,
+        ):
+            yield {"node_id": nid, "idx": idx, "kind": kind, "name": name,
+                   "countries": countries, "jurisdiction": juris, "source": source}
+
+
+def nodes(node_ids: Iterable[str]) -> dict[str, dict]:
+    """node_id -> {node_id, idx, kind, name, countries, jurisdiction,
+    source} for the ids present in the index."""
+    return {row["node_id"]: row for row in _node_rows("node_id", node_ids)}
+
+
+def nodes_at(idxs: Iterable[int]) -> dict[int, dict]:
+    """Same rows as `nodes`, keyed by graph idx."""
+    return {row["idx"]: row for row in _node_rows("idx", idxs)}
+
+
+def graph() -> "_icij_graph.Graph | None":
+    """The CSR relationship graph built with the current index, or None
+    (no graph file, or one left over from another build)."""
+    row = _conn().execute("SELECT v FROM meta WHERE k = 'build_id'").fetchone()
+    if row is None:
+        return None
+    return _icij_graph.load(graph_path(), build_id=json.loads(row[0]))
+
+
+def links_from(node_id: str) -> list[tuple[str, str, str]]:
+    """[(entity_node_id, link_label, sourceID)] for a person, CSV order."""
+    return _conn().execute(
+        "SELECT end, link, source FROM links WHERE start = ? ORDER BY seq", (node_id,),
+    ).fetchall()
+
+
+def sample_person_names(n: int, *, seed: int = 0) -> list[str]:
+    """`n` officer / intermediary names, reservoir-sampled deterministically."""
+    rng = random.Random(seed)
+    out: list[str] = []
+    for i, (name,) in enumerate(_conn().execute(
+        "SELECT name FROM nodes WHERE kind != 'entity' ORDER BY node_id"
+    )):
+        if i < n:
+            out.append(name)
+        else:
+            j = rng.randrange(i + 1)
+            if j < n:
+                out[j] = name
+    return out
+
+
+def info() -> dict:
+    meta = _read_meta(INDEX_PATH) or {}
+    return {
+        "path": str(INDEX_PATH),
+        "bytes": INDEX_PATH.stat().st_size if INDEX_PATH.exists() else 0,
+        "current": is_current(),
+        **meta,
+    }
+
+
+def write_sample_csvs(d: Path) -> None:
+    """A few ICIJ-shaped rows for self-tests (here and in `leaks`)."""
+    d.mkdir(parents=True, exist_ok=True)
+
+    def w(name: str, header: list[str], rows: list[list[str]]) -> None:
+        with open(d / name, "w", encoding="utf-8", newline="") as fh:
+            cw = csv.writer(fh)
+            cw.writerow(header)
+            cw.writerows(rows)
+
+    w("nodes-officers.csv", ["node_id", "name", "countries", "sourceID"], [
+        ["1", "KRAVIS, HENRY ROGER", "United States", "Paradise Papers"],
+        ["2", "Blavatnik - Leonard", "United Kingdom", "Panama Papers"],
+        ["3", "GEORGE BRUCE", "Bahamas", "Bahamas Leaks"],
+        ["4", "Acme", "", "Panama Papers"],
+        ["5", "Kravis Holdings Ltd", "", "Paradise Papers"],
+    ])
+    w("nodes-intermediaries.csv", ["node_id", "name", "countries", "sourceID"], [
+        ["6", "Henry Kravis", "United States", "Offshore Leaks"],
+    ])
+    w("nodes-entities.csv",
+      ["node_id", "name", "jurisdiction", "jurisdiction_description", "countries", "sourceID"], [
+        ["10", "Alpha Trust Ltd", "BVI", "British Virgin Islands", "", "Paradise Papers"],
+        ["11", "Beta Holdings", "", "", "Cayman Islands", "Panama Papers"],
+        ["12", "Gamma Foundation", "PAN", "Panama", "", "Paradise Papers"],
+        ["13", "Delta Family Trust", "", "", "Jersey", "Paradise Papers"],
+    ])
+    w("relationships.csv",
+      ["node_id_start", "node_id_end", "rel_type", "link", "sourceID"], [
+        ["1", "10", "officer_of", "shareholder of", "Paradise Papers"],
+        ["1", "11", "officer_of", "", "Panama Papers"],
+        ["2", "11", "officer_of", "director of", "Panama Papers"],
+        ["6", "12", "intermediary_of", "intermediary of", "Offshore Leaks"],
+        ["10", "12", "connected_to", "connected to", "Paradise Papers"],
+        ["3", "10", "registered_address", "", "Bahamas Leaks"],
+        ["12", "13", "same_as", "", "Paradise Papers"],
+        ["13", "99", "connected_to", "", "Paradise Papers"],
+    ])
+
+
+def _selftest() -> None:
+    import tempfile
+
+    def toks(name: str) -> frozenset[str]:
+        return frozenset(t for t in name.lower().replace(",", " ").replace("-", " ").split()
+                         if len(t) >= 2)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src = Path(tmp)
+        write_sample_csvs(src)
+        idx = src / "index.sqlite3"
+        assert not is_current(src, idx)
+        counts = build(toks, src_dir=src, index_path=idx)
+        assert counts == {"people": 6, "entities": 4, "others": 0, "name_keys": 5,
+                          "links": 4, "graph_nodes": 11, "graph_edges": 8}, counts
+        with use(idx):
+            # 2 + 3 + 2 + 3 + 2 tokens over the five multi-token names.
+            assert _conn().execute("SELECT COUNT(*) FROM postings").fetchone()[0] == 12
+        assert is_current(src, idx)
+        with use(idx):
+            keys = list(iter_name_keys())
+            assert keys[0] == (frozenset({"kravis", "henry", "roger"}), ["1"]), keys
+            assert len(keys) == 5 and all(len(k) >= 2 for k, _ in keys)
+            assert [k for k, _ in candidate_keys(["henry", "kravis"], "kravis")] == [
+                frozenset({"kravis", "henry", "roger"}),
+                frozenset({"henry", "kravis"})]
+            assert [k for k, _ in candidate_keys(["henry", "kravis", "holdings"])] == [
+                frozenset({"kravis", "henry", "roger"}),
+                frozenset({"kravis", "holdings", "ltd"}),
+                frozenset({"henry", "kravis"})]
+            assert candidate_keys(["kravis"], "kravis") == [] == candidate_keys(["kravis"])
+            assert candidate_keys(["nobody", "else"]) == [] == candidate_keys([])
+            assert links_from("1") == [("10", "shareholder of", "Paradise Papers"),
+                                       ("11", "officer_of", "Panama Papers")]
+            got = nodes(["10", "11", "1", "404"])
+            assert set(got) == {"1", "10", "11"}
+            assert got["10"]["jurisdiction"] == "British Virgin Islands"
+            assert got["11"]["jurisdiction"] == "Cayman Islands"
+            assert got["1"]["kind"] == "officer"
+            assert nodes(["6"])["6"]["kind"] == "intermediary"
+            assert nodes(["99"])["99"]["kind"] == "unknown"
+
+            # Multi-hop: person 1 -> Alpha Trust -> Gamma (connected_to)
+            # -> Delta (same_as) -> 99; 6's intermediary_of edge into
+            # Gamma is incoming, so not followed.
+            g = graph()
+            assert g is not None
+            seed = nodes(["1"])["1"]["idx"]
+            hops = g.bfs([seed], kinds=["entity"])
+            at = nodes_at(h.node for h in hops)
+            assert [at[h.node]["node_id"] for h in hops] == ["10", "11", "12", "13"]
+            assert [h.depth for h in hops] == [1, 1, 2, 3]
+            last = g.bfs([seed], max_depth=4)[-1]
+            assert nodes_at([last.node])[last.node]["node_id"] == "99" and last.depth == 4
+            assert g.jurisdiction(hops[-1].node) == "Jersey"
+
+            # Touching a CSV makes the index stale; a rebuild swaps it in
+            # under an open reader.
+            os.utime(src / "relationships.csv", ns=(1, 1))
+            assert not is_current(src, idx)
+            stale = graph()
+            build(toks, src_dir=src, index_path=idx)
+            assert is_current(src, idx) and len(links_from("1")) == 2
+            assert graph() is not None and graph() is not stale
+            graph_path(idx).unlink()
+            assert not is_current(src, idx) and graph() is None
+    print("[ok] icij index: build, staleness, node/link/name-key lookups, graph")
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sp = sub.add_parser("build", help="(re)build the index from the local CSVs")
+    sp.add_argument("--force", action="store_true", help="rebuild even if current")
+    sub.add_parser("info")
+    sub.add_parser("selftest")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "selftest":
+        _selftest()
+        return 0
+    if args.cmd == "info":
+        print(json.dumps(info(), indent=2))
+        return 0
+    ROOT = HERE.parent
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    from regen_v3 import leaks
+
+    if not leaks._download_and_extract():
+        return 1
+    ensure_built(leaks._tokens, force=args.force)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
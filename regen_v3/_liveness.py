@@ -0,0 +1,463 @@
+"""Concurrent URL liveness checking for `check_urls` and `verify`.
+
+Size context: `check_urls.py` checks every cited URL across
+`data/*.v3.json` (thousands, a few hundred hosts), and `verify.verify_urls`
+checks each subject's search results. Both used a ThreadPoolExecutor of 8
+with an 8s timeout per request: a handful of slow hosts (bloomberg, wsj)
+held all 8 threads, and raising the thread count just hammered single
+hosts harder.
+
+Pattern: one asyncio loop drives every probe. A global semaphore bounds
+requests in flight (CONCURRENCY, hundreds) and a per-host semaphore
+(PER_HOST) keeps any one site at a polite handful, so a stalled host only
+ties up its own slots. Each probe is the same HEAD-then-ranged-GET as
+`check_urls.check_one`, with a hard per-URL deadline of `2 * timeout` so a
+server trickling bytes can't hold a slot. Each host gets one DNS lookup
+per run up front (`_Probes._resolve`, a negative-lookup pre-check): a name
+that doesn't resolve fails all of its URLs at once instead of each waiting
+out a timeout. Resolved addresses are not cached; `httpx` keep-alive
+connections are what spare a host's later URLs a new DNS lookup and TLS
+handshake. Hosts in
+`_ratelimit.HOST_UPSTREAMS` (sec.gov, propublica, ...) still take a token
+from their shared bucket before each probe.
+
+Results stream: `acheck()` is an async generator and `check_many()` its
+synchronous wrapper, yielding each URL as soon as it is answered (cached
+answers first), so callers print progress and dead links as they arrive.
+`Prober` keeps one loop open for callers that find URLs over time, such
+as cli's search -> verify -> extract stream.
+
+Every answer is remembered in the `liveness` namespace of
+`regen_v3.cache` with a TTL chosen by outcome (`variant()`; 30 days for
+2xx/3xx, hours for timeouts), and read back unless older than `max_age`.
+
+`httpx` (installed with the anthropic SDK) is optional: without it each
+probe runs `check_urls.check_one` in a worker thread under the same
+semaphores.
+
+CLI:
+    python3 -m regen_v3._liveness URL [URL ...] [--max-age 0]
+    python3 -m regen_v3._liveness selftest
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import concurrent.futures as cf
+import hashlib
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import AsyncIterator, Iterable, Iterator
+from urllib.parse import urlsplit
+
+HERE = Path(__file__).parent
+ROOT = HERE.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from regen_v3 import _ratelimit, _urlcanon, cache  # noqa: E402
+from regen_v3._http import HEADERS  # noqa: E402
+
+try:
+    import httpx  # type: ignore
+except ImportError:  # pragma: no cover - thread fallback
+    httpx = None  # type: ignore
+
+NS = "liveness"
+# Probes in flight across all hosts, and per host.
+CONCURRENCY = int(os.environ.get("REGEN_LIVENESS_CONCURRENCY", "256"))
+PER_HOST = int(os.environ.get("REGEN_LIVENESS_PER_HOST", "4"))
+
+
+def variant(status: int | str) -> str | None:
+    """TTL class of a probe status (`liveness.<variant>` in cache.TTLS)."""
+    if isinstance(status, int):
+        if 200 <= status < 400:
+            return None
+        if status in (401, 403, 406, 429):
+            return "blocked"
+        if status in (404, 410):
+            return "gone"
+        return "error"
+    return "unreachable"
+
+
+def _key(url: str) -> str:
+    return hashlib.sha256(_urlcanon.canonical(url).encode("utf-8")).hexdigest()
+
+
+def lookup(url: str, max_age: float | None = None) -> tuple[int | str, str] | None:
+    """Remembered (status, note) for `url`, or None if there is none, it
+    expired, or it is older than `max_age` seconds."""
+    hit = cache.get(NS, _key(url))
+    if not isinstance(hit, dict):
+        return None
+    if max_age is not None and time.time() - hit.get("checked_at", 0.0) > max_age:
+        return None
+    return hit["status"], hit.get("note", "")
+
+
+def remember(url: str, status: int | str, note: str) -> None:
+    cache.put(NS, _key(url),
+              {"url": url, "status": status, "note": note, "checked_at": time.time()},
+              variant=variant(status))
+
+
+async def _probe_httpx(client, url: str, timeout: float) -> tuple[int | str, str]:
+    """`check_urls.check_one` over httpx: same statuses and error strings."""
+    try:
+        r = await client.head(url, follow_redirects=True, timeout=timeout)
+        if r.status_code == 405 or r.status_code >= 400:
+            # Some hosts refuse HEAD; a one-byte ranged GET doesn't download the page.
+            async with client.stream("GET", url, headers={"Range": "bytes=0-0"},
+                                     follow_redirects=True, timeout=timeout) as r:
+                pass
+        return r.status_code, ""
+    except httpx.TimeoutException:
+        return "TIMEOUT", ""
+    except httpx.ConnectError as e:
+        msg = str(e)
+        return ("SSL" if "SSL" in msg or "CERTIFICATE" in msg else "CONN"), msg[:80]
+    except httpx.TransportError as e:
+        return "CONN", str(e)[:80]
+    except Exception as e:
+        return "ERR", str(e)[:80]
+
+
+async def _probe_thread(url: str, timeout: float) -> tuple[int | str, str]:
+    from check_urls import check_one
+
+    return await asyncio.to_thread(check_one, url, int(timeout))
+
+
+def _client(concurrency: int):
+    if httpx is None:
+        return None
+    return httpx.AsyncClient(
+        headers=HEADERS,
+        limits=httpx.Limits(max_connections=max(1, concurrency),
+                            max_keepalive_connections=max(1, concurrency)),
+    )
+
+
+class _Probes:
+    """One run's probe state: the client, the global and per-host
+    semaphores and the per-host DNS pre-check. Lives on one event loop."""
+
+    def __init__(self, client, *, timeout: float, concurrency: int, per_host: int) -> None:
+        self.client = client
+        self.timeout = timeout
+        self.per_host = per_host
+        self.global_sem = asyncio.Semaphore(max(1, concurrency))
+        self.host_sems: dict[str, asyncio.Semaphore] = {}
+        self.resolved: dict[str, asyncio.Future] = {}
+
+    async def _resolve(self, host: str, port: int) -> str | None:
+        """Negative-lookup pre-check: look each host up once per run and
+        return an error note if it doesn't resolve, else None. The address
+        isn't reused — httpx resolves again when it opens a connection
+        (once per keep-alive connection, not per request)."""
+        fut = self.resolved.get(host)
+        if fut is None:
+            loop = asyncio.get_running_loop()
+
+            async def _do() -> str | None:
+                try:
+                    await loop.getaddrinfo(host, port, type=socket.SOCK_STREAM)
+                    return None
+                except OSError as e:
+                    return f"DNS: {e}"[:80]
+            fut = self.resolved[host] = asyncio.ensure_future(_do())
+        return await fut
+
+    async def run(self, url: str) -> tuple[int | str, str]:
+        """Probe `url` under the semaphores and remember the answer."""
+        parts = urlsplit(url)
+        host = (parts.hostname or "").lower()
+        try:
+            sem = self.host_sems.setdefault(host, asyncio.Semaphore(max(1, self.per_host)))
+            async with sem, self.global_sem:
+                err = await self._resolve(host, parts.port or (443 if parts.scheme == "https" else 80))
+                if err:
+                    status, note = "CONN", err
+                else:
+                    # The thread fallback goes through _http, which does this itself.
+                    upstream = _ratelimit.upstream_for_host(host)
+                    if upstream is not None and self.client is not None:
+                        await asyncio.to_thread(_ratelimit.acquire, upstream, "_liveness.acheck")
+                    probe = (_probe_httpx(self.client, url, self.timeout) if self.client is not None
+                             else _probe_thread(url, self.timeout))
+                    try:
+                        status, note = await asyncio.wait_for(probe, 2 * self.timeout)
+                    except asyncio.TimeoutError:
+                        status, note = "TIMEOUT", ""
+        except Exception as e:
+            status, note = "ERR", str(e)[:80]
+        remember(url, status, note)
+        return status, note
+
+
+async def acheck(
+    urls: Iterable[str],
+    *,
+    timeout: float = 8,
+    max_age: float | None = None,
+    concurrency: int = CONCURRENCY,
+    per_host: int = PER_HOST,
+) -> AsyncIterator[tuple[str, int | str, str, bool]]:
+    """Yield (url, status, note, cached) for each distinct URL, in
+    completion order: remembered answers first, then probes as they
+    finish. Fresh answers are remembered."""
+    pending: list[str] = []
+    for url in dict.fromkeys(u for u in urls if u):
+        hit = lookup(url, max_age)
+        if hit is not None:
+            yield url, hit[0], hit[1], True
+        else:
+            pending.append(url)
+    if not pending:
+        return
+
+    results: asyncio.Queue = asyncio.Queue()
+    client = _client(concurrency)
+    probes = _Probes(client, timeout=timeout, concurrency=concurrency, per_host=per_host)
+
+    async def _one(url: str) -> None:
+        status, note = await probes.run(url)
+        await results.put((url, status, note, False))
+
+    task = asyncio.ensure_future(asyncio.gather(*(_one(u) for u in pending)))
+    try:
+        for _ in range(len(pending)):
+            yield await results.get()
+        await task
+    finally:
+        if not task.done():
+            task.cancel()
+            await asyncio.gather(task, return_exceptions=True)
+        if client is not None:
+            await client.aclose()
+
+
+class Prober:
+    """Long-lived form of `acheck` for callers that find URLs over time
+    (`verify.Verifier`, cli's search -> verify -> extract stream).
+    `submit(url)` starts the probe at once and returns a
+    `concurrent.futures.Future` of (status, note, cached); every probe
+    shares one client, one set of semaphores and the DNS pre-check. The
+    loop runs in a helper thread. `close()` (or leaving the `with` block)
+    cancels probes still in flight."""
+
+    def __init__(
+        self,
+        *,
+        timeout: float = 8,
+        max_age: float | None = None,
+        concurrency: int = CONCURRENCY,
+        per_host: int = PER_HOST,
+    ) -> None:
+        self.max_age = max_age
+        self._futs: dict[str, cf.Future] = {}
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="liveness", daemon=True)
+        self._thread.start()
+
+        async def _open() -> _Probes:
+            return _Probes(_client(concurrency), timeout=timeout,
+                           concurrency=concurrency, per_host=per_host)
+        self._probes = asyncio.run_coroutine_threadsafe(_open(), self._loop).result()
+
+    def submit(self, url: str) -> cf.Future:
+        fut = self._futs.get(url)
+        if fut is not None:
+            return fut
+        hit = lookup(url, self.max_age)
+        if hit is not None:
+            fut = cf.Future()
+            fut.set_result((hit[0], hit[1], True))
+        else:
+            async def _go() -> tuple[int | str, str, bool]:
+                status, note = await self._probes.run(url)
+                return status, note, False
+            fut = asyncio.run_coroutine_threadsafe(_go(), self._loop)
+        self._futs[url] = fut
+        return fut
+
+    def close(self) -> None:
+        if self._loop.is_closed():
+            return
+
+        async def _shutdown() -> None:
+            tasks = [t for t in asyncio.all_tasks() if t is not asyncio.current_task()]
+            for t in tasks:
+                t.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+            if self._probes.client is not None:
+                await self._probes.client.aclose()
+        asyncio.run_coroutine_threadsafe(_shutdown(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+    def __enter__(self) -> "Prober":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
+def check_many(urls: Iterable[str], **kwargs) -> Iterator[tuple[str, int | str, str, bool]]:
+    """Synchronous, streaming form of `acheck` (same arguments and
+    tuples). The event loop runs in a helper thread, so this works from
+    any thread, including ones that already have a loop. Closing the
+    iterator early cancels the probes still in flight and waits for the
+    loop to wind down, so nothing is remembered after it returns."""
+    out: queue.Queue = queue.Queue()
+    done = object()
+    running: dict = {}
+
+    async def _drive() -> None:
+        running["loop"], running["task"] = asyncio.get_running_loop(), asyncio.current_task()
+        gen = acheck(urls, **kwargs)
+        try:
+            async for item in gen:
+                out.put(item)
+        finally:
+            await gen.aclose()
+
+    def _thread() -> None:
+        try:
+            asyncio.run(_drive())
+        except BaseException as e:  # surfaced in the caller's thread
+            out.put(e)
+        finally:
+            out.put(done)
+
+    t = threading.Thread(target=_thread, name="liveness", daemon=True)
+    t.start()
+    try:
+        while True:
+            item = out.get()
+            if item is done:
+                return
+            if isinstance(item, BaseException):
+                raise item
+            yield item
+    finally:
+        if t.is_alive():
+            while "task" not in running and t.is_alive():
+                time.sleep(0.001)
+            if "task" in running:
+                try:
+                    running["loop"].call_soon_threadsafe(running["task"].cancel)
+                except RuntimeError:
+                    pass  # the loop finished and closed in the meantime
+            t.join()
+
+
+def _selftest() -> None:
+    import tempfile
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    live = {"now": 0, "peak": 0}
+    lock = threading.Lock()
+
+    class Handler(BaseHTTPRequestHandler):
+        def log_message(self, *args) -> None:
+            pass
+
+        def _reply(self, body: bool) -> None:
+            with lock:
+                live["now"] += 1
+                live["peak"] = max(live["peak"], live["now"])
+            try:
+                time.sleep(0.2 if self.path.startswith("/slow") else 0)
+                code = 200
+                if self.path == "/gone":
+                    code = 404
+                elif self.path == "/nohead" and self.command == "HEAD":
+                    code = 405
+                self.send_response(code)
+                self.send_header("Content-Length", "1")
+                self.end_headers()
+                if body:
+                    self.wfile.write(b"x")
+            finally:
+                with lock:
+                    live["now"] -= 1
+
+        def do_HEAD(self) -> None:
+            self._reply(False)
+
+        def do_GET(self) -> None:
+            self._reply(True)
+
+    srv = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=srv.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{srv.server_address[1]}"
+    slow = [f"{base}/slow{i}" for i in range(12)]
+    urls = slow + [f"{base}/gone", f"{base}/nohead", "http://nx.invalid/a", "http://nx.invalid/b"]
+    try:
+        with tempfile.TemporaryDirectory() as tmp, cache.use(Path(tmp) / "t.sqlite3"):
+            got = {u: (st, cached) for u, st, _, cached in check_many(urls, timeout=2, per_host=3)}
+            assert live["peak"] <= 3, live
+            assert all(got[u] == (200, False) for u in slow), got
+            assert got[f"{base}/gone"] == (404, False) and got[f"{base}/nohead"] == (200, False)
+            assert got["http://nx.invalid/a"][0] == got["http://nx.invalid/b"][0] == "CONN"
+            again = list(check_many(urls + urls[:1]))
+            assert len(again) == len(urls) and all(c for *_, c in again)
+            assert not any(c for *_, c in check_many(urls[:2], max_age=0))
+            it = check_many(slow, max_age=0)
+            next(it)
+            it.close()  # early exit cancels the rest
+            n = cache.counts().get(NS)
+            time.sleep(0.3)
+            assert cache.counts().get(NS) == n, "probe remembered after close"
+
+            live["peak"] = 0
+            with Prober(timeout=2, max_age=0, per_host=2) as prober:
+                futs = [prober.submit(u) for u in slow[:6] + [f"{base}/gone"]]
+                assert prober.submit(slow[0]) is futs[0]
+                assert [f.result()[0] for f in futs] == [200] * 6 + [404]
+                assert live["peak"] <= 2, live
+            with Prober(max_age=None) as prober:
+                assert prober.submit(slow[0]).result() == (200, "", True)
+            prober = Prober(timeout=2, max_age=0)
+            pending = [prober.submit(f"{base}/slow-close{i}") for i in range(8)]
+            prober.close()
+            assert all(f.done() for f in pending)
+    finally:
+        srv.shutdown()
+    print("[ok] liveness: per-host cap, HEAD->GET fallback, DNS failure, cache, streaming, prober")
+
+
+def main(argv: list[str] | None = None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    if argv == ["selftest"]:
+        _selftest()
+        return 0
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    ap.add_argument("urls", nargs="+")
+    ap.add_argument("--timeout", type=float, default=8)
+    ap.add_argument("--max-age", type=cache.parse_duration, metavar="DURATION")
+    ap.add_argument("--concurrency", type=int, default=CONCURRENCY)
+    ap.add_argument("--per-host", type=int, default=PER_HOST)
+    args = ap.parse_args(argv)
+    t0 = time.monotonic()
+    for url, status, note, cached in check_many(
+        args.urls, timeout=args.timeout, max_age=args.max_age,
+        concurrency=args.concurrency, per_host=args.per_host,
+    ):
+        print(f"  [{status}]{' (cached)' if cached else ''} {url}"
+              + (f"  ({note})" if note else ""))
+    print(f"{len(set(args.urls))} URLs in {time.monotonic() - t0:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+"""Shared Anthropic client + prompt-caching helpers for regen_v3 LLM calls.
+
+Before this module every call site built its own `Anthropic(api_key=...)`
+— extract.py once per snippet — so each of the thousands of Haiku calls in
+a cohort run paid a fresh connection pool (TCP + TLS handshake) and nothing
+but queries_llm marked its static system prompt as cacheable.
+
+Pattern: one client per process, created lazily under a lock and reused by
+every thread (the SDK client is thread-safe and keeps HTTP keep-alive
+connections in its pool). The client is rebuilt only if ANTHROPIC_API_KEY or
+ANTHROPIC_BASE_URL changes, which is what the stub-server self-tests rely on.
+
+SDK-level retries are disabled (`max_retries=0`): every call site wraps its
+request in `_llm_retry.with_retry`, which honors Retry-After and releases the
+extract in-flight slot between attempts. Stacking the SDK's own retries on
+top would multiply attempts and hold slots while sleeping.
+
+`cached_system` / `cached_tools` put `cache_control: ephemeral` breakpoints
+on the static prefix (tools, then system) so repeat calls read it from the
+prompt cache instead of paying full input-token price. Prefixes shorter than
+the model's minimum cacheable length are simply not cached — no error.
+"""
+from __future__ import annotations
+
+import os
+import threading
+from typing import Any
+
+# Keep-alive pool size. Sized for extract's in-flight cap plus the
+# single-shot modules; requests beyond it queue on the pool, not the socket.
+MAX_CONNECTIONS = int(os.environ.get("ANTHROPIC_MAX_CONNECTIONS", "32"))
+
+_client = None
+_client_sig: tuple[str, str | None] | None = None
+_client_lock = threading.Lock()
+
+_EPHEMERAL = {"type": "ephemeral"}
+
+
+def get_client():
+    """Return the process-wide Anthropic client. Raises RuntimeError if
+    ANTHROPIC_API_KEY is not set (same contract as the old per-call clients)."""
+    global _client, _client_sig
+    api_key = os.environ.get("ANTHROPIC_API_KEY")
+    if not api_key:
+        raise RuntimeError("ANTHROPIC_API_KEY not set")
+    sig = (api_key, os.environ.get("ANTHROPIC_BASE_URL"))
+    with _client_lock:
+        if _client is None or _client_sig != sig:
+            # Imported here so importing this helper stays cheap (see _llm_retry).
+            import anthropic
+            import httpx
+
+            _client = anthropic.Anthropic(
+                api_key=api_key,
+                max_retries=0,
+                http_client=anthropic.DefaultHttpxClient(
+                    limits=httpx.Limits(
+                        max_connections=MAX_CONNECTIONS,
+                        max_keepalive_connections=MAX_CONNECTIONS,
+                    ),
+                ),
+            )
+            _client_sig = sig
+        return _client
+
+
+def cached_system(text: str) -> list[dict[str, Any]]:
+    """System prompt as a single text block with a cache breakpoint."""
+    return [{"type": "text", "text": text, "cache_control": dict(_EPHEMERAL)}]
+
+
+def cached_tools(tools: list[dict[str, Any]]) -> list[dict[str, Any]]:
+    """Copy of `tools` with a cache breakpoint on the last tool, which caches
+    the whole tool block (tools sort ahead of system in the prompt prefix)."""
+    out = [dict(t) for t in tools]
+    if out:
+        out[-1]["cache_control"] = dict(_EPHEMERAL)
+    return out
@@ -8,7 +8,9 @@ producing a record with a missing tier_reasoning or hidden_upper section.
 
 Pattern: exponential backoff with jitter, max 4 attempts. We re-raise the
 final exception so callers can record it as `verification_error` per their
-existing convention.
+existing convention. When the server sends `Retry-After` (Anthropic does on
+429/529) we sleep at least that long instead of the computed backoff, so N
+workers backing off together don't all come back before the window opens.
 """
 from __future__ import annotations
 
@@ -22,6 +24,9 @@ T = TypeVar("T")
 DEFAULT_MAX_ATTEMPTS = 4
 DEFAULT_BASE_DELAY = 1.0
 DEFAULT_MAX_DELAY = 16.0
+# Upper bound on an honored Retry-After. Longer values are clamped to it:
+# the attempt still retries, after at most this many seconds.
+MAX_RETRY_AFTER = 60.0
 
 
 def _is_retryable(exc: BaseException) -> bool:
@@ -41,6 +46,29 @@ def _is_retryable(exc: BaseException) -> bool:
     return False
 
 
+def _retry_after_seconds(exc: BaseException) -> float | None:
+    """Seconds from a `Retry-After` header on the exception's HTTP response,
+    or None. Only the delta-seconds form is honored (that's what Anthropic
+    sends); HTTP-date values are ignored and fall back to backoff."""
+    resp = getattr(exc, "response", None)
+    headers = getattr(resp, "headers", None)
+    if not headers:
+        return None
+    try:
+        raw = headers.get("retry-after")
+    except Exception:
+        return None
+    if raw is None:
+        return None
+    try:
+        secs = float(raw)
+    except (TypeError, ValueError):
+        return None
+    if secs < 0:
+        return None
+    return min(secs, MAX_RETRY_AFTER)
+
+
 def with_retry(
     fn: Callable[[], T],
     *,
@@ -61,6 +89,9 @@ def with_retry(
             last_exc = e
             delay = min(base_delay * (2 ** attempt), max_delay)
             delay = delay * (0.5 + random.random())  # jitter [0.5x, 1.5x]
+            retry_after = _retry_after_seconds(e)
+            if retry_after is not None:
+                delay = max(delay, retry_after)
             time.sleep(delay)
     # Unreachable — last iteration always returns or raises.
     assert last_exc is not None
@@ -0,0 +1,242 @@
+"""Near-duplicate snippet clustering for `cli._stream_search_verify_extract`.
+
+Size context: one AP / Reuters wire story about a gift is republished by
+dozens of outlets, and Brave returns each copy as its own URL with a
+near-identical description. Every copy used to cost its own
+`extract_events` call — same text, same answer, different URL.
+
+Pattern: MinHash with LSH banding over word 3-shingles of
+`extract._normalize_text(snippet)`. A snippet joins the cluster of the
+first-seen representative whose shingle sets overlap by at least
+MIN_JACCARD (checked exactly; the MinHash bands only pick candidates);
+otherwise it starts a cluster of its own. Members are compared against
+representatives only, never against each other, so a cluster can't drift
+through a chain of small edits. SimHash was the other candidate, but on
+30-50 word search descriptions a single inserted word moves a dozen of
+its 64 bits, while shingle Jaccard stays above 0.8 for wire copies and
+below 0.3 for rewrites.
+
+Two guards keep clusters to true copies. Snippets shorter than MIN_TOKENS
+words are never clustered (too little text to tell copies from
+coincidence). A member must carry exactly the representative's set of
+numbers — "$5 million" and "$10 million" versions of one template are
+different events.
+
+The caller extracts once per cluster (first alive member in seen order)
+and fans the events out to the other members with
+`extract.fan_out_events`, which rewrites `source_url` and re-runs the
+grounding checks against each member's own snippet.
+
+CLI:
+    python3 -m regen_v3._neardup report [--top 20]   # clusters across the search cache
+    python3 -m regen_v3._neardup selftest
+"""
+from __future__ import annotations
+
+import argparse
+import hashlib
+import os
+import random
+import re
+import sys
+from collections import Counter
+from pathlib import Path
+
+HERE = Path(__file__).parent
+ROOT = HERE.parent
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from regen_v3 import _urlcanon, cache  # noqa: E402
+from regen_v3.extract import _normalize_text  # noqa: E402
+
+SHINGLE = 3
+# Shingle-set Jaccard at or above which two snippets are copies.
+MIN_JACCARD = float(os.environ.get("REGEN_NEARDUP_JACCARD", "0.7"))
+# Snippets with fewer words are never clustered.
+MIN_TOKENS = 12
+# MinHash signature length and LSH banding (BANDS x ROWS == PERMUTATIONS).
+# Pairs at MIN_JACCARD share a band with probability 1 - (1 - 0.7^2)^16,
+# above 0.999.
+PERMUTATIONS = 32
+ROWS = 2
+BANDS = PERMUTATIONS // ROWS
+
+_TOKEN_RE = re.compile(r"\w+")
+_NUMBER_RE = re.compile(r"\d[\d,.]*")
+_PRIME = (1 << 61) - 1
+_rng = random.Random(0x5C2009E)
+_PERMS = [(_rng.randrange(1, _PRIME), _rng.randrange(_PRIME)) for _ in range(PERMUTATIONS)]
+
+
+def shingles(text: str) -> frozenset[str] | None:
+    """Word 3-shingles of the normalized text, or None if it is too short
+    to cluster."""
+    tokens = _TOKEN_RE.findall(_normalize_text(text))
+    if len(tokens) < MIN_TOKENS:
+        return None
+    return frozenset(" ".join(tokens[i:i + SHINGLE]) for i in range(len(tokens) - SHINGLE + 1))
+
+
+def minhash(sh: frozenset[str]) -> tuple[int, ...]:
+    hashes = [int.from_bytes(hashlib.blake2b(s.encode("utf-8"), digest_size=8).digest(), "big")
+              for s in sh]
+    return tuple(min((a * h + b) % _PRIME for h in hashes) for a, b in _PERMS)
+
+
+def jaccard(a: frozenset[str], b: frozenset[str]) -> float:
+    return len(a & b) / len(a | b) if a or b else 0.0
+
+
+def numbers(text: str) -> frozenset[str]:
+    """Digit runs in `text`, separators dropped ("25,000,000" == "25000000")."""
+    return frozenset(re.sub(r"[,.]", "", n) for n in _NUMBER_RE.findall(_normalize_text(text)))
+
+
+class Index:
+    """Representatives seen so far, for first-match clustering."""
+
+    def __init__(self, min_jaccard: float = MIN_JACCARD) -> None:
+        self.min_jaccard = min_jaccard
+        # (numbers, band, band values) -> representative keys, in insertion order
+        self._buckets: dict[tuple, list[str]] = {}
+        self._shingles: dict[str, frozenset[str]] = {}
+        self._order: dict[str, int] = {}
+
+    def cluster(self, key: str, text: str) -> str:
+        """Representative key for `text`: an earlier representative's key
+        if one is near enough (the earliest, if several), else `key`,
+        which becomes a representative itself."""
+        sh = shingles(text)
+        if sh is None:
+            return key
+        nums = numbers(text)
+        sig = minhash(sh)
+        bands = [(nums, b, sig[b * ROWS:(b + 1) * ROWS]) for b in range(BANDS)]
+        candidates = {other for bk in bands for other in self._buckets.get(bk, ())}
+        for other in sorted(candidates, key=self._order.__getitem__):
+            if jaccard(sh, self._shingles[other]) >= self.min_jaccard:
+                return other
+        self._order[key] = len(self._order)
+        self._shingles[key] = sh
+        for bk in bands:
+            self._buckets.setdefault(bk, []).append(key)
+        return key
+
+
+def cluster_stats(clusters: dict[str, list[str]]) -> dict:
+    """{"clusters", "members", "sizes"} for {rep: [rep, *members]}, counting
+    only clusters of two or more."""
+    sizes = Counter(len(m) for m in clusters.values() if len(m) > 1)
+    return {
+        "clusters": sum(sizes.values()),
+        "members": sum(n * c for n, c in sizes.items()),
+        "sizes": {str(n): c for n, c in sorted(sizes.items())},
+    }
+
+
+def merge_stats(rows) -> dict:
+    """Sum per-subject near-dup summaries (as returned in run_one's summary)."""
+    out: dict = {"clusters": 0, "members": 0, "calls_saved": 0, "sizes": {}}
+    for row in rows:
+        if not row:
+            continue
+        for k in ("clusters", "members", "calls_saved"):
+            out[k] += row.get(k, 0)
+        for n, c in (row.get("sizes") or {}).items():
+            out["sizes"][n] = out["sizes"].get(n, 0) + c
+    out["sizes"] = dict(sorted(out["sizes"].items(), key=lambda kv: int(kv[0])))
+    return out
+
+
+def format_stats(s: dict) -> str:
+    sizes = ", ".join(f"{n}x{c}" for n, c in (s.get("sizes") or {}).items())
+    return (f"near-dup: {s.get('clusters', 0)} clusters"
+            + (f" (size x count: {sizes})" if sizes else "")
+            + f", {s.get('calls_saved', 0)} extract calls saved")
+
+
+def report(top: int = 20) -> dict[str, list[str]]:
+    """Cluster every distinct snippet in the search cache, cohort-wide.
+    Returns {rep canonical URL: [member canonical URLs]} for clusters of
+    two or more, largest first."""
+    index = Index()
+    clusters: dict[str, list[str]] = {}
+    seen: set[str] = set()
+    for payload in cache.values("search"):
+        if not isinstance(payload, dict):
+            continue
+        for r in payload.get("results") or []:
+            url = r.get("url") if isinstance(r, dict) else None
+            if not isinstance(url, str) or not url:
+                continue
+            key = _urlcanon.canonical(url)
+            if key in seen:
+                continue
+            seen.add(key)
+            rep = index.cluster(key, r.get("description") or "")
+            clusters.setdefault(rep, []).append(key)
+    multi = {k: v for k, v in clusters.items() if len(v) > 1}
+    ranked = dict(sorted(multi.items(), key=lambda kv: (-len(kv[1]), kv[0])))
+    for rep, members in list(ranked.items())[:top]:
+        hosts = sorted({_urlcanon.host(u) for u in members})
+        print(f"  {len(members):>4}  {rep}\n        {', '.join(hosts)[:150]}")
+    st = cluster_stats(clusters)
+    print(f"[neardup] {len(seen)} distinct URLs, {st['clusters']} clusters, "
+          f"{st['members'] - st['clusters']} redundant snippets")
+    return ranked
+
+
+def _selftest() -> None:
+    wire = ("NEW YORK (AP) — Jane Doe and her husband pledged $25 million on "
+            "Tuesday to Example University to build a new cancer research "
+            "center, the largest gift in the school's history, officials said.")
+    copies = [
+        wire,
+        wire.replace("NEW YORK (AP) — ", "") + " Read more.",
+        wire.replace("officials said", "school officials said"),
+        "<strong>Jane Doe</strong> and her husband pledged $25 million on Tuesday "
+        "to Example University to build a new cancer research center, the largest "
+        "gift in the school&#x27;s history, officials said.",
+    ]
+    other_amount = wire.replace("$25 million", "$40 million")
+    unrelated = ("Jane Doe spoke at the annual gala of the Example Museum on "
+                 "Saturday, where trustees thanked donors for a record year of "
+                 "membership growth and new exhibitions.")
+    assert all(shingles(c) is not None for c in copies)
+    assert shingles("Jane Doe gave $5 million") is None
+    assert numbers("gave $25,000,000 in 2021") == {"25000000", "2021"}
+
+    index = Index()
+    assert index.cluster("a", copies[0]) == "a"
+    for i, c in enumerate(copies[1:], 1):
+        assert index.cluster(f"c{i}", c) == "a", (i, jaccard(shingles(wire), shingles(c)))
+    assert index.cluster("amt", other_amount) == "amt"
+    assert index.cluster("u", unrelated) == "u"
+    assert index.cluster("u2", unrelated + " Photos.") == "u"
+    assert index.cluster("short", "Jane Doe gave") == "short"
+
+    st = cluster_stats({"a": ["a", "c1", "c2"], "b": ["b"], "d": ["d", "e"]})
+    assert st == {"clusters": 2, "members": 5, "sizes": {"2": 1, "3": 1}}, st
+    agg = merge_stats([{**st, "calls_saved": 2}, None, {**st, "calls_saved": 1}])
+    assert agg["calls_saved"] == 3 and agg["sizes"] == {"2": 2, "3": 2}
+    print("[ok] neardup: wire copies cluster, amount/unrelated/short don't")
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("selftest")
+    sp = sub.add_parser("report", help="cluster snippets across the search cache")
+    sp.add_argument("--top", type=int, default=20)
+    args = ap.parse_args(argv)
+    if args.cmd == "selftest":
+        _selftest()
+    else:
+        report(top=args.top)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Named per-upstream token buckets, shared across batch_runner workers.
+
+Concurrency context: before this module only Brave had a limiter (one
+shared mp.Value timestamp in search.py). SEC EDGAR, ProPublica, FEC and
+the CA/NY registries got a hard-coded `time.sleep` after each call, and
+Wayback got nothing. Those sleeps run per process, so
+`batch_runner --workers N` multiplied every upstream's request rate by N.
+SEC in particular blocks IPs that exceed 10 req/s.
+
+Pattern: one token bucket per named upstream (`LIMITS`: rate in req/s plus
+burst size). `acquire(name)` refills the bucket from elapsed monotonic
+time, takes one token and, if the bucket was empty, *reserves* a future
+slot (tokens go negative) and sleeps until it arrives. The sleep happens
+outside the lock, so N waiters are spaced 1/rate apart with no busy loop.
+Bucket state is two doubles per upstream (tokens, last refill). These live in a
+process-local list by default. batch_runner puts them in one `mp.Array`
+plus one `mp.Lock`, created by `make_shared()` and installed in each worker
+by its pool initializer via `install_shared()`, so the budget covers every
+process. CLOCK_MONOTONIC is system-wide, so stamps agree across processes.
+
+Callers don't acquire directly: `_http.request` maps the URL host to an
+upstream via `HOST_UPSTREAMS`. The one non-`_http` caller, the CA
+registry's urllib path, calls `acquire` itself. Time spent waiting is
+recorded per (upstream, caller) in this process. `wait_stats()` feeds the
+per-subject summary that batch_runner checkpoints.
+
+Overrides: `REGEN_RATE_LIMITS="sec=5,propublica=1.5:3"`
+(`name=rate[:burst]`, comma-separated). batch_runner's `--rate-limit`
+flag writes this variable before spawning workers so every process
+resolves the same table.
+"""
+from __future__ import annotations
+
+import os
+import threading
+import time
+from typing import Any
+
+# name -> (rate req/s, burst). Defaults keep the old per-call pauses' rate
+# but enforce it across processes instead of per process.
+DEFAULT_LIMITS: dict[str, tuple[float, float]] = {
+    "brave": (1 / 1.05, 1.0),      # free tier: 1 req/s; pad slightly
+    "sec": (9.0, 3.0),             # SEC fair-access policy: <= 10 req/s
+    "propublica": (2.5, 2.0),      # was a 0.4s pause per fetch
+    "fec": (2.0, 1.0),             # was a 0.5s pause per name
+    "wayback": (4.0, 4.0),
+    "ca_registry": (1 / 0.6, 1.0),  # was a 0.6s pause between terms
+    "ny_registry": (1 / 0.6, 1.0),
+}
+
+# Hostname -> upstream. Exact match on the lowercased hostname.
+HOST_UPSTREAMS: dict[str, str] = {
+    "api.search.brave.com": "brave",
+    "www.sec.gov": "sec",
+    "sec.gov": "sec",
+    "data.sec.gov": "sec",
+    "efts.sec.gov": "sec",
+    "projects.propublica.org": "propublica",
+    "api.open.fec.gov": "fec",
+    "archive.org": "wayback",
+    "web.archive.org": "wayback",
+    "rct.doj.ca.gov": "ca_registry",
+    "charities-search-api.ag.ny.gov": "ny_registry",
+}
+
+
+def parse_overrides(spec: str) -> dict[str, tuple[float, float]]:
+    """Parse `name=rate[:burst],...`. Raises ValueError on unknown names or
+    non-positive rates (the shared array is sized from DEFAULT_LIMITS)."""
+    out: dict[str, tuple[float, float]] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, val = part.partition("=")
+        rate_s, _, burst_s = val.partition(":")
+        name = name.strip()
+        if name not in DEFAULT_LIMITS:
+            raise ValueError(f"unknown upstream {name!r} (known: {', '.join(sorted(DEFAULT_LIMITS))})")
+        rate = float(rate_s)
+        if rate <= 0:
+            raise ValueError(f"rate must be > 0: {part!r}")
+        out[name] = (rate, max(1.0, float(burst_s)) if burst_s else 1.0)
+    return out
+
+
+def _resolve_limits() -> dict[str, tuple[float, float]]:
+    limits = dict(DEFAULT_LIMITS)
+    limits.update(parse_overrides(os.environ.get("REGEN_RATE_LIMITS", "")))
+    return limits
+
+
+LIMITS = _resolve_limits()
+# Fixed slot order so the parent and every spawned worker index the shared
+# array identically.
+_NAMES: tuple[str, ...] = tuple(sorted(LIMITS))
+_SLOT = {name: i for i, name in enumerate(_NAMES)}
+
+# [tokens_0, stamp_0, tokens_1, stamp_1, ...]. stamp 0.0 = never used, so
+# the first acquire refills straight to burst.
+_state: Any = [0.0] * (2 * len(_NAMES))
+_state_lock: Any = threading.Lock()
+
+_wait_lock = threading.Lock()
+_waits: dict[tuple[str, str], list[float]] = {}  # (name, caller) -> [calls, sec]
+
+
+def make_shared(ctx) -> tuple[Any, Any]:
+    """Create the cross-process bucket state (parent side). Pass the result
+    through the pool initializer to `install_shared`."""
+    return ctx.Array("d", 2 * len(_NAMES), lock=False), ctx.Lock()
+
+
+def install_shared(state, lock) -> None:
+    """Called by batch_runner's pool initializer in each worker."""
+    global _state, _state_lock
+    _state, _state_lock = state, lock
+
+
+def upstream_for_host(host: str | None) -> str | None:
+    return HOST_UPSTREAMS.get((host or "").lower())
+
+
+def acquire(name: str, caller: str = "") -> float:
+    """Block until `name`'s bucket grants a token. Returns seconds waited.
+    Unknown names pass straight through."""
+    slot = _SLOT.get(name)
+    if slot is None:
+        return 0.0
+    rate, burst = LIMITS[name]
+    i = 2 * slot
+    with _state_lock:
+        now = time.monotonic()
+        tokens, stamp = _state[i], _state[i + 1]
+        if stamp <= 0:
+            tokens = burst
+        else:
+            tokens = min(burst, tokens + (now - stamp) * rate)
+        tokens -= 1.0
+        _state[i], _state[i + 1] = tokens, now
+    wait = -tokens / rate if tokens < 0 else 0.0
+    if wait > 0:
+        time.sleep(wait)
+    with _wait_lock:
+        row = _waits.setdefault((name, caller), [0, 0.0])
+        row[0] += 1
+        row[1] += wait
+    return wait
+
+
+def wait_stats() -> dict[str, dict[str, dict[str, float]]]:
+    """{upstream: {caller: {"calls", "wait_sec"}}} for this process since
+    start or the last `reset_wait_stats()`."""
+    out: dict[str, dict[str, dict[str, float]]] = {}
+    with _wait_lock:
+        for (name, caller), (calls, sec) in sorted(_waits.items()):
+            out.setdefault(name, {})[caller] = {
+                "calls": int(calls), "wait_sec": round(sec, 3),
+            }
+    return out
+
+
+def reset_wait_stats() -> None:
+    with _wait_lock:
+        _waits.clear()
@@ -0,0 +1,228 @@
+"""Deterministic URL canonicalization for cache keys and dedup.
+
+Size context: Brave hands back the same article under several spellings —
+`www.` and bare host, `m.` / `mobile.` / `amp.` hosts, `/amp` paths and
+Google AMP-cache URLs, `utm_*` / `fbclid` tracking params, trailing
+slashes, http and https. `cli.run_one` used to dedupe `seen_urls` by exact
+string, so each spelling cost its own liveness probe and its own Haiku
+extraction call, and `merge.annotate_corroboration` then counted the
+mobile host as a second, independent source domain.
+
+Pattern: `canonical(url)` is a pure string function (no network, no
+redirect following) applied once at `search.filter_results` time. The
+result is the identity of a page everywhere a cache or dedup set is keyed
+by URL — `seen_urls`, the `liveness` / `wayback` / `extract` cache keys,
+merge's bibliography and corroboration sets. The URL the search engine
+returned is kept alongside it and is what gets probed, sent to the
+extractor and cited; the canonical form is never fetched.
+
+Rules, in order: http -> https; lowercase host without userinfo, default
+port, trailing dot or a leading `www.` / `m.` / `mobile.` / `amp.` label;
+AMP-cache URLs unwrapped to their origin; `amp` path segments and `.amp`
+suffixes dropped; trailing slash dropped (root stays `/`); percent-escape
+hex uppercased; tracking query params dropped and the rest sorted;
+fragment dropped. Non-http(s) strings come back stripped but otherwise
+unchanged.
+
+Migration: caches written before canonical keys still sit under the raw
+URL. `python3 -m regen_v3._urlcanon migrate` re-keys the `liveness` and
+`wayback` namespaces in place (their payloads record the URL). `extract`
+keys hash the snippet, role and subject as well, which the payload does
+not keep, so `extract._read_cache` moves a raw-URL entry to its canonical
+key the first time it is read instead.
+"""
+from __future__ import annotations
+
+import argparse
+import re
+import sys
+from pathlib import Path
+from urllib.parse import unquote, urlsplit, urlunsplit
+
+HERE = Path(__file__).parent
+ROOT = HERE.parent
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from regen_v3 import cache  # noqa: E402
+
+# Leading host labels that name a rendering of the same site, not a
+# different one. Only stripped when a registrable name remains.
+_HOST_PREFIXES = ("www.", "m.", "mobile.", "amp.")
+_DEFAULT_PORTS = {"http": 80, "https": 443}
+
+# Query parameters that identify a click, campaign or rendering rather
+# than a resource. Lowercase; `utm_*` is matched by prefix.
+_TRACKING_PARAMS = frozenset({
+    "fbclid", "gclid", "dclid", "gbraid", "wbraid", "msclkid", "yclid",
+    "igshid", "mc_cid", "mc_eid", "mkt_tok", "_hsenc", "_hsmi", "_ga",
+    "ocid", "cmpid", "smid", "smtyp", "sr_share", "ref_src", "ref_url",
+    "amp", "_amp", "outputtype",
+})
+_TRACKING_PREFIXES = ("utm_",)
+
+_PCT_RE = re.compile(r"%[0-9a-fA-F]{2}")
+_AMP_SUFFIX_RE = re.compile(r"\.amp(?=\.[A-Za-z0-9]+$|$)")
+_AMP_CACHE_SUFFIX = ".cdn.ampproject.org"
+
+
+def _strip_host(host: str) -> str:
+    host = host.lower().rstrip(".")
+    for prefix in _HOST_PREFIXES:
+        rest = host[len(prefix):]
+        if host.startswith(prefix) and "." in rest:
+            return rest
+    return host
+
+
+def host(url: str) -> str:
+    """Canonical hostname of `url` ("" if it has none)."""
+    try:
+        name = urlsplit(url.strip()).hostname or ""
+    except ValueError:
+        return ""
+    return _strip_host(name)
+
+
+def _unwrap_amp_cache(host_: str, path: str) -> str | None:
+    """Origin URL of a Google AMP-cache URL
+    (`<x>.cdn.ampproject.org/c/s/example.com/a`), else None."""
+    if not host_.endswith(_AMP_CACHE_SUFFIX):
+        return None
+    parts = path.split("/", 3)  # "", "c"|"v"|"i", "s"|<host>, rest
+    if len(parts) < 3 or parts[1] not in ("c", "v", "i"):
+        return None
+    rest = path[len(parts[1]) + 2:]
+    if rest.startswith("s/"):
+        rest = rest[2:]
+    return "https://" + rest if rest else None
+
+
+def _canonical_path(path: str) -> str:
+    path = _PCT_RE.sub(lambda m: m.group(0).upper(), path)
+    segments = [s for s in path.split("/") if s]
+    if segments and segments[-1].lower() == "amp":
+        segments.pop()
+    if segments and segments[0].lower() == "amp":
+        segments.pop(0)
+    if segments:
+        segments[-1] = _AMP_SUFFIX_RE.sub("", segments[-1])
+    return "/" + "/".join(segments)
+
+
+def _keep_param(pair: str) -> bool:
+    name = unquote(pair.split("=", 1)[0]).lower()
+    if name == "outputtype":
+        return not pair.lower().endswith("=amp")
+    return not (name in _TRACKING_PARAMS or name.startswith(_TRACKING_PREFIXES))
+
+
+def canonical(url: str) -> str:
+    """Canonical form of `url` (see module docstring). Idempotent."""
+    raw = url.strip()
+    try:
+        parts = urlsplit(raw)
+        port = parts.port
+    except ValueError:
+        return raw
+    scheme = parts.scheme.lower()
+    if scheme not in _DEFAULT_PORTS or not parts.hostname:
+        return raw
+    origin = _unwrap_amp_cache(parts.hostname.lower(), parts.path)
+    if origin is not None:
+        return canonical(origin + (f"?{parts.query}" if parts.query else ""))
+    netloc = _strip_host(parts.hostname)
+    if port is not None and port != _DEFAULT_PORTS[scheme]:
+        netloc = f"{netloc}:{port}"
+    pairs = [p for p in parts.query.split("&") if p and _keep_param(p)]
+    query = "&".join(sorted(_PCT_RE.sub(lambda m: m.group(0).upper(), p) for p in pairs))
+    return urlunsplit(("https", netloc, _canonical_path(parts.path), query, ""))
+
+
+def migrate(*, dry_run: bool = False) -> dict[str, int]:
+    """Move `liveness` and `wayback` entries written under raw-URL keys to
+    their canonical keys. Returns {namespace: entries re-keyed}."""
+    from regen_v3 import _liveness, verify
+
+    plan = (
+        (_liveness.NS, "url", _liveness._key),
+        (verify.WAYBACK_NS, "src", verify._wayback_cache_key),
+    )
+    out: dict[str, int] = {}
+    for ns, field, key_of in plan:
+        mapping = {}
+        for key, payload in cache.items(ns):
+            url = payload.get(field) if isinstance(payload, dict) else None
+            if isinstance(url, str) and url and key_of(url) != key:
+                mapping[key] = key_of(url)
+        out[ns] = len(mapping) if dry_run else cache.rekey(ns, mapping)
+    return out
+
+
+def _selftest() -> None:
+    same = [
+        "https://example.com/news/gift",
+        "http://example.com/news/gift",
+        "https://www.example.com/news/gift/",
+        "https://WWW.Example.COM:443/news/gift#top",
+        "https://m.example.com/news/gift?utm_source=x&utm_medium=y",
+        "https://mobile.example.com/news/gift?fbclid=abc",
+        "https://amp.example.com/news/gift",
+        "https://example.com/news/gift/amp/",
+        "https://example.com/amp/news/gift",
+        "https://example.com/news/gift.amp",
+        "https://example.com/news/gift?amp=1",
+        "https://example.com/news/gift?outputType=amp",
+        "https://www-example-com.cdn.ampproject.org/c/s/www.example.com/news/gift/amp",
+        "  https://user:pw@example.com./news/gift  ",
+    ]
+    want = "https://example.com/news/gift"
+    for u in same:
+        assert canonical(u) == want, (u, canonical(u))
+        assert canonical(canonical(u)) == canonical(u)
+    cases = {
+        "http://example.com": "https://example.com/",
+        "https://example.com/a.amp.html": "https://example.com/a.html",
+        "https://example.com/a?b=2&a=1&utm_campaign=z": "https://example.com/a?a=1&b=2",
+        "https://example.com/a?outputType=print": "https://example.com/a?outputType=print",
+        "https://example.com/a%2fb": "https://example.com/a%2Fb",
+        "https://example.com:8443/a": "https://example.com:8443/a",
+        "https://m.co/a": "https://m.co/a",
+        "https://example.com/Case/Path": "https://example.com/Case/Path",
+        "mailto:x@example.com": "mailto:x@example.com",
+        "not a url": "not a url",
+        "": "",
+    }
+    for u, w in cases.items():
+        assert canonical(u) == w, (u, canonical(u), w)
+    assert host("https://www.nytimes.com/x") == "nytimes.com"
+    assert host("https://mobile.nytimes.com/x") == "nytimes.com"
+    assert host("nope") == ""
+    print(f"[ok] urlcanon: {len(same)} variants collapse, {len(cases)} edge cases")
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    sub.add_parser("selftest")
+    sp = sub.add_parser("migrate", help="re-key liveness/wayback cache entries")
+    sp.add_argument("--dry-run", action="store_true",
+                    help="count entries that would move without moving them")
+    sp = sub.add_parser("show", help="print the canonical form of URLs")
+    sp.add_argument("urls", nargs="+")
+    args = ap.parse_args(argv)
+    if args.cmd == "selftest":
+        _selftest()
+    elif args.cmd == "migrate":
+        verb = "would re-key" if args.dry_run else "re-keyed"
+        for ns, n in migrate(dry_run=args.dry_run).items():
+            print(f"  {ns:<20} {n:>7} {verb}")
+    else:
+        for u in args.urls:
+            print(f"{canonical(u)}\t{u}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
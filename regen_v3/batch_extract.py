@@ -0,0 +1,490 @@
+"""regen_v3 batch_extract — offline Message Batches mode for extract.py.
+
+For `--all` refreshes interactive latency doesn't matter; cost and
+throughput do. This module walks the cohort through plan → search →
+verify (the same code path `cli.run_one` uses), collects every alive URL
+whose `(url, snippet, role_hint, subject)` extraction is NOT already in
+the `extract` cache namespace, and submits those requests as asynchronous Message
+Batches jobs. Results are validated with the same `_validate_event`
+grounding checks and written to the same `extract` cache entries a live
+call would write, after which `python3 -m regen_v3 --all` completes extraction from
+cache alone.
+
+Job lifecycle (every step is resumable; state is saved after each batch):
+    submit   → gather uncached requests, create batches of <= MAX_REQUESTS_PER_BATCH
+    poll     → refresh each batch's processing_status / request_counts
+    collect  → stream results of ended batches into the extract cache
+
+State: `regen_v3/cache/batch_state/extract_<job_id>.json`. The batch
+`custom_id` IS the extract cache key (sha256 hex, 64 chars), so a result
+maps straight onto its cache entry. Errored / expired requests are left
+uncached; the next `submit` (or a live `run_one`) picks them up.
+
+Usage:
+    python3 -m regen_v3.batch_extract submit --all
+    python3 -m regen_v3.batch_extract submit --subjects henry_kravis --job-id kravis1
+    python3 -m regen_v3.batch_extract poll --job <job_id> [--wait]
+    python3 -m regen_v3.batch_extract collect --job <job_id>
+    python3 -m regen_v3.batch_extract run --all          # submit + wait + collect
+    python3 -m regen_v3.batch_extract selftest           # against a local fake endpoint
+
+The SDK honors ANTHROPIC_BASE_URL, which is how `selftest` points the whole
+lifecycle at a local fake batch endpoint.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from pathlib import Path
+
+HERE = Path(__file__).parent
+ROOT = HERE.parent
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from regen_v3 import cache  # noqa: E402
+from regen_v3 import extract as extract_mod  # noqa: E402
+from regen_v3._atomic import atomic_write_json  # noqa: E402
+from regen_v3._llm_retry import with_retry  # noqa: E402
+
+STATE_DIR = HERE / "cache" / "batch_state"
+
+# Message Batches accepts up to 100k requests / 256 MB per batch. Smaller
+# batches finish (and can be collected) sooner and keep a resubmission cheap.
+MAX_REQUESTS_PER_BATCH = 10_000
+POLL_INTERVAL_SEC = 60
+
+
+def _now_iso() -> str:
+    return datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def _now_job_id() -> str:
+    return datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%SZ")
+
+
+def _state_path(job_id: str) -> Path:
+    return STATE_DIR / f"extract_{job_id}.json"
+
+
+def _load_state(job_id: str) -> dict | None:
+    fp = _state_path(job_id)
+    if not fp.exists():
+        return None
+    return json.loads(fp.read_text())
+
+
+def _save_state(state: dict) -> None:
+    state["updated"] = _now_iso()
+    atomic_write_json(_state_path(state["job_id"]), state, sort_keys=True)
+
+
+def _client():
+    from regen_v3._llm_client import get_client
+    return get_client()
+
+
+# ---------------------------------------------------------------------------
+# Gather: which extractions does the cohort still need?
+# ---------------------------------------------------------------------------
+
+def gather_requests(subjects: list[str]) -> dict[str, dict]:
+    """Return {cache_key: {url, title, snippet, role_hint, subject_name}} for
+    every alive URL across `subjects` with no extract cache entry yet.
+
+    Runs the same plan → search → verify stages as cli.run_one (search is
+    cached, so this is cheap on a re-run) and stops before extraction.
+    Near-duplicate members (`fan_from`) are left out: run_one fans their
+    events out from the cluster's first alive member, which is submitted.
+    """
+    from regen_v3 import cli
+
+    out: dict[str, dict] = {}
+    for sid in subjects:
+        try:
+            _fp, record = cli.load_record(sid)
+        except FileNotFoundError as e:
+            print(f"  [error] {e}")
+            continue
+        subject_name = record.get("person", {}).get("name_display", sid)
+        print(f"\n=== {subject_name}  [{sid}] ===")
+        plan = cli.build_plan(record, refresh=False)
+        stream = cli._stream_search_verify_extract(
+            plan, subject_name=subject_name, refresh=False, verbose=False,
+            extract=False,
+        )
+        seen_urls, liveness = stream["seen_urls"], stream["liveness"]
+        fan_from = stream["fan_from"]
+        n_new = 0
+        for url in sorted(liveness):
+            if not liveness[url]["alive"] or url in fan_from:
+                continue
+            meta = seen_urls[url]
+            args = (meta["url"], meta["snippet"], meta["role_hint"], subject_name)
+            key = extract_mod._cache_key(*args)
+            if key in out or extract_mod._read_cache(
+                    key, extract_mod._legacy_cache_key(*args)) is not None:
+                continue
+            if extract_mod._prefilter(key, url=meta["url"], title=meta["title"],
+                                      snippet=meta["snippet"]):
+                continue
+            out[key] = {
+                "url": meta["url"],
+                "title": meta["title"],
+                "snippet": meta["snippet"],
+                "role_hint": meta["role_hint"],
+                "subject_name": subject_name,
+            }
+            n_new += 1
+        print(f"  batch_extract: {n_new} uncached extraction request(s)"
+              + (f", {len(fan_from)} near-dup member(s) fanned out" if fan_from else ""))
+    return out
+
+
+# ---------------------------------------------------------------------------
+# Lifecycle
+# ---------------------------------------------------------------------------
+
+def new_job(requests: dict[str, dict], *, job_id: str | None = None) -> dict:
+    """Create and persist a job state for `requests`, chunked deterministically
+    (sorted custom_id) into batches of at most MAX_REQUESTS_PER_BATCH."""
+    job_id = job_id or _now_job_id()
+    ids = sorted(requests)
+    state = {
+        "job_id": job_id,
+        "kind": "extract",
+        "model": extract_mod.MODEL,
+        "created": _now_iso(),
+        "requests": requests,
+        "chunks": [
+            {"custom_ids": ids[i:i + MAX_REQUESTS_PER_BATCH], "batch_id": None,
+             "status": "pending", "collected": False, "counts": {}}
+            for i in range(0, len(ids), MAX_REQUESTS_PER_BATCH)
+        ],
+    }
+    _save_state(state)
+    return state
+
+
+def submit(state: dict, *, client=None) -> int:
+    """Create a Message Batch for every chunk that doesn't have one yet.
+    Saves state after each create, so an interrupted submit resumes without
+    double-submitting. Returns the number of batches created."""
+    client = client or _client()
+    created = 0
+    for chunk in state["chunks"]:
+        if chunk["batch_id"]:
+            continue
+        reqs = []
+        for cid in chunk["custom_ids"]:
+            r = state["requests"][cid]
+            reqs.append({
+                "custom_id": cid,
+                "params": extract_mod._message_params(
+                    subject_name=r["subject_name"],
+                    role_hint=r["role_hint"],
+                    url=r["url"],
+                    title=r["title"],
+                    snippet=r["snippet"],
+                ),
+            })
+        batch = with_retry(lambda: client.messages.batches.create(requests=reqs))
+        chunk["batch_id"] = batch.id
+        chunk["status"] = batch.processing_status
+        chunk["submitted"] = _now_iso()
+        _save_state(state)
+        created += 1
+        print(f"  [submit] {batch.id}: {len(reqs)} request(s)")
+    return created
+
+
+def poll(state: dict, *, client=None) -> bool:
+    """Refresh status for every submitted, not-yet-ended batch. Returns True
+    once every chunk has ended."""
+    client = client or _client()
+    for chunk in state["chunks"]:
+        if not chunk["batch_id"] or chunk["status"] == "ended":
+            continue
+        batch = with_retry(lambda: client.messages.batches.retrieve(chunk["batch_id"]))
+        chunk["status"] = batch.processing_status
+        rc = batch.request_counts
+        chunk["counts"] = {
+            k: getattr(rc, k, 0)
+            for k in ("processing", "succeeded", "errored", "canceled", "expired")
+        }
+    _save_state(state)
+    return all(c["status"] == "ended" for c in state["chunks"])
+
+
+def collect(state: dict, *, client=None) -> dict[str, int]:
+    """Write results of ended, uncollected batches into the extract cache.
+    Returns {"succeeded", "failed", "skipped_cached"} counts."""
+    client = client or _client()
+    counts = {"succeeded": 0, "failed": 0, "skipped_cached": 0}
+    for chunk in state["chunks"]:
+        if chunk["status"] != "ended" or chunk["collected"]:
+            continue
+        for entry in client.messages.batches.results(chunk["batch_id"]):
+            cid = entry.custom_id
+            req = state["requests"].get(cid)
+            if req is None:
+                continue
+            if entry.result.type != "succeeded":
+                counts["failed"] += 1
+                continue
+            # A live run may have filled this key while the batch was queued;
+            # first writer wins so a re-collect never churns a cache file.
+            if extract_mod._read_cache(cid) is not None:
+                counts["skipped_cached"] += 1
+                continue
+            raw = extract_mod._events_from_content(entry.result.message.content)
+            extract_mod._validate_and_cache(
+                cid, raw, url=req["url"], title=req["title"], snippet=req["snippet"]
+            )
+            counts["succeeded"] += 1
+        chunk["collected"] = True
+        _save_state(state)
+    return counts
+
+
+def _summary(state: dict) -> str:
+    n = sum(len(c["custom_ids"]) for c in state["chunks"])
+    by_status: dict[str, int] = {}
+    for c in state["chunks"]:
+        st = "collected" if c["collected"] else c["status"]
+        by_status[st] = by_status.get(st, 0) + 1
+    parts = ", ".join(f"{k}={v}" for k, v in sorted(by_status.items()))
+    return f"job {state['job_id']}: {n} request(s) in {len(state['chunks'])} batch(es) [{parts}]"
+
+
+# ---------------------------------------------------------------------------
+# Self-test against a local fake Message Batches endpoint
+# ---------------------------------------------------------------------------
+
+def _selftest() -> None:
+    import http.server
+    import re
+    import tempfile
+    import threading
+
+    batches: dict[str, dict] = {}
+
+    class _Fake(http.server.BaseHTTPRequestHandler):
+        def log_message(self, *a):
+            pass
+
+        def _send(self, body: bytes, ctype: str = "application/json") -> None:
+            self.send_response(200)
+            self.send_header("Content-Type", ctype)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def _batch_obj(self, bid: str) -> dict:
+            b = batches[bid]
+            ended = b["polls"] >= 1
+            base = f"http://127.0.0.1:{self.server.server_port}"
+            n = len(b["requests"])
+            return {
+                "id": bid, "type": "message_batch",
+                "processing_status": "ended" if ended else "in_progress",
+                "request_counts": {
+                    "processing": 0 if ended else n,
+                    "succeeded": n - 1 if ended else 0,
+                    "errored": 1 if ended else 0, "canceled": 0, "expired": 0,
+                },
+                "created_at": "2026-01-01T00:00:00Z",
+                "expires_at": "2026-01-02T00:00:00Z",
+                "ended_at": "2026-01-01T01:00:00Z" if ended else None,
+                "archived_at": None, "cancel_initiated_at": None,
+                "results_url": f"{base}/v1/messages/batches/{bid}/results" if ended else None,
+            }
+
+        def do_POST(self):
+            body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+            bid = f"msgbatch_{len(batches)}"
+            batches[bid] = {"requests": body["requests"], "polls": 0}
+            self._send(json.dumps(self._batch_obj(bid)).encode())
+
+        def do_GET(self):
+            m = re.match(r"^/v1/messages/batches/([^/?]+)(/results)?", self.path)
+            bid = m.group(1)
+            if not m.group(2):
+                obj = self._batch_obj(bid)
+                batches[bid]["polls"] += 1
+                self._send(json.dumps(obj).encode())
+                return
+            lines = []
+            for i, r in enumerate(batches[bid]["requests"]):
+                if i == 0:
+                    result = {"type": "errored", "error": {
+                        "type": "error", "error": {"type": "api_error", "message": "boom"}}}
+                else:
+                    url = re.search(r"^URL: (\S+)$", r["params"]["messages"][0]["content"], re.M).group(1)
+                    ev = {
+                        "event_role": "direct_gift", "year": 2021, "date": None,
+                        "date_precision": "year", "donor_entity": "Test Subject",
+                        "recipient": "Test University", "amount_usd": 5_000_000,
+                        "source_type": "news_article", "source_url": url,
+                        "confidence": "high", "extraction_note": "fake",
+                        "extraction_evidence": "gave $5 million to Test University",
+                    }
+                    result = {"type": "succeeded", "message": {
+                        "id": f"msg_{i}", "type": "message", "role": "assistant",
+                        "model": extract_mod.MODEL, "stop_reason": "tool_use",
+                        "stop_sequence": None,
+                        "content": [{"type": "tool_use", "id": f"tu_{i}",
+                                     "name": "record_events", "input": {"events": [ev]}}],
+                        "usage": {"input_tokens": 1, "output_tokens": 1}}}
+                lines.append(json.dumps({"custom_id": r["custom_id"], "result": result}))
+            self._send(("\n".join(lines) + "\n").encode(), "application/binary")
+
+    global STATE_DIR, MAX_REQUESTS_PER_BATCH
+    server = http.server.ThreadingHTTPServer(("127.0.0.1", 0), _Fake)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    saved = (STATE_DIR, MAX_REQUESTS_PER_BATCH,
+             {k: os.environ.get(k) for k in ("ANTHROPIC_BASE_URL", "ANTHROPIC_API_KEY")})
+    try:
+        with tempfile.TemporaryDirectory() as tmp, cache.use(Path(tmp) / "cache.sqlite3"):
+            STATE_DIR = Path(tmp) / "batch_state"
+            MAX_REQUESTS_PER_BATCH = 2
+            os.environ["ANTHROPIC_BASE_URL"] = f"http://127.0.0.1:{server.server_port}"
+            os.environ["ANTHROPIC_API_KEY"] = "fake-key"
+
+            reqs = {}
+            for i in range(3):
+                r = {"url": f"https://example.com/b{i}", "title": "Test",
+                     "snippet": "Test Subject gave $5 million to Test University.",
+                     "role_hint": "direct_gift", "subject_name": "Test Subject"}
+                reqs[extract_mod._cache_key(r["url"], r["snippet"], r["role_hint"],
+                                            r["subject_name"])] = r
+            state = new_job(reqs, job_id="selftest")
+            assert submit(state) == 2 and len(batches) == 2
+            # Resume from disk: nothing left to submit.
+            state = _load_state("selftest")
+            assert submit(state) == 0 and len(batches) == 2, "resubmitted a batch"
+            assert poll(state) is False, "first poll should still be in progress"
+            assert poll(state) is True
+            counts = collect(state)
+            assert counts == {"succeeded": 1, "failed": 2, "skipped_cached": 0}, counts
+            assert collect(state)["succeeded"] == 0, "re-collect must be a no-op"
+
+            # run_one-equivalent: served from cache, no key needed.
+            os.environ.pop("ANTHROPIC_API_KEY")
+            hits = 0
+            for cid, r in reqs.items():
+                if extract_mod._read_cache(cid) is None:
+                    continue
+                evs = extract_mod.extract_events(
+                    url=r["url"], title=r["title"], snippet=r["snippet"],
+                    role_hint=r["role_hint"], subject_name=r["subject_name"],
+                )
+                assert len(evs) == 1 and evs[0]["amount_usd"] == 5_000_000
+                hits += 1
+            assert hits == 1
+            print(f"[ok] {_summary(state)}")
+    finally:
+        STATE_DIR, MAX_REQUESTS_PER_BATCH, env = saved
+        server.shutdown()
+        for k, v in env.items():
+            if v is None:
+                os.environ.pop(k, None)
+            else:
+                os.environ[k] = v
+    print("[ok] batch_extract lifecycle against fake endpoint")
+
+
+# ---------------------------------------------------------------------------
+# CLI
+# ---------------------------------------------------------------------------
+
+def _resolve_subjects(args) -> list[str]:
+    from regen_v3 import cli
+    if args.all:
+        return cli.list_all_subjects()
+    return list(args.subjects)
+
+
+def _wait(state: dict, interval: float) -> None:
+    while not poll(state):
+        print(f"  [poll] {_summary(state)}; sleeping {interval:.0f}s")
+        time.sleep(interval)
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+
+    for name in ("submit", "run"):
+        sp = sub.add_parser(name)
+        g = sp.add_mutually_exclusive_group()
+        g.add_argument("--subjects", nargs="+")
+        g.add_argument("--all", action="store_true")
+        g.add_argument("--resume", metavar="JOB_ID",
+                       help="Continue submitting an existing job")
+        sp.add_argument("--job-id", help="Override job id (default: ISO datetime)")
+        if name == "run":
+            sp.add_argument("--interval", type=float, default=POLL_INTERVAL_SEC)
+    sp = sub.add_parser("poll")
+    sp.add_argument("--job", required=True)
+    sp.add_argument("--wait", action="store_true")
+    sp.add_argument("--interval", type=float, default=POLL_INTERVAL_SEC)
+    sp = sub.add_parser("collect")
+    sp.add_argument("--job", required=True)
+    sub.add_parser("selftest")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "selftest":
+        _selftest()
+        return 0
+
+    if args.cmd in ("submit", "run"):
+        if args.resume:
+            state = _load_state(args.resume)
+            if state is None:
+                print(f"[batch_extract] no state for job {args.resume}", file=sys.stderr)
+                return 2
+        else:
+            if not (args.all or args.subjects):
+                ap.error("one of --subjects / --all / --resume is required")
+            reqs = gather_requests(_resolve_subjects(args))
+            if not reqs:
+                print("[batch_extract] every extraction is already cached; nothing to do")
+                return 0
+            state = new_job(reqs, job_id=args.job_id)
+        submit(state)
+        print(f"[batch_extract] {_summary(state)}")
+        print(f"[batch_extract] state: {_state_path(state['job_id'])}")
+        if args.cmd == "submit":
+            return 0
+        _wait(state, args.interval)
+    else:
+        state = _load_state(args.job)
+        if state is None:
+            print(f"[batch_extract] no state for job {args.job}", file=sys.stderr)
+            return 2
+        if args.cmd == "poll":
+            if args.wait:
+                _wait(state, args.interval)
+            else:
+                poll(state)
+            print(f"[batch_extract] {_summary(state)}")
+            return 0
+
+    counts = collect(state)
+    print(
+        f"[batch_extract] collected: {counts['succeeded']} cached, "
+        f"{counts['failed']} failed (left uncached), "
+        f"{counts['skipped_cached']} already cached"
+    )
+    print(f"[batch_extract] {_summary(state)}")
+    print("[batch_extract] next: python3 -m regen_v3 --all  (extraction served from cache)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
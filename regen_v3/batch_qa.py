@@ -216,12 +216,13 @@ def _verify_event_with_llm(ev: dict, page_text: str, client: Any, model: str) ->
         "Reply in JSON only: {\"supported\": bool, \"reason\": \"<<=200 chars\"}."
     )
     try:
-        resp = client.messages.create(
+        from regen_v3._llm_retry import with_retry
+        resp = with_retry(lambda: client.messages.create(
             model=model,
             max_tokens=300,
             system=sys_prompt,
             messages=[{"role": "user", "content": user}],
-        )
+        ))
         text = "".join(b.text for b in resp.content if hasattr(b, "text")).strip()
         # Strip code fences if present.
         if text.startswith("```"):
@@ -324,10 +325,10 @@ def _resolve_all() -> list[str]:
 
 def _make_deep_helpers():
     """Lazy-construct the WebFetch fetcher + Anthropic client for deep mode."""
-    import anthropic  # noqa: F401 — only needed in deep mode
     import urllib.request
 
-    client = anthropic.Anthropic()
+    from regen_v3._llm_client import get_client
+    client = get_client()
 
     def fetcher(url: str) -> str | None:
         try:
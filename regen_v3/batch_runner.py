@@ -11,6 +11,7 @@ Usage:
     python3 -m regen_v3.batch_runner --from-file ./tier_b_seeds.txt --workers 4
     python3 -m regen_v3.batch_runner --resume <batch_id>
     python3 -m regen_v3.batch_runner --all --unsafe-allow-large --workers 4
+    python3 -m regen_v3.batch_runner --all --unsafe-allow-large --workers 4 --adaptive
 """
 from __future__ import annotations
 
@@ -63,15 +64,70 @@ def _save_state(state: dict) -> None:
     _atomic_write_json(_state_path(state["batch_id"]), state)
 
 
-def _pool_init(extract_counter, extract_lock, brave_ts, brave_lock) -> None:
+def _pool_init(extract_counter, extract_lock, rate_state, rate_lock,
+               extract_inflight, adaptive_state=None, icij_index=None,
+               leaks_off=False) -> None:
     """Pool initializer (module-level for `spawn` picklability). Each worker
-    calls this once at startup; installs the shared mp.Value handles into
-    extract.py and search.py so the cost cap and Brave rate-limiter are
-    enforced ACROSS workers, not per-worker."""
+    calls this once at startup; installs the shared mp handles into
+    extract.py and _ratelimit.py so the cost cap, the LLM in-flight cap and
+    the per-upstream rate limits (Brave, SEC, ProPublica, ...) are enforced
+    ACROSS workers, not per-worker. With --adaptive, the fixed extract
+    semaphore is replaced by the controller's adjustable "anthropic" slots.
+    `icij_index` is the leaks index the parent prepared; every worker maps
+    that one file read-only instead of checking / building its own.
+    `leaks_off` skips the leaks stage (a preview batch with no index)."""
+    from regen_v3 import _ratelimit
     from regen_v3 import extract as _extract_mod
-    from regen_v3 import search as _search_mod
     _extract_mod.install_shared_counter(extract_counter, extract_lock)
-    _search_mod.install_shared_rate_limiter(brave_ts, brave_lock)
+    _ratelimit.install_shared(rate_state, rate_lock)
+    if adaptive_state is not None:
+        from regen_v3 import _adaptive
+        _adaptive.install_shared(*adaptive_state)
+        _extract_mod.install_shared_inflight(_adaptive.semaphore("anthropic"))
+    else:
+        _extract_mod.install_shared_inflight(extract_inflight)
+    if icij_index is not None or leaks_off:
+        from regen_v3 import leaks
+        leaks.attach_shared(icij_index)
+
+
+def _cohort_downstream(subjects: list[str], *, refresh: bool) -> dict[str, list[dict]]:
+    """{subject_id: dafs_downstream candidates} from one
+    `dafs_downstream.collect_cohort` over the subjects' records. Subjects
+    whose record can't be read are left out (their run reports it); if
+    the pass fails, every worker runs the source itself as before."""
+    from regen_v3 import dafs_downstream
+    from regen_v3.cli import load_record
+    ids: list[str] = []
+    records: list[dict] = []
+    for sid in subjects:
+        try:
+            records.append(load_record(sid)[1])
+        except (OSError, ValueError):
+            continue
+        ids.append(sid)
+    t0 = time.time()
+    try:
+        per_subject = dafs_downstream.collect_cohort(records, refresh=refresh)
+    except Exception as e:
+        print(f"[batch] dafs_downstream cohort pass failed ({type(e).__name__}: {e}); "
+              "workers run it per subject")
+        return {}
+    print(f"[batch] dafs_downstream: {sum(map(len, per_subject))} candidates for "
+          f"{len(ids)} subjects in {time.time() - t0:.1f}s")
+    return dict(zip(ids, per_subject))
+
+
+def _peak_rss_mb() -> float | None:
+    """This process's peak resident set size so far, in MB (None where
+    the `resource` module is unavailable)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports KiB, macOS bytes.
+    return round(peak / (1024**2 if sys.platform == "darwin" else 1024), 1)
 
 
 def _worker(args: tuple) -> dict:
@@ -102,6 +158,7 @@ def _worker(args: tuple) -> dict:
             dry_run=opts["dry_run"],
             verbose=opts["verbose"],
             use_timestamp_run_id=False,
+            precomputed=opts.get("precomputed"),
         )
         if summary.get("merged"):
             status = "merged"
@@ -139,6 +196,8 @@ def _worker(args: tuple) -> dict:
         "error": err,
         "log": str(log_fp),
         "finished": datetime.now(timezone.utc).isoformat(),
+        # Process-wide, so it covers earlier subjects run by this worker too.
+        "peak_rss_mb": _peak_rss_mb(),
     }
 
 
@@ -171,7 +230,21 @@ def main(argv: list[str] | None = None) -> int:
     g.add_argument("--all", action="store_true", help="All subjects in data/")
     g.add_argument("--resume", metavar="BATCH_ID",
                    help="Resume a prior batch; skips subjects already 'merged'")
-    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--workers", type=int, default=4,
+                    help="Concurrent subjects (initial value with --adaptive)")
+    ap.add_argument("--adaptive", action="store_true",
+                    help="AIMD-tune active subjects and per-upstream in-flight "
+                         "limits from 429/5xx rates and latency")
+    ap.add_argument("--max-workers", type=int,
+                    help="Upper bound on concurrent subjects with --adaptive "
+                         "(default: 2x --workers)")
+    ap.add_argument("--extract-inflight", type=int,
+                    default=int(os.environ.get("MAX_EXTRACT_INFLIGHT", "8")),
+                    help="Max concurrent LLM extract requests across ALL workers")
+    ap.add_argument("--rate-limit", action="append", default=[],
+                    metavar="NAME=RATE[:BURST]",
+                    help="Override an upstream's shared token bucket, e.g. "
+                         "sec=5 or propublica=1.5:3 (repeatable)")
     ap.add_argument("--batch-id", help="Override batch id (default: ISO datetime)")
     ap.add_argument("--unsafe-allow-large", action="store_true",
                     help=f"Bypass {HARD_CAP}-subject hard cap")
@@ -181,6 +254,20 @@ def main(argv: list[str] | None = None) -> int:
     ap.add_argument("--verbose", "-v", action="store_true")
     args = ap.parse_args(argv)
 
+    if args.rate_limit:
+        # Workers are spawned fresh and resolve _ratelimit.LIMITS from the
+        # environment, so the override must be in place before the pool.
+        # Parse here first so a typo fails fast instead of in every worker.
+        from regen_v3 import _ratelimit
+        spec = ",".join(filter(None, [os.environ.get("REGEN_RATE_LIMITS", ""),
+                                      *args.rate_limit]))
+        try:
+            _ratelimit.parse_overrides(spec)
+        except ValueError as e:
+            print(f"[batch] bad --rate-limit: {e}", file=sys.stderr)
+            return 2
+        os.environ["REGEN_RATE_LIMITS"] = spec
+
     # Resolve subject list + batch state.
     if args.resume:
         batch_id = args.resume
@@ -227,53 +314,139 @@ def main(argv: list[str] | None = None) -> int:
         "dry_run": args.dry_run,
         "verbose": args.verbose,
     }
-    work = [(sid, opts) for sid in subjects]
+    # DAF downstream attribution for the whole batch in one pass, here:
+    # every subject giving through Fidelity / Schwab / Vanguard queries the
+    # same sponsor-year Schedule I lists, so each is fetched and indexed
+    # once instead of once per worker. Each worker gets its subject's slice.
+    downstream = _cohort_downstream(subjects, refresh=args.refresh)
+    work = [(sid, {**opts, "precomputed": {"dafs_downstream": downstream[sid]}}
+             if sid in downstream else opts) for sid in subjects]
     workers = max(1, min(args.workers, len(work)))
-    print(f"[batch] {batch_id}: {len(work)} subjects, {workers} workers")
+    pool_size = workers
+    if args.adaptive:
+        pool_size = max(workers, min(args.max_workers or 2 * workers, len(work)))
+    print(f"[batch] {batch_id}: {len(work)} subjects, {workers} workers"
+          + (f" (adaptive, max {pool_size})" if args.adaptive else ""))
     print(f"[batch] state: {_state_path(batch_id)}")
     print(f"[batch] logs:  {LOG_DIR}/<subject>.log")
 
     counts = {"merged": 0, "skipped": 0, "error": 0}
     t0 = time.time()
+    # Download / refresh the ICIJ CSVs and build the leaks index once, here,
+    # rather than racing to do it in every worker; workers then map the one
+    # file read-only and share its pages through the OS page cache.
+    # --dry-run / --candidates-only previews never download or build it:
+    # they use an index that's already current, or skip the leaks stage.
+    from regen_v3 import leaks
+    preview = args.dry_run or args.candidates_only
+    icij_index = leaks.prepare_shared(refresh=args.refresh, build=not preview)
+    leaks_off = preview and icij_index is None
+    if leaks_off:
+        print("[batch] leaks: no built ICIJ index; skipped for this preview run")
     # `spawn` is safer than `fork` for processes that may have already imported
     # heavy native libs (anthropic, requests). Pay a small startup cost; gain
     # predictability.
     ctx = mp.get_context("spawn")
-    # Shared cross-worker state: ONE LLM-extract counter + ONE Brave
-    # rate-limit timestamp shared across all workers so the cap and the
-    # 1-req/sec limit aren't multiplied by N workers (codex round 7 fix).
+    # Shared cross-worker state: ONE LLM-extract counter + ONE set of
+    # per-upstream token buckets shared across all workers so the cap and
+    # the Brave/SEC/ProPublica/... rate limits aren't multiplied by N
+    # workers (codex round 7 fix, generalized beyond Brave).
+    from regen_v3 import _ratelimit
     shared_extract_count = ctx.Value("i", 0)
     shared_extract_lock = ctx.Lock()
-    shared_brave_ts = ctx.Value("d", 0.0)
-    shared_brave_lock = ctx.Lock()
+    shared_rate_state, shared_rate_lock = _ratelimit.make_shared(ctx)
+    # One in-flight semaphore for every extract thread in every worker.
+    shared_extract_inflight = ctx.BoundedSemaphore(max(1, args.extract_inflight))
+    # Adaptive mode: shared upstream counters + adjustable in-flight limits,
+    # tuned from the parent by an AIMD controller (see _adaptive).
+    controller = None
+    adaptive_state = None
+    if args.adaptive:
+        from regen_v3 import _adaptive
+        inflight = max(1, args.extract_inflight)
+        adaptive_state = _adaptive.make_shared(ctx, {"anthropic": inflight})
+        _adaptive.install_shared(*adaptive_state)
+        controller = _adaptive.Controller(
+            active=workers, max_active=pool_size,
+            max_limits={"anthropic": 2 * inflight},
+        )
+        state.setdefault("adaptive", {}).setdefault("decisions", [])
+        state["adaptive"].update({"active_subjects": controller.active,
+                                  "limits": controller.limits()})
+        _save_state(state)
+
+    def _record(result: dict) -> None:
+        sid = result["subject_id"]
+        state["subjects"][sid] = {
+            "status": result["status"],
+            "elapsed_sec": result["elapsed_sec"],
+            "error": result["error"],
+            "finished": result["finished"],
+            "rate_limit_wait": (result["summary"] or {}).get("rate_limit_wait", {}),
+            "cache": (result["summary"] or {}).get("cache", {}),
+            "neardup": (result["summary"] or {}).get("neardup", {}),
+            "peak_rss_mb": result.get("peak_rss_mb"),
+        }
+        _save_state(state)
+        counts[result["status"]] = counts.get(result["status"], 0) + 1
+        mins = result["elapsed_sec"] / 60.0
+        tail = f" — {result['error']}" if result["error"] else ""
+        print(f"[{batch_id}] {sid}: {result['status']} ({mins:.1f} min){tail}")
 
     try:
         with ctx.Pool(
-            processes=workers,
+            processes=pool_size,
             initializer=_pool_init,
             initargs=(shared_extract_count, shared_extract_lock,
-                      shared_brave_ts, shared_brave_lock),
+                      shared_rate_state, shared_rate_lock,
+                      shared_extract_inflight, adaptive_state, icij_index, leaks_off),
         ) as pool:
-            for result in pool.imap_unordered(_worker, work):
-                sid = result["subject_id"]
-                state["subjects"][sid] = {
-                    "status": result["status"],
-                    "elapsed_sec": result["elapsed_sec"],
-                    "error": result["error"],
-                    "finished": result["finished"],
-                }
-                _save_state(state)
-                counts[result["status"]] = counts.get(result["status"], 0) + 1
-                mins = result["elapsed_sec"] / 60.0
-                tail = f" — {result['error']}" if result["error"] else ""
-                print(f"[{batch_id}] {sid}: {result['status']} ({mins:.1f} min){tail}")
+            # Submit up to the active-subject target and top up as subjects
+            # finish. Without --adaptive the target is the pool size, which
+            # is what imap_unordered did.
+            queue = list(work)
+            running = {}  # subject_id -> AsyncResult
+            while queue or running:
+                target = controller.active if controller is not None else pool_size
+                while queue and len(running) < target:
+                    item = queue.pop(0)
+                    running[item[0]] = pool.apply_async(_worker, (item,))
+                done = [sid for sid, ar in running.items() if ar.ready()]
+                for sid in done:
+                    _record(running.pop(sid).get())
+                if controller is not None and controller.due():
+                    decisions = controller.tick(pending=len(queue))
+                    if decisions:
+                        for d in decisions:
+                            print(f"[adaptive] {d['target']}: {d['from']} -> {d['to']} ({d['reason']})")
+                        state["adaptive"]["decisions"].extend(decisions)
+                        state["adaptive"].update({"active_subjects": controller.active,
+                                                  "limits": controller.limits()})
+                        _save_state(state)
+                if not done:
+                    time.sleep(0.5)
     except KeyboardInterrupt:
         print(f"\n[batch] interrupted; checkpoint at {_state_path(batch_id)}")
         print(f"[batch] resume with: python3 -m regen_v3.batch_runner --resume {batch_id}")
         return 130
 
     elapsed = time.time() - t0
+    # Workers are gone, so nothing else is writing: expire stale entries and
+    # evict down to the disk budget (REGEN_CACHE_MAX_BYTES).
+    from regen_v3 import _neardup, cache
+    swept = cache.gc()
+    cache_line = cache.format_stats(cache.merge_stats(
+        row.get("cache") for row in state["subjects"].values()))
     live_calls = _read_max_extract_calls()
+    neardup_line = _neardup.format_stats(_neardup.merge_stats(
+        row.get("neardup") for row in state["subjects"].values()))
+    rss = [row["peak_rss_mb"] for row in state["subjects"].values()
+           if row.get("peak_rss_mb") is not None]
+    waited: dict[str, float] = {}
+    for row in state["subjects"].values():
+        for upstream, callers in (row.get("rate_limit_wait") or {}).items():
+            waited[upstream] = waited.get(upstream, 0.0) + sum(
+                c.get("wait_sec", 0.0) for c in callers.values())
     print(
         f"\n=== batch {batch_id} done in {elapsed/60:.1f} min ===\n"
         f"  total:   {len(work)}\n"
@@ -281,6 +454,14 @@ def main(argv: list[str] | None = None) -> int:
         f"  skipped: {counts.get('skipped', 0)}\n"
         f"  errors:  {counts.get('error', 0)}\n"
         f"  live LLM calls (parent proc only): {live_calls}\n"
+        f"  {neardup_line}\n"
+        f"  worker peak RSS: {f'max {max(rss):.0f} MB' if rss else 'n/a'}\n"
+        f"  rate-limit wait: "
+        f"{', '.join(f'{k}={v:.1f}s' for k, v in sorted(waited.items())) or 'none'}\n"
+        f"  {cache_line}\n"
+        f"  cache gc: {sum(swept['expired'].values())} expired, "
+        f"{sum(swept['evicted'].values())} evicted, "
+        f"{swept['freed_bytes'] / 1024**2:.1f} MB freed\n"
         f"  state:   {_state_path(batch_id)}"
     )
     return 0 if counts.get("error", 0) == 0 else 1
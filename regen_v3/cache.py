@@ -0,0 +1,1094 @@
+"""Shared cache store for regen_v3 source modules.
+
+Before this module every source kept its own directory of small JSON
+files under `regen_v3/cache/` (search, extract, propublica, dafs, prices,
+wayback, ...). A cohort run leaves tens of thousands of them: each read is
+an `open` plus a full parse, each write a tmp file plus `os.replace`, and
+`report.py` / `_diag_revalidate.py` glob the whole search directory.
+
+Pattern: one SQLite database (`regen_v3/cache/cache.sqlite3`, override with
+`REGEN_CACHE_DB`) in WAL mode. Every entry is `(namespace, key) -> JSON`.
+The namespace is the old directory name and the key the old file stem, so
+cache keys are unchanged and the migration is a straight copy. Source
+modules call `get(ns, key)` / `put(ns, key, payload)` instead of building
+paths.
+
+Concurrency: batch_runner workers and the thread pools inside `cli.run_one`
+all write here. Each thread of each process opens its own connection
+(sqlite connections must not cross a fork or be shared between threads).
+Every `put` is a single autocommitted `INSERT ... ON CONFLICT` statement
+(`put_many` runs a batch of them in one transaction), so a reader sees the
+old payload or the new one, never a partial write. WAL
+lets readers proceed while one writer commits; `busy_timeout` makes a
+second writer wait instead of failing.
+
+Lifecycle: entries carry a byte size, a last-access time, an optional
+expiry and a pin flag. `TTLS` sets a per-namespace lifetime, with a
+separate `<ns>.negative` lifetime for "not found" / fetch-failure answers
+(`put(..., negative=True)`) so wayback misses and price misses get
+retried instead of cached forever. Other `<ns>.<variant>` lifetimes pick
+by outcome more finely (`put(..., variant="unreachable")`: URL-liveness
+results live for weeks when a page answered, hours when it timed out).
+Expired entries read as misses.
+Authoritative data — filed 990-PF Schedule I pages, Form 4 gift lists,
+historical closing prices — is written with `pin=True`: never expires,
+never evicted; so is everything `import` loads from the old files. `gc()`
+drops expired entries, then evicts unpinned entries outside NO_EVICT
+least-recently-read first until the store fits `MAX_BYTES`, then
+checkpoints the WAL (and VACUUMs with `compact=True`). Overrides:
+`REGEN_CACHE_TTLS="wayback.negative=7d,fec=never"`,
+`REGEN_CACHE_MAX_BYTES=20G`.
+
+Compression: values of COMPRESS_MIN_BYTES or more are stored as zstd
+(optional `zstandard` package) or gzip frames via `_atomic`. The frames are
+self-describing, so plain entries written earlier still read, and
+`iter_array(ns, key)` streams a list payload (Schedule I rows) one element
+at a time without inflating the whole value (`get_array` collects it,
+reading a corrupt entry as a miss). `gc --compact` recompresses
+older plain entries before it VACUUMs.
+
+Statistics: hits, misses and writes are counted per namespace in each
+process and added to the `ns_stats` table by `flush_stats()` (cli.run_one
+flushes once per subject and reports the counts in its summary; an
+atexit hook catches the rest). gc adds its expired / evicted counts.
+
+CLI:
+    python3 -m regen_v3.cache stats            # entries, bytes, pins, hit rate
+    python3 -m regen_v3.cache gc [--max-bytes 5G] [--compact] [--dry-run]
+    python3 -m regen_v3.cache import [NS ...]  # per-file layout -> store
+    python3 -m regen_v3.cache export [NS ...] [--compress]  # store -> files
+
+`import` keeps existing store entries unless `--overwrite`; `export`
+writes `<root>/<ns>/<key>.json` with the entry's write time as the file
+mtime. Run-state directories (batch_state, batch_logs, batch_qa,
+candidates) are not caches and stay on disk as files.
+"""
+from __future__ import annotations
+
+import argparse
+import atexit
+import contextlib
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Any, Iterable, Iterator
+
+HERE = Path(__file__).parent
+ROOT = HERE.parent
+CACHE_ROOT = HERE / "cache"
+DB_PATH = Path(os.environ.get("REGEN_CACHE_DB") or CACHE_ROOT / "cache.sqlite3")
+
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from regen_v3._atomic import (  # noqa: E402
+    atomic_write_json,
+    compress_bytes,
+    is_compressed,
+    iter_json_array,
+    loads,
+    read_json,
+)
+
+# Namespaces of the store: the ones that used to be `regen_v3/cache/<ns>/`
+# directories, plus `liveness` (born in the store). The migrator only
+# touches these; anything else under cache/ is run state.
+NAMESPACES: tuple[str, ...] = (
+    "dafs",
+    "dafs_downstream",
+    "extract",
+    "fec",
+    "leaks",
+    "liveness",
+    "llcs",
+    "llm_hidden_upper",
+    "llm_tier_reasoning",
+    "prices",
+    "propublica",
+    "queries_llm",
+    "recipient_verify",
+    "search",
+    "sec",
+    "seed",
+    "state_charities",
+    "tickers",
+    "wayback",
+)
+
+# Milliseconds a writer waits on another process's write lock before raising.
+BUSY_TIMEOUT_MS = 30_000
+
+DAY = 86_400.0
+
+# ns (or "<ns>.negative") -> lifetime in seconds; None = never expires.
+# Namespaces not listed never expire; a missing ".negative" entry falls
+# back to the namespace's own lifetime.
+DEFAULT_TTLS: dict[str, float | None] = {
+    "propublica": 90 * DAY,                  # new fiscal years get filed
+    "dafs": 90 * DAY,                        # <ein>_org filing lists; FY pages are pinned
+    "fec": 30 * DAY,                         # the open cycle keeps drifting
+    "wayback.negative": 30 * DAY,            # URLs get archived later
+    "prices.negative": 30 * DAY,             # provider outage / rate-limit misses
+    "tickers.negative": 30 * DAY,
+    "dafs.negative": 7 * DAY,                # ProPublica fetch failures
+    "dafs_downstream.negative": 7 * DAY,
+    "recipient_verify.negative": 7 * DAY,
+    "state_charities.negative": 7 * DAY,     # WAF / 403 / timeout
+    # _liveness probes, by _liveness.variant of the status: 2xx/3xx ...
+    "liveness": 30 * DAY,
+    "liveness.blocked": 14 * DAY,            # 401/403/406/429: exists, bot-walled
+    "liveness.gone": 7 * DAY,                # 404/410
+    "liveness.error": DAY,                   # other 4xx/5xx
+    "liveness.unreachable": 6 * 3600.0,      # TIMEOUT/CONN/SSL/ERR
+}
+
+# Namespaces LRU eviction never touches: each `extract` entry is a paid
+# LLM call that a re-run would have to repeat.
+NO_EVICT: frozenset[str] = frozenset({"extract"})
+
+# LRU budget for unpinned entries' key + value bytes. Sponsor Schedule I
+# pages alone run 1-280 MB each.
+DEFAULT_MAX_BYTES = 10 * 1024**3
+
+# Last-access stamps are refreshed at most this often per entry, so a hot
+# read path doesn't turn into a write per read.
+ACCESS_RESOLUTION_SEC = 3600.0
+
+# Values at least this large (compact JSON bytes) are stored compressed.
+# Below it the frame overhead and CPU aren't worth it; above it Schedule I
+# and ICIJ payloads shrink 5-15x.
+COMPRESS_MIN_BYTES = 8 * 1024
+
+# Unflushed hit/miss/write events per process before an automatic flush.
+FLUSH_EVERY = 500
+
+_SCHEMA = (
+    """CREATE TABLE IF NOT EXISTS entries (
+        namespace   TEXT NOT NULL,
+        key         TEXT NOT NULL,
+        value       BLOB NOT NULL,
+        updated_at  REAL NOT NULL,
+        size        INTEGER NOT NULL DEFAULT 0,
+        accessed_at REAL NOT NULL DEFAULT 0,
+        expires_at  REAL,
+        pinned      INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (namespace, key)
+    ) WITHOUT ROWID""",
+    """CREATE TABLE IF NOT EXISTS ns_stats (
+        namespace TEXT PRIMARY KEY,
+        hits      INTEGER NOT NULL DEFAULT 0,
+        misses    INTEGER NOT NULL DEFAULT 0,
+        writes    INTEGER NOT NULL DEFAULT 0,
+        expired   INTEGER NOT NULL DEFAULT 0,
+        evicted   INTEGER NOT NULL DEFAULT 0
+    )""",
+)
+_INDEXES = (
+    "CREATE INDEX IF NOT EXISTS entries_lru ON entries (pinned, accessed_at)",
+    "CREATE INDEX IF NOT EXISTS entries_expiry ON entries (expires_at) "
+    "WHERE expires_at IS NOT NULL",
+)
+# Columns added after the first release of the store (user_version 0).
+_V1_COLUMNS = (
+    ("size", "INTEGER NOT NULL DEFAULT 0"),
+    ("accessed_at", "REAL NOT NULL DEFAULT 0"),
+    ("expires_at", "REAL"),
+    ("pinned", "INTEGER NOT NULL DEFAULT 0"),
+)
+_SCHEMA_VERSION = 1
+
+_local = threading.local()
+
+_stats_lock = threading.Lock()
+_counters: dict[str, list[int]] = {}  # ns -> [hits, misses, writes], unflushed
+_unflushed = 0
+
+
+def parse_duration(s: str) -> float | None:
+    """'30d' / '12h' / '90m' / '3600' (seconds) / 'never' -> seconds or None."""
+    s = s.strip().lower()
+    if s in ("never", "none", "inf", ""):
+        return None
+    mult = {"s": 1.0, "m": 60.0, "h": 3600.0, "d": DAY, "w": 7 * DAY}
+    if s[-1] in mult:
+        return float(s[:-1]) * mult[s[-1]]
+    return float(s)
+
+
+def parse_size(s: str) -> int:
+    """'10G' / '500M' / '64K' / '1048576' -> bytes."""
+    s = s.strip().upper().removesuffix("B")
+    mult = {"K": 1024, "M": 1024**2, "G": 1024**3, "T": 1024**4}
+    if s and s[-1] in mult:
+        return int(float(s[:-1]) * mult[s[-1]])
+    return int(s)
+
+
+def parse_ttl_overrides(spec: str) -> dict[str, float | None]:
+    """Parse `ns[.variant]=duration,...`. Raises ValueError on unknown
+    namespaces and variants so a typo can't silently keep the default."""
+    out: dict[str, float | None] = {}
+    for part in spec.split(","):
+        part = part.strip()
+        if not part:
+            continue
+        name, _, val = part.partition("=")
+        name = name.strip()
+        ns, _, variant = name.partition(".")
+        if ns not in NAMESPACES and ns not in DEFAULT_TTLS:
+            raise ValueError(f"unknown cache namespace {name!r}")
+        if variant and variant != "negative" and name not in DEFAULT_TTLS:
+            raise ValueError(f"unknown cache TTL variant {name!r}")
+        out[name] = parse_duration(val)
+    return out
+
+
+TTLS: dict[str, float | None] = dict(DEFAULT_TTLS)
+TTLS.update(parse_ttl_overrides(os.environ.get("REGEN_CACHE_TTLS", "")))
+MAX_BYTES = parse_size(os.environ.get("REGEN_CACHE_MAX_BYTES") or str(DEFAULT_MAX_BYTES))
+
+
+def ttl_for(
+    namespace: str, *, negative: bool = False, variant: str | None = None,
+) -> float | None:
+    variant = variant or ("negative" if negative else None)
+    if variant and f"{namespace}.{variant}" in TTLS:
+        return TTLS[f"{namespace}.{variant}"]
+    return TTLS.get(namespace)
+
+
+def _upgrade(conn: sqlite3.Connection) -> None:
+    """Bring a store written by an older release up to `_SCHEMA_VERSION`."""
+    if conn.execute("PRAGMA user_version").fetchone()[0] >= _SCHEMA_VERSION:
+        return
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        if conn.execute("PRAGMA user_version").fetchone()[0] < 1:
+            have = {r[1] for r in conn.execute("PRAGMA table_info(entries)")}
+            missing = [(c, decl) for c, decl in _V1_COLUMNS if c not in have]
+            for col, decl in missing:
+                conn.execute(f"ALTER TABLE entries ADD COLUMN {col} {decl}")
+            if missing:
+                conn.execute(
+                    "UPDATE entries SET size = length(key) + length(value), "
+                    "accessed_at = updated_at"
+                )
+        conn.execute(f"PRAGMA user_version = {_SCHEMA_VERSION}")
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+
+
+def _connect(path: Path) -> sqlite3.Connection:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    conn = sqlite3.connect(str(path), timeout=BUSY_TIMEOUT_MS / 1000,
+                           isolation_level=None)
+    conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    for stmt in _SCHEMA:
+        conn.execute(stmt)
+    _upgrade(conn)
+    for stmt in _INDEXES:
+        conn.execute(stmt)
+    return conn
+
+
+def _conn() -> sqlite3.Connection:
+    """This thread's connection to `DB_PATH`, reopened after a fork."""
+    conns = getattr(_local, "conns", None)
+    if conns is None:
+        conns = _local.conns = {}
+    sig = (os.getpid(), str(DB_PATH))
+    conn = conns.get(sig)
+    if conn is None:
+        conn = conns[sig] = _connect(DB_PATH)
+    return conn
+
+
+# What a corrupt or unreadable value can raise: bad JSON / UTF-8, a bad
+# or truncated gzip stream, or a zstd frame with `zstandard` missing.
+_UNREADABLE = (ValueError, UnicodeDecodeError, OSError, EOFError)
+
+
+def _encode(payload: Any) -> bytes:
+    raw = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+    if len(raw) < COMPRESS_MIN_BYTES:
+        return raw
+    packed = compress_bytes(raw)
+    return packed if len(packed) < len(raw) else raw
+
+
+def _decode(blob: bytes) -> Any:
+    return loads(blob)
+
+
+def _count(namespace: str, slot: int) -> None:
+    global _unflushed
+    with _stats_lock:
+        _counters.setdefault(namespace, [0, 0, 0])[slot] += 1
+        _unflushed += 1
+        due = _unflushed >= FLUSH_EVERY
+    if due:
+        flush_stats()
+
+
+def _live_row(namespace: str, key: str) -> tuple[bytes, float] | None:
+    """(value as bytes, accessed_at) of an unexpired entry, or None."""
+    row = _conn().execute(
+        "SELECT value, expires_at, accessed_at FROM entries "
+        "WHERE namespace = ? AND key = ?",
+        (namespace, key),
+    ).fetchone()
+    if row is None or (row[1] is not None and row[1] <= time.time()):
+        return None
+    value = row[0]
+    # Stores written before the BLOB encoding hold plain JSON text.
+    return (value.encode("utf-8") if isinstance(value, str) else bytes(value)), row[2]
+
+
+def _touch(namespace: str, key: str, accessed_at: float) -> None:
+    """Refresh an entry's LRU stamp, at most once per ACCESS_RESOLUTION_SEC."""
+    now = time.time()
+    if now - accessed_at > ACCESS_RESOLUTION_SEC:
+        _conn().execute(
+            "UPDATE entries SET accessed_at = ? WHERE namespace = ? AND key = ?",
+            (now, namespace, key),
+        )
+
+
+def get(namespace: str, key: str) -> Any | None:
+    """Cached payload, or None on a miss, an expired entry or an unreadable
+    one. Refreshes the entry's LRU stamp (at most once per
+    ACCESS_RESOLUTION_SEC)."""
+    row = _live_row(namespace, key)
+    if row is None:
+        _count(namespace, 1)
+        return None
+    try:
+        payload = _decode(row[0])
+    except _UNREADABLE:
+        _count(namespace, 1)
+        return None
+    _touch(namespace, key, row[1])
+    _count(namespace, 0)
+    return payload
+
+
+def get_array(namespace: str, key: str) -> list | None:
+    """`get` for a list payload, decoded one element at a time via
+    `iter_json_array` so the inflated JSON text is never held whole next
+    to the elements. None on a miss, an expired entry, or a payload that
+    is unreadable (e.g. a truncated frame) or not an array. Refreshes the
+    LRU stamp like `get`."""
+    row = _live_row(namespace, key)
+    if row is None:
+        _count(namespace, 1)
+        return None
+    try:
+        items = list(iter_json_array(row[0]))
+    except _UNREADABLE:
+        _count(namespace, 1)
+        return None
+    _touch(namespace, key, row[1])
+    _count(namespace, 0)
+    return items
+
+
+def iter_array(namespace: str, key: str) -> Iterator[Any]:
+    """Stream the elements of a list payload without decoding it whole.
+    Yields nothing on a miss or an expired entry. An unreadable or
+    non-array payload raises (ValueError / EOFError / ...) part-way,
+    after earlier elements were yielded; callers that need all-or-nothing
+    use `get_array`. Counted as a hit/miss and refreshes the LRU stamp
+    like `get`."""
+    row = _live_row(namespace, key)
+    _count(namespace, 0 if row else 1)
+    if row is None:
+        return
+    _touch(namespace, key, row[1])
+    yield from iter_json_array(row[0])
+
+
+def contains(namespace: str, key: str) -> bool:
+    """True if a live (unexpired) entry exists. Not counted as a hit/miss."""
+    return _conn().execute(
+        "SELECT 1 FROM entries WHERE namespace = ? AND key = ? "
+        "AND (expires_at IS NULL OR expires_at > ?)",
+        (namespace, key, time.time()),
+    ).fetchone() is not None
+
+
+def put(
+    namespace: str,
+    key: str,
+    payload: Any,
+    *,
+    negative: bool = False,
+    variant: str | None = None,
+    pin: bool = False,
+) -> None:
+    """Store `payload` (any JSON-serializable value) under (namespace, key).
+    Last writer wins; the write is atomic across threads and processes.
+
+    `negative=True` marks a not-found / failed-fetch answer, which takes the
+    namespace's `.negative` TTL; `variant` names any other `<ns>.<variant>`
+    TTL (falling back to the namespace's). `pin=True` exempts the entry
+    from expiry and LRU eviction."""
+    put_many(namespace, [(key, payload)], negative=negative, variant=variant, pin=pin)
+
+
+_UPSERT = (
+    "INSERT INTO entries (namespace, key, value, updated_at, size, accessed_at, "
+    "expires_at, pinned) VALUES (?, ?, ?, ?, ?, ?, ?, ?) "
+    "ON CONFLICT (namespace, key) DO UPDATE SET "
+    "value = excluded.value, updated_at = excluded.updated_at, "
+    "size = excluded.size, accessed_at = excluded.accessed_at, "
+    "expires_at = excluded.expires_at, pinned = excluded.pinned"
+)
+
+
+def put_many(
+    namespace: str,
+    entries: Iterable[tuple[str, Any]],
+    *,
+    negative: bool = False,
+    variant: str | None = None,
+    pin: bool = False,
+) -> int:
+    """`put` for many (key, payload) pairs sharing one TTL class, in a
+    single transaction. Returns the number written."""
+    now = time.time()
+    ttl = None if pin else ttl_for(namespace, negative=negative, variant=variant)
+    expires = None if ttl is None else now + ttl
+    rows = []
+    for key, payload in entries:
+        blob = _encode(payload)
+        rows.append((namespace, key, blob, now, len(key) + len(blob), now, expires, int(pin)))
+    if not rows:
+        return 0
+    conn = _conn()
+    if len(rows) == 1:
+        conn.execute(_UPSERT, rows[0])
+    else:
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany(_UPSERT, rows)
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    for _ in rows:
+        _count(namespace, 2)
+    return len(rows)
+
+
+def rekey(namespace: str, mapping: dict[str, str]) -> int:
+    """Move entries from old to new keys ({old: new}) in one transaction,
+    keeping their expiry, pin and access stamps. Where the new key is
+    already taken the existing entry wins and the old one is dropped.
+    Returns the number of entries moved."""
+    pairs = [(new, namespace, old) for old, new in mapping.items() if old != new]
+    if not pairs:
+        return 0
+    conn = _conn()
+    moved = 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        for row in pairs:
+            moved += conn.execute(
+                "UPDATE OR IGNORE entries SET key = ? WHERE namespace = ? AND key = ?", row,
+            ).rowcount
+        conn.executemany("DELETE FROM entries WHERE namespace = ? AND key = ?",
+                         [(namespace, old) for _, _, old in pairs])
+        conn.execute("COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    return moved
+
+
+def delete(namespace: str, key: str) -> None:
+    _conn().execute(
+        "DELETE FROM entries WHERE namespace = ? AND key = ?", (namespace, key),
+    )
+
+
+def clear(namespace: str) -> int:
+    """Drop every entry in a namespace. Returns the number removed."""
+    return _conn().execute(
+        "DELETE FROM entries WHERE namespace = ?", (namespace,),
+    ).rowcount
+
+
+def items(namespace: str) -> Iterator[tuple[str, Any]]:
+    """Yield (key, payload) for every live, readable entry, in key order."""
+    cur = _conn().execute(
+        "SELECT key, value FROM entries WHERE namespace = ? "
+        "AND (expires_at IS NULL OR expires_at > ?) ORDER BY key",
+        (namespace, time.time()),
+    )
+    for key, blob in cur:
+        try:
+            yield key, _decode(blob)
+        except _UNREADABLE:
+            continue
+
+
+def values(namespace: str) -> Iterator[Any]:
+    for _, payload in items(namespace):
+        yield payload
+
+
+def counts() -> dict[str, int]:
+    """{namespace: entry count} for every non-empty namespace."""
+    return dict(_conn().execute(
+        "SELECT namespace, COUNT(*) FROM entries GROUP BY namespace ORDER BY namespace"
+    ).fetchall())
+
+
+# ---------------------------------------------------------------------------
+# Statistics and garbage collection
+# ---------------------------------------------------------------------------
+
+
+def flush_stats() -> dict[str, dict[str, int]]:
+    """Add this process's unflushed hit/miss/write counts to `ns_stats` and
+    reset them. Returns what was flushed: {ns: {"hits", "misses", "writes"}}."""
+    global _unflushed
+    with _stats_lock:
+        pending = {ns: list(c) for ns, c in _counters.items() if any(c)}
+        _counters.clear()
+        _unflushed = 0
+    if pending:
+        _conn().executemany(
+            "INSERT INTO ns_stats (namespace, hits, misses, writes) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT (namespace) DO UPDATE SET hits = hits + excluded.hits, "
+            "misses = misses + excluded.misses, writes = writes + excluded.writes",
+            [(ns, h, m, w) for ns, (h, m, w) in sorted(pending.items())],
+        )
+    return {ns: {"hits": h, "misses": m, "writes": w}
+            for ns, (h, m, w) in sorted(pending.items())}
+
+
+def _flush_at_exit() -> None:
+    try:
+        flush_stats()
+    except sqlite3.Error:
+        pass
+
+
+atexit.register(_flush_at_exit)
+
+
+def stats() -> dict[str, dict[str, Any]]:
+    """Per-namespace {entries, bytes, pinned, expired, hits, misses, writes,
+    evicted, gc_expired}. Includes this process's unflushed counts."""
+    conn = _conn()
+    now = time.time()
+    out: dict[str, dict[str, Any]] = {}
+    for ns, n, size, pinned, expired in conn.execute(
+        "SELECT namespace, COUNT(*), SUM(size), SUM(pinned), "
+        "SUM(expires_at IS NOT NULL AND expires_at <= ?) "
+        "FROM entries GROUP BY namespace", (now,),
+    ):
+        out[ns] = {"entries": n, "bytes": size or 0, "pinned": pinned or 0,
+                   "expired": expired or 0}
+    blank = {"entries": 0, "bytes": 0, "pinned": 0, "expired": 0}
+    for ns, hits, misses, writes, gc_expired, evicted in conn.execute(
+        "SELECT namespace, hits, misses, writes, expired, evicted FROM ns_stats"
+    ):
+        out.setdefault(ns, dict(blank)).update(
+            hits=hits, misses=misses, writes=writes, gc_expired=gc_expired,
+            evicted=evicted)
+    with _stats_lock:
+        for ns, (h, m, w) in _counters.items():
+            row = out.setdefault(ns, dict(blank))
+            row["hits"] = row.get("hits", 0) + h
+            row["misses"] = row.get("misses", 0) + m
+            row["writes"] = row.get("writes", 0) + w
+    for row in out.values():
+        for k in ("hits", "misses", "writes", "gc_expired", "evicted"):
+            row.setdefault(k, 0)
+    return dict(sorted(out.items()))
+
+
+def merge_stats(rows: Iterable[dict[str, dict[str, int]]]) -> dict[str, dict[str, int]]:
+    """Sum several `flush_stats()` results (e.g. one per subject)."""
+    out: dict[str, dict[str, int]] = {}
+    for row in rows:
+        for ns, c in (row or {}).items():
+            acc = out.setdefault(ns, {"hits": 0, "misses": 0, "writes": 0})
+            for k in acc:
+                acc[k] += c.get(k, 0)
+    return dict(sorted(out.items()))
+
+
+def format_stats(s: dict[str, dict[str, int]]) -> str:
+    """One-line summary of `flush_stats()`-shaped counts, for CLI footers:
+    `cache: 812 hit · 95 miss (90% hit) · 95 written`."""
+    hits = sum(r.get("hits", 0) for r in s.values())
+    misses = sum(r.get("misses", 0) for r in s.values())
+    writes = sum(r.get("writes", 0) for r in s.values())
+    rate = f" ({100 * hits / (hits + misses):.0f}% hit)" if hits + misses else ""
+    return f"cache: {hits} hit · {misses} miss{rate} · {writes} written"
+
+
+def gc(
+    *,
+    max_bytes: int | None = None,
+    compact: bool = False,
+    dry_run: bool = False,
+) -> dict[str, Any]:
+    """Expire, then evict least-recently-read unpinned entries outside
+    NO_EVICT until the store's entry bytes fit `max_bytes` (default
+    MAX_BYTES; NO_EVICT and pinned bytes may keep it above).
+
+    Returns {"expired": {ns: n}, "evicted": {ns: n}, "freed_bytes",
+    "bytes_before", "bytes_after", "recompressed"}. `compact=True` also
+    compresses large entries written before compression existed, then
+    VACUUMs so the file actually shrinks; otherwise freed pages are reused
+    by later writes.
+    """
+    budget = MAX_BYTES if max_bytes is None else max_bytes
+    conn = _conn()
+    now = time.time()
+    expired: dict[str, int] = {}
+    evicted: dict[str, int] = {}
+    freed = 0
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        total = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        doomed: list[tuple[str, str]] = []
+        for ns, key, size in conn.execute(
+            "SELECT namespace, key, size FROM entries "
+            "WHERE expires_at IS NOT NULL AND expires_at <= ? AND pinned = 0", (now,),
+        ).fetchall():
+            doomed.append((ns, key))
+            expired[ns] = expired.get(ns, 0) + 1
+            freed += size
+        if total - freed > budget:
+            keep = sorted(NO_EVICT)
+            cur = conn.execute(
+                "SELECT namespace, key, size FROM entries "
+                "WHERE pinned = 0 AND (expires_at IS NULL OR expires_at > ?) "
+                f"AND namespace NOT IN ({','.join('?' * len(keep))}) "
+                "ORDER BY accessed_at", (now, *keep),
+            )
+            for ns, key, size in cur:
+                if total - freed <= budget:
+                    break
+                doomed.append((ns, key))
+                evicted[ns] = evicted.get(ns, 0) + 1
+                freed += size
+            cur.close()  # an open statement would block the checkpoint below
+        if not dry_run:
+            conn.executemany(
+                "DELETE FROM entries WHERE namespace = ? AND key = ?", doomed,
+            )
+            conn.executemany(
+                "INSERT INTO ns_stats (namespace, expired, evicted) VALUES (?, ?, ?) "
+                "ON CONFLICT (namespace) DO UPDATE SET "
+                "expired = expired + excluded.expired, evicted = evicted + excluded.evicted",
+                [(ns, expired.get(ns, 0), evicted.get(ns, 0))
+                 for ns in sorted(set(expired) | set(evicted))],
+            )
+        conn.execute("ROLLBACK" if dry_run else "COMMIT")
+    except BaseException:
+        conn.execute("ROLLBACK")
+        raise
+    recompressed = 0
+    if not dry_run:
+        if compact:
+            recompressed, saved = _recompress(conn)
+            freed += saved
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+        if compact:
+            conn.execute("VACUUM")
+    return {
+        "recompressed": recompressed,
+        "expired": expired,
+        "evicted": evicted,
+        "freed_bytes": freed,
+        "bytes_before": total,
+        "bytes_after": total - freed,
+    }
+
+
+@contextlib.contextmanager
+def use(path: Path) -> Iterator[Path]:
+    """Point the store at another database for the duration of the block.
+    Self-tests use this to run against a temp DB. Pending hit/miss counts
+    are flushed at both edges so each lands in the database it belongs to."""
+    global DB_PATH
+    flush_stats()
+    saved = DB_PATH
+    DB_PATH = Path(path)
+    try:
+        yield DB_PATH
+    finally:
+        flush_stats()
+        DB_PATH = saved
+
+
+# ---------------------------------------------------------------------------
+# Migration to / from the per-file layout
+# ---------------------------------------------------------------------------
+
+
+def _recompress(conn: sqlite3.Connection) -> tuple[int, int]:
+    """Re-encode plain values of COMPRESS_MIN_BYTES or more. Returns
+    (entries rewritten, bytes saved). One entry per transaction, so
+    workers aren't locked out for the whole pass."""
+    todo = conn.execute(
+        "SELECT namespace, key FROM entries WHERE length(value) >= ?",
+        (COMPRESS_MIN_BYTES,),
+    ).fetchall()
+    n = saved = 0
+    for ns, key in todo:
+        row = conn.execute(
+            "SELECT value FROM entries WHERE namespace = ? AND key = ?", (ns, key),
+        ).fetchone()
+        if row is None or is_compressed(row[0]):
+            continue
+        try:
+            blob = _encode(_decode(row[0]))
+        except _UNREADABLE:
+            continue
+        if len(blob) >= len(row[0]):
+            continue
+        conn.execute(
+            "UPDATE entries SET value = ?, size = ? WHERE namespace = ? AND key = ? "
+            "AND value = ?",
+            (blob, len(key) + len(blob), ns, key, row[0]),
+        )
+        n += 1
+        saved += len(row[0]) - len(blob)
+    return n, saved
+
+
+def import_files(
+    namespaces: Iterable[str] = NAMESPACES,
+    *,
+    root: Path = CACHE_ROOT,
+    overwrite: bool = False,
+) -> dict[str, dict[str, int]]:
+    """Load `<root>/<ns>/<key>.json` files into the store.
+
+    Returns {ns: {"imported", "skipped", "unreadable"}}. Entries already in
+    the store are kept unless `overwrite=True`; the file mtime becomes the
+    entry's `updated_at`. Imported entries are pinned: the old files never
+    expired, don't record whether an answer was negative or authoritative,
+    and may be the only copy of a paid or no-longer-served answer, so an
+    mtime-based TTL would drop them on the first gc. A refreshing `put`
+    replaces them with an ordinary entry. Files are left in place — delete
+    them once the import has been checked.
+    """
+    verb = "INSERT OR REPLACE" if overwrite else "INSERT OR IGNORE"
+    sql = (f"{verb} INTO entries (namespace, key, value, updated_at, size, "
+           "accessed_at, expires_at, pinned) VALUES (?, ?, ?, ?, ?, ?, NULL, 1)")
+    conn = _conn()
+    out: dict[str, dict[str, int]] = {}
+    for ns in namespaces:
+        d = root / ns
+        row = out[ns] = {"imported": 0, "skipped": 0, "unreadable": 0}
+        if not d.is_dir():
+            continue
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            for fp in sorted(d.glob("*.json")):
+                try:
+                    payload = read_json(fp)
+                    mtime = fp.stat().st_mtime
+                except _UNREADABLE:
+                    row["unreadable"] += 1
+                    continue
+                blob = _encode(payload)
+                cur = conn.execute(sql, (
+                    ns, fp.stem, blob, mtime, len(fp.stem) + len(blob), mtime,
+                ))
+                row["imported" if cur.rowcount else "skipped"] += 1
+            conn.execute("COMMIT")
+        except BaseException:
+            conn.execute("ROLLBACK")
+            raise
+    return out
+
+
+def export_files(
+    namespaces: Iterable[str] = NAMESPACES,
+    *,
+    root: Path = CACHE_ROOT,
+    compress: bool = False,
+) -> dict[str, int]:
+    """Write store entries out as `<root>/<ns>/<key>.json` (indent=2, or
+    compressed frames with `compress=True`; `import` reads either).
+    Returns {ns: files written}."""
+    out: dict[str, int] = {}
+    conn = _conn()
+    for ns in namespaces:
+        n = 0
+        cur = conn.execute(
+            "SELECT key, value, updated_at FROM entries WHERE namespace = ? ORDER BY key",
+            (ns,),
+        )
+        for key, blob, updated_at in cur:
+            try:
+                payload = _decode(blob)
+            except _UNREADABLE:
+                continue
+            fp = root / ns / f"{key}.json"
+            atomic_write_json(fp, payload, compress=compress)
+            os.utime(fp, (updated_at, updated_at))
+            n += 1
+        out[ns] = n
+    return out
+
+
+def _selftest() -> None:
+    import tempfile
+
+    with tempfile.TemporaryDirectory() as tmp, use(Path(tmp) / "t.sqlite3"):
+        src = Path(tmp) / "files"
+        atomic_write_json(src / "search" / "abc.json", {"query": "q", "results": []})
+        (src / "search" / "bad.json").write_text("{not json")
+        (src / "fec").mkdir()
+        res = import_files(["search", "fec"], root=src)
+        assert res["search"] == {"imported": 1, "skipped": 0, "unreadable": 1}, res
+        assert get("search", "abc") == {"query": "q", "results": []}
+        assert import_files(["search"], root=src)["search"]["skipped"] == 1
+        assert _conn().execute(
+            "SELECT pinned, expires_at FROM entries WHERE key = 'abc'").fetchone() == (1, None)
+
+        put("search", "abc", {"query": "q", "results": [1]})
+        put("prices", "META_2024-01-02", {"close": None})
+        assert get("prices", "META_2024-01-02") == {"close": None}
+        assert contains("prices", "META_2024-01-02") and get("prices", "x") is None
+        assert counts() == {"prices": 1, "search": 1}, counts()
+
+        # Threads each open their own connection onto the same file.
+        def _w(i: int) -> None:
+            for j in range(20):
+                put("extract", f"k{i}_{j}", {"i": i, "j": j})
+        ts = [threading.Thread(target=_w, args=(i,)) for i in range(4)]
+        for t in ts:
+            t.start()
+        for t in ts:
+            t.join()
+        assert counts()["extract"] == 80
+
+        dst = Path(tmp) / "out"
+        assert export_files(["search"], root=dst) == {"search": 1}
+        assert json.loads((dst / "search" / "abc.json").read_text())["results"] == [1]
+        assert clear("extract") == 80 and "extract" not in counts()
+
+        # TTLs: negative answers expire on their own clock; pins never do.
+        with _ttls({"wayback.negative": 0.0, "wayback": None}):
+            put("wayback", "neg", {"wayback_url": None}, negative=True)
+            put("wayback", "pos", {"wayback_url": "https://web.archive.org/x"})
+        assert get("wayback", "neg") is None and not contains("wayback", "neg")
+        assert get("wayback", "pos") is not None
+        assert [k for k, _ in items("wayback")] == ["pos"]
+        with _ttls({"dafs": 0.0}):
+            put("dafs", "pinned", [1], pin=True)
+        assert get("dafs", "pinned") == [1]
+        with _ttls({"liveness.unreachable": 0.0}):
+            put("liveness", "timeout", {"status": "TIMEOUT"}, variant="unreachable")
+            put("liveness", "ok", {"status": 200})
+        assert get("liveness", "timeout") is None and get("liveness", "ok") is not None
+        clear("liveness")
+        assert put_many("liveness", [(f"k{i}", {"i": i}) for i in range(50)]) == 50
+        assert get("liveness", "k49") == {"i": 49} and put_many("liveness", []) == 0
+        assert rekey("liveness", {"k1": "n1", "k2": "k3", "k4": "k4"}) == 1
+        assert get("liveness", "n1") == {"i": 1} and get("liveness", "k1") is None
+        assert get("liveness", "k3") == {"i": 3} and get("liveness", "k2") is None
+        clear("liveness")
+        assert parse_ttl_overrides("liveness.gone=1d, fec.negative=2h") == {
+            "liveness.gone": DAY, "fec.negative": 7200.0}
+        for bad in ("nope=1d", "liveness.gnoe=1d"):
+            try:
+                parse_ttl_overrides(bad)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError(bad)
+
+        # LRU: fill past a small budget; the least-recently-read unpinned
+        # entries go first, pinned and NO_EVICT ones survive.
+        put("extract", "paid", {"events": []})
+        for i in range(5):
+            put("dafs_downstream", f"s{i}", ["x" * 100])
+        conn = _conn()
+        conn.execute("UPDATE entries SET accessed_at = ? WHERE namespace IN "
+                     "('dafs_downstream', 'extract')", (time.time() - 10 * ACCESS_RESOLUTION_SEC,))
+        get("dafs_downstream", "s0")  # now the most recent
+        assert list(iter_array("dafs_downstream", "s1")) == ["x" * 100]  # streaming reads count too
+        size = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0]
+        plan = gc(max_bytes=size - 200, dry_run=True)
+        assert counts()["dafs_downstream"] == 5, "dry run must not delete"
+        res = gc(max_bytes=size - 200)
+        assert res["expired"] == {"wayback": 1}, res
+        assert res["evicted"] == plan["evicted"] and res["bytes_after"] <= size - 200, res
+        assert contains("dafs_downstream", "s0") and get("dafs", "pinned") == [1]
+        assert contains("dafs_downstream", "s1"), res
+        assert gc(max_bytes=0)["bytes_after"] == conn.execute(
+            "SELECT SUM(size) FROM entries WHERE pinned = 1 OR namespace = 'extract'").fetchone()[0]
+        assert get("extract", "paid") == {"events": []}
+
+        # Stats: counters flush into ns_stats and survive into stats().
+        flushed = flush_stats()
+        assert flushed["wayback"]["misses"] == 1 and flushed["wayback"]["hits"] == 1, flushed
+        st = stats()
+        assert st["dafs"]["pinned"] == 1 and st["wayback"]["gc_expired"] == 1, st
+        assert st["dafs_downstream"]["evicted"] >= 1, st
+        assert not flush_stats()
+
+    # A store written before the lifecycle columns existed upgrades in place.
+    with tempfile.TemporaryDirectory() as tmp:
+        p = Path(tmp) / "v0.sqlite3"
+        old = sqlite3.connect(str(p))
+        old.execute("CREATE TABLE entries (namespace TEXT NOT NULL, key TEXT NOT NULL, "
+                    "value BLOB NOT NULL, updated_at REAL NOT NULL, "
+                    "PRIMARY KEY (namespace, key)) WITHOUT ROWID")
+        old.execute("INSERT INTO entries VALUES ('sec', 'k', '[1]', 1.0)")
+        old.commit()
+        old.close()
+        with use(p):
+            assert get("sec", "k") == [1]
+            assert stats()["sec"]["bytes"] == len("k") + len("[1]")
+
+            # Large values are stored compressed; plain ones written before
+            # compression still read, stream, and get recompressed by gc.
+            rows = [{"recipient": f"Org {i}", "amount_usd": float(i)} for i in range(2000)]
+            put("dafs_downstream", "big", rows)
+            blob = _conn().execute(
+                "SELECT value FROM entries WHERE key = 'big'").fetchone()[0]
+            assert is_compressed(blob) and get("dafs_downstream", "big") == rows
+            assert list(iter_array("dafs_downstream", "big")) == rows
+            assert get_array("dafs_downstream", "big") == rows
+            assert get_array("dafs_downstream", "absent") is None
+            # A truncated frame or a non-array payload reads as a miss.
+            put("dafs_downstream", "obj", {"not": "a list"})
+            _conn().execute("UPDATE entries SET value = substr(value, 1, length(value) / 2) "
+                            "WHERE key = 'big'")
+            assert get_array("dafs_downstream", "big") is None
+            assert get_array("dafs_downstream", "obj") is None
+            assert list(iter_array("dafs_downstream", "absent")) == []
+            raw = json.dumps(rows).encode()
+            _conn().execute("INSERT INTO entries (namespace, key, value, updated_at, size) "
+                            "VALUES ('search', 'old', ?, 1.0, ?)", (raw, 3 + len(raw)))
+            assert get("search", "old") == rows
+            res = gc(compact=True)
+            assert res["recompressed"] == 1 and res["freed_bytes"] > len(raw) // 2, res
+            assert get("search", "old") == rows
+
+            export_files(["search"], root=Path(tmp) / "z", compress=True)
+            assert is_compressed((Path(tmp) / "z" / "search" / "old.json").read_bytes())
+            clear("search")
+            assert import_files(["search"], root=Path(tmp) / "z")["search"]["imported"] == 1
+            assert get("search", "old") == rows
+    print("[ok] cache store: get/put, threads, import/export, TTL, pins, LRU gc, "
+          "stats, compression")
+
+
+@contextlib.contextmanager
+def _ttls(overrides: dict[str, float | None]) -> Iterator[None]:
+    saved = dict(TTLS)
+    TTLS.update(overrides)
+    try:
+        yield
+    finally:
+        TTLS.clear()
+        TTLS.update(saved)
+
+
+def _fmt_bytes(n: float) -> str:
+    for unit in ("B", "K", "M", "G"):
+        if n < 1024:
+            return f"{n:.0f}{unit}" if unit == "B" else f"{n:.1f}{unit}"
+        n /= 1024
+    return f"{n:.1f}T"
+
+
+def main(argv: list[str] | None = None) -> int:
+    ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = ap.add_subparsers(dest="cmd", required=True)
+    for name in ("import", "export"):
+        sp = sub.add_parser(name)
+        sp.add_argument("namespaces", nargs="*", metavar="NS",
+                        help=f"default: all ({', '.join(NAMESPACES)})")
+        sp.add_argument("--root", type=Path, default=CACHE_ROOT,
+                        help="per-file cache root (default: regen_v3/cache)")
+        if name == "import":
+            sp.add_argument("--overwrite", action="store_true",
+                            help="replace entries already in the store")
+        else:
+            sp.add_argument("--compress", action="store_true",
+                            help="write compressed frames instead of indented JSON")
+    sub.add_parser("stats", help="per-namespace entries, bytes and hit rate")
+    sp = sub.add_parser("gc", help="drop expired entries and evict to the disk budget")
+    sp.add_argument("--max-bytes", type=parse_size, default=None,
+                    help=f"budget, e.g. 5G (default: REGEN_CACHE_MAX_BYTES "
+                         f"or {_fmt_bytes(DEFAULT_MAX_BYTES)})")
+    sp.add_argument("--compact", action="store_true",
+                    help="compress older plain entries and VACUUM so the file "
+                         "shrinks on disk")
+    sp.add_argument("--dry-run", action="store_true",
+                    help="report what would be removed without removing it")
+    sub.add_parser("selftest")
+    args = ap.parse_args(argv)
+
+    if args.cmd == "selftest":
+        _selftest()
+        return 0
+    if args.cmd == "stats":
+        st = stats()
+        print(f"[cache] {DB_PATH}")
+        print(f"  {'namespace':<20} {'entries':>8} {'size':>8} {'pinned':>7} "
+              f"{'expired':>7} {'hits':>8} {'misses':>8} {'hit%':>5} {'evicted':>8}")
+        for ns, r in st.items():
+            lookups = r["hits"] + r["misses"]
+            rate = f"{100 * r['hits'] / lookups:.0f}" if lookups else "-"
+            print(f"  {ns:<20} {r['entries']:>8} {_fmt_bytes(r['bytes']):>8} "
+                  f"{r['pinned']:>7} {r['expired']:>7} {r['hits']:>8} "
+                  f"{r['misses']:>8} {rate:>5} {r['evicted']:>8}")
+        total = sum(r["bytes"] for r in st.values())
+        print(f"  total {_fmt_bytes(total)} of {_fmt_bytes(MAX_BYTES)} budget")
+        return 0
+    if args.cmd == "gc":
+        res = gc(max_bytes=args.max_bytes, compact=args.compact, dry_run=args.dry_run)
+        verb = "would free" if args.dry_run else "freed"
+        for ns in sorted(set(res["expired"]) | set(res["evicted"])):
+            print(f"  {ns:<20} {res['expired'].get(ns, 0):>7} expired  "
+                  f"{res['evicted'].get(ns, 0):>7} evicted")
+        if res["recompressed"]:
+            print(f"  recompressed {res['recompressed']} entries")
+        print(f"[cache gc] {verb} {_fmt_bytes(res['freed_bytes'])}: "
+              f"{_fmt_bytes(res['bytes_before'])} -> {_fmt_bytes(res['bytes_after'])}")
+        return 0
+
+    unknown = [ns for ns in args.namespaces if ns not in NAMESPACES]
+    if unknown:
+        ap.error(f"unknown namespace(s): {', '.join(unknown)}")
+    namespaces = args.namespaces or list(NAMESPACES)
+    if args.cmd == "import":
+        res = import_files(namespaces, root=args.root, overwrite=args.overwrite)
+        for ns, row in res.items():
+            if any(row.values()):
+                print(f"  {ns:<20} {row['imported']:>7} imported  "
+                      f"{row['skipped']:>7} kept  {row['unreadable']:>5} unreadable")
+    else:
+        for ns, n in export_files(namespaces, root=args.root,
+                                  compress=args.compress).items():
+            if n:
+                print(f"  {ns:<20} {n:>7} written")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
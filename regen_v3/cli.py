@@ -13,6 +13,7 @@ Usage:
 from __future__ import annotations
 
 import argparse
+import concurrent.futures as cf
 import hashlib
 import json
 import os
@@ -33,6 +34,10 @@ CANDIDATES_DIR.mkdir(parents=True, exist_ok=True)
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from regen_v3 import _http
+from regen_v3 import _neardup
+from regen_v3 import _ratelimit
+from regen_v3 import cache
 from regen_v3 import queries as queries_mod
 from regen_v3 import queries_llm as queries_llm_mod
 from regen_v3 import search as search_mod
@@ -112,6 +117,334 @@ def _short(url: str, n: int = 70) -> str:
     return url if len(url) <= n else url[: n - 1] + "…"
 
 
+# Structured-API sources, in the fixed order their candidates are merged.
+# Each one is network-bound on a different upstream (ProPublica, SEC EDGAR,
+# FEC, ICIJ bulk CSVs, state registries), so they run concurrently; the
+# merge order below is what keeps the candidates dump byte-identical.
+STRUCTURED_SOURCES = (
+    ("propublica", propublica_mod),
+    ("dafs", dafs_mod),
+    ("dafs_downstream", dafs_downstream_mod),
+    ("sec", sec_mod),
+    ("fec", fec_mod),
+    ("leaks", leaks_mod),
+    ("llcs", llcs_mod),
+    ("state_charities", state_charities_mod),
+)
+# Bounded executor + per-source wall-clock budget. A source that overruns
+# its budget is reported as skipped (same as a source that raises) and its
+# worker thread is abandoned; late results are discarded.
+STRUCTURED_WORKERS = int(os.environ.get("REGEN_STRUCTURED_WORKERS", "8"))
+STRUCTURED_TIMEOUT_SEC = float(os.environ.get("REGEN_STRUCTURED_TIMEOUT_SEC", "900"))
+
+
+def _timed_collect(
+    src_mod, record: dict, refresh: bool
+) -> tuple[list[dict], float, Exception | None]:
+    """Worker body: (candidates, elapsed_sec, error). Never raises."""
+    t0 = time.monotonic()
+    try:
+        cands = src_mod.collect_candidates(record, refresh=refresh)
+    except Exception as e:
+        return [], time.monotonic() - t0, e
+    return cands, time.monotonic() - t0, None
+
+
+def _collect_structured(
+    record: dict, *, refresh: bool, precomputed: dict[str, list[dict]] | None = None,
+) -> tuple[list[dict], dict[str, int], dict[str, float]]:
+    """Run every STRUCTURED_SOURCES `collect_candidates()` concurrently.
+
+    Returns (candidates, breakdown, latency_sec). Candidates are concatenated
+    in STRUCTURED_SOURCES order regardless of completion order. Each source
+    has its own error boundary: an exception or a timeout yields zero
+    candidates for that source and a `[<src>-skip]` line, never a failed
+    subject. Latency is wall time per source (time-to-timeout for overruns).
+    Sources in `precomputed` (batch_runner's cohort-wide dafs_downstream
+    pass) aren't run; their given candidates are used, at 0s latency.
+    """
+    t_start = time.monotonic()
+    results: dict[str, list[dict]] = dict(precomputed or {})
+    latency: dict[str, float] = {src_name: 0.0 for src_name in results}
+    ex = cf.ThreadPoolExecutor(
+        max_workers=max(1, min(STRUCTURED_WORKERS, len(STRUCTURED_SOURCES))),
+        thread_name_prefix="structured",
+    )
+    try:
+        futs = {
+            src_name: ex.submit(_timed_collect, src_mod, record, refresh)
+            for src_name, src_mod in STRUCTURED_SOURCES if src_name not in results
+        }
+        deadline = t_start + STRUCTURED_TIMEOUT_SEC
+        for src_name, fut in futs.items():
+            try:
+                cands, elapsed, err = fut.result(
+                    timeout=max(0.0, deadline - time.monotonic())
+                )
+            except cf.TimeoutError:
+                fut.cancel()
+                cands, elapsed = [], time.monotonic() - t_start
+                err = TimeoutError(f"exceeded {STRUCTURED_TIMEOUT_SEC:.0f}s budget")
+            if err is not None:
+                print(f"    [{src_name}-skip] {type(err).__name__}: {err}")
+                cands = []
+            results[src_name] = cands
+            latency[src_name] = round(elapsed, 2)
+    finally:
+        # Don't block the subject on an abandoned (timed-out) source thread.
+        ex.shutdown(wait=False, cancel_futures=True)
+
+    candidates: list[dict] = []
+    breakdown: dict[str, int] = {}
+    for src_name, _mod in STRUCTURED_SOURCES:
+        breakdown[src_name] = len(results[src_name])
+        candidates.extend(results[src_name])
+    latency = {src_name: latency[src_name] for src_name, _mod in STRUCTURED_SOURCES}
+    latency["_stage"] = round(time.monotonic() - t_start, 2)
+    return candidates, breakdown, latency
+
+
+def build_plan(record: dict, *, refresh: bool) -> list[dict]:
+    """Query plan for one subject: deterministic template baseline plus
+    LLM-generated enrichment, deduped by (role, query). Baseline wins on ties."""
+    plan_baseline = queries_mod.build_query_plan(record)
+    try:
+        plan_llm = queries_llm_mod.build_llm_query_plan(record, refresh=refresh)
+    except Exception as e:
+        print(f"    [queries_llm-skip] {type(e).__name__}: {e}")
+        plan_llm = []
+    seen = {(q["role"], q["query"]) for q in plan_baseline}
+    plan = list(plan_baseline) + [q for q in plan_llm if (q["role"], q["query"]) not in seen]
+    print(f"  queries: {len(plan)}  ({len(plan_baseline)} baseline + {len(plan)-len(plan_baseline)} LLM)")
+    return plan
+
+
+# Streaming search → verify → extract stage sizes. Verify is HEAD/GET
+# liveness on verify.Verifier's asyncio prober (sized by
+# REGEN_LIVENESS_CONCURRENCY / REGEN_LIVENESS_PER_HOST); extract is one
+# Haiku round trip per URL. Extract threads only bound per-subject fan-out:
+# the number of requests actually in flight is capped globally by
+# extract.MAX_EXTRACT_INFLIGHT (shared across batch_runner workers).
+EXTRACT_WORKERS = int(os.environ.get("REGEN_EXTRACT_WORKERS", "8"))
+# Extract once per cluster of near-duplicate snippets (syndicated wire
+# copies) and fan the events out to the other members. See _neardup.
+NEARDUP = os.environ.get("REGEN_NEARDUP", "1") != "0"
+
+
+def _extract_one(url: str, meta: dict, subject_name: str, refresh: bool):
+    """Extract-pool body: (events, error). Only the RuntimeError family
+    (missing key, cap exhausted upstream) is a per-URL skip; anything else
+    propagates and fails the subject, as the serial loop did."""
+    try:
+        events = extract_mod.extract_events(
+            url=url,
+            title=meta["title"],
+            snippet=meta["snippet"],
+            role_hint=meta["role_hint"],
+            subject_name=subject_name,
+            refresh=refresh,
+        )
+    except RuntimeError as e:
+        return [], e
+    return events, None
+
+
+def _extract_chunk(urls: list[str], seen_urls: dict[str, dict], subject_name: str,
+                   refresh: bool) -> dict[str, tuple[list[dict], Exception | None]]:
+    """Batched-mode extract-pool body: one extract_events_batch() call for a
+    chunk of alive URLs. Same (events, error) contract as _extract_one."""
+    items = [
+        {
+            "url": seen_urls[u]["url"],
+            "title": seen_urls[u]["title"],
+            "snippet": seen_urls[u]["snippet"],
+            "role_hint": seen_urls[u]["role_hint"],
+        }
+        for u in urls
+    ]
+    try:
+        per_item = extract_mod.extract_events_batch(
+            items, subject_name=subject_name, refresh=refresh,
+            batch_size=len(items),
+        )
+    except RuntimeError as e:
+        return {u: ([], e) for u in urls}
+    return {u: (evs, None) for u, evs in zip(urls, per_item)}
+
+
+def _stream_search_verify_extract(
+    plan: list[dict],
+    *,
+    subject_name: str,
+    refresh: bool,
+    verbose: bool,
+    extract: bool = True,
+) -> dict:
+    """Run search in plan order, piping each new URL through verify and, if
+    alive, extract as soon as it is seen. `extract=False` stops after
+    verify (used by regen_v3.batch_extract to enumerate extraction inputs).
+
+    Returns {"seen_urls", "liveness", "extracted", "cache_hits",
+    "live_calls", "neardup", "dup_of", "fan_from"} where `extracted` maps
+    each alive URL to (events, error), `neardup` is the cluster summary
+    below, `dup_of` maps each clustered URL to its cluster's first-seen
+    URL and `fan_from` each alive member to the alive member it takes its
+    events from. Clusters are built with `extract=False` too, so
+    batch_extract submits one request per cluster.
+    All maps are keyed by canonical URL (search's `canonical_url`), so the
+    www / mobile / AMP / utm spellings of one page are verified and
+    extracted once; `seen_urls[key]["url"]` is the spelling first seen,
+    which is what gets fetched and cited. Callers iterate in sorted order.
+
+    Batched mode (extract.EXTRACT_BATCH_SIZE > 1) gives up the verify →
+    extract overlap: batch composition changes what the model sees, so alive
+    URLs are chunked in sorted order once verification is done, keeping the
+    same inputs in the same batches on every run.
+
+    Near-duplicates (NEARDUP): as URLs are seen, each snippet is clustered
+    with earlier ones from the same role's queries (`_neardup.Index`). Only
+    the first-seen URL of a cluster is extracted as it streams; once
+    verification is done, each cluster's first alive member is the
+    extraction source (extracted now if that wasn't the first-seen URL)
+    and its events are fanned out to the other alive members with
+    `extract.fan_out_events`. Clusters depend only on search order, never
+    on completion order.
+    """
+    batch_size = extract_mod.EXTRACT_BATCH_SIZE
+    seen_urls: dict[str, dict] = {}  # canonical -> {url, role_hint, query, title, snippet}
+    cache_hits = 0
+    live_calls = 0
+    verifier = verify_mod.Verifier()
+    extract_pool = cf.ThreadPoolExecutor(
+        max_workers=max(1, EXTRACT_WORKERS), thread_name_prefix="extract"
+    )
+
+    indexes: dict[str, _neardup.Index] = {}  # role_hint -> index
+    dup_of: dict[str, str] = {}  # canonical -> first-seen URL of its cluster
+    # Filled from the verifier's loop thread as probes come back alive;
+    # read only after verifier.results() has waited for every probe.
+    extract_futs: dict[str, cf.Future] = {}
+
+    def _extract_on_alive(key: str):
+        def _start(_url: str) -> None:
+            meta = seen_urls[key]
+            extract_futs[key] = extract_pool.submit(
+                _extract_one, meta["url"], meta, subject_name, refresh)
+        return _start
+
+    try:
+        for spec in plan:
+            q = spec["query"]
+            was_cached = (not refresh
+                          and cache.contains(search_mod.CACHE_NS, search_mod._cache_key(q)))
+            try:
+                sr = search_mod.search(q, count=10, refresh=refresh)
+            except (RuntimeError, Exception) as e:
+                # Includes Brave RuntimeErrors and any unexpected requests errors
+                # from the live path. Skip the query, keep the subject going.
+                print(f"    [skip] {q!r}: {type(e).__name__}: {e}")
+                continue
+            if was_cached:
+                cache_hits += 1
+            else:
+                live_calls += 1
+            kept, dropped = search_mod.filter_results(sr.get("results") or [])
+            if verbose:
+                print(f"    [{spec['role']:<18}] {q[:60]:<60}  kept={len(kept)} dropped={len(dropped)}")
+            for r in kept:
+                url = r.get("url")
+                key = r.get("canonical_url") or url
+                if not url or key in seen_urls:
+                    continue
+                meta = {
+                    "url": url,
+                    "role_hint": spec["role"],
+                    "query": q,
+                    "title": r.get("title", ""),
+                    "snippet": r.get("description", ""),
+                }
+                seen_urls[key] = meta
+                if NEARDUP:
+                    index = indexes.setdefault(spec["role"], _neardup.Index())
+                    rep = index.cluster(key, meta["snippet"])
+                    if rep != key:
+                        dup_of[key] = rep
+                streams = extract and batch_size <= 1 and key not in dup_of
+                verifier.submit(url, on_alive=_extract_on_alive(key) if streams else None)
+
+        by_url = verifier.results()
+        liveness: dict[str, dict] = {key: by_url[seen_urls[key]["url"]]
+                                     for key in sorted(seen_urls)}
+
+        # Near-dup clusters: {first-seen: [members in seen order]}, then
+        # the alive members that take their events from a cluster-mate.
+        clusters: dict[str, list[str]] = {}
+        for key, rep in dup_of.items():
+            clusters.setdefault(rep, [rep]).append(key)
+        fan_from: dict[str, str] = {}
+        for members in clusters.values():
+            alive_members = [k for k in members if liveness[k]["alive"]]
+            for key in alive_members[1:]:
+                fan_from[key] = alive_members[0]
+        # A member counts only if it would have cost a call: not cached,
+        # and not one the giving-signal pre-filter would skip anyway.
+        calls_saved = 0
+        for key in fan_from:
+            m = seen_urls[key]
+            if (extract_mod.MIN_GIVING_SIGNAL > 0 and extract_mod.giving_signal(
+                    title=m["title"], snippet=m["snippet"], url=m["url"],
+            ) < extract_mod.MIN_GIVING_SIGNAL):
+                continue
+            if refresh or not cache.contains(extract_mod.CACHE_NS, extract_mod._cache_key(
+                    m["url"], m["snippet"], m["role_hint"], subject_name)):
+                calls_saved += 1
+
+        if not extract:
+            extracted = {}
+        elif batch_size > 1:
+            alive_sorted = [u for u in sorted(liveness)
+                            if liveness[u]["alive"] and u not in fan_from]
+            chunk_futs = [
+                extract_pool.submit(
+                    _extract_chunk, alive_sorted[i:i + batch_size], seen_urls,
+                    subject_name, refresh,
+                )
+                for i in range(0, len(alive_sorted), batch_size)
+            ]
+            extracted = {}
+            for fut in chunk_futs:
+                extracted.update(fut.result())
+        else:
+            # URLs alive only via Wayback weren't extracted while
+            # streaming, and a dead first-seen URL hands its cluster to a
+            # member that wasn't either.
+            late = {k for k in liveness if liveness[k]["alive"] and k not in dup_of}
+            for src in sorted((late | set(fan_from.values())) - set(extract_futs)):
+                extract_futs[src] = extract_pool.submit(
+                    _extract_one, seen_urls[src]["url"], seen_urls[src], subject_name, refresh)
+            extracted = {url: extract_futs[url].result() for url in sorted(extract_futs)}
+        for key in sorted(fan_from) if extract else ():
+            events, err = extracted[fan_from[key]]
+            meta = seen_urls[key]
+            extracted[key] = (extract_mod.fan_out_events(
+                events, url=meta["url"], title=meta["title"], snippet=meta["snippet"],
+            ), err)
+    finally:
+        verifier.close()
+        extract_pool.shutdown(wait=True, cancel_futures=True)
+
+    return {
+        "seen_urls": seen_urls,
+        "liveness": liveness,
+        "extracted": extracted,
+        "cache_hits": cache_hits,
+        "live_calls": live_calls,
+        "neardup": {**_neardup.cluster_stats(clusters), "calls_saved": calls_saved},
+        "dup_of": dup_of,
+        "fan_from": fan_from,
+    }
+
+
 def run_one(
     subject_id: str,
     *,
@@ -120,8 +453,11 @@ def run_one(
     dry_run: bool,
     verbose: bool,
     use_timestamp_run_id: bool = False,
+    precomputed: dict[str, list[dict]] | None = None,
 ) -> dict:
-    """Run the full pipeline for one subject. Returns a summary dict."""
+    """Run the full pipeline for one subject. Returns a summary dict.
+    `precomputed` maps structured-source names to candidates already
+    collected for this subject (see `_collect_structured`)."""
     fp, record = load_record(subject_id)
     subject_name = record.get("person", {}).get("name_display", subject_id)
     # Default: content-addressed run_id so same input ⇒ identical output.
@@ -129,111 +465,71 @@ def run_one(
     run_id = _now_iso() if use_timestamp_run_id else _content_run_id(record)
 
     print(f"\n=== {subject_name}  [{subject_id}] ===")
+    # Per-subject rate-limit wait and cache hit/miss accounting
+    # (batch_runner reuses workers).
+    _ratelimit.reset_wait_stats()
+    cache.flush_stats()
 
     # 0. Structured-API sources (ProPublica 990-PF, SEC Form 4, FEC).
     #    These run BEFORE the search/extract path because they are cheap,
     #    rate-limited, and authoritative. Their candidates feed into the
     #    same merge layer as the LLM-extracted candidates.
-    structured_candidates: list[dict] = []
-    structured_breakdown: dict[str, int] = {}
-    for src_name, src_mod in (
-        ("propublica", propublica_mod),
-        ("dafs", dafs_mod),
-        ("dafs_downstream", dafs_downstream_mod),
-        ("sec", sec_mod),
-        ("fec", fec_mod),
-        ("leaks", leaks_mod),
-        ("llcs", llcs_mod),
-        ("state_charities", state_charities_mod),
-    ):
-        try:
-            cands = src_mod.collect_candidates(record, refresh=refresh)
-        except Exception as e:
-            print(f"    [{src_name}-skip] {type(e).__name__}: {e}")
-            cands = []
-        structured_breakdown[src_name] = len(cands)
-        structured_candidates.extend(cands)
+    structured_candidates, structured_breakdown, structured_latency = (
+        _collect_structured(record, refresh=refresh, precomputed=precomputed)
+    )
     print(
         "  structured: "
         + ", ".join(f"{k}={v}" for k, v in structured_breakdown.items())
         + f" (total {len(structured_candidates)})"
     )
+    if verbose:
+        print(
+            "  structured latency: "
+            + ", ".join(f"{k}={v:.1f}s" for k, v in structured_latency.items())
+        )
 
     # 1. Plan queries — deterministic template baseline + LLM-generated
     #    enrichment, deduped by (role, query). Baseline wins on ties.
-    plan_baseline = queries_mod.build_query_plan(record)
-    try:
-        plan_llm = queries_llm_mod.build_llm_query_plan(record, refresh=refresh)
-    except Exception as e:
-        print(f"    [queries_llm-skip] {type(e).__name__}: {e}")
-        plan_llm = []
-    seen = {(q["role"], q["query"]) for q in plan_baseline}
-    plan = list(plan_baseline) + [q for q in plan_llm if (q["role"], q["query"]) not in seen]
-    print(f"  queries: {len(plan)}  ({len(plan_baseline)} baseline + {len(plan)-len(plan_baseline)} LLM)")
+    plan = build_plan(record, refresh=refresh)
+
+    # 2-4. Search → verify → extract, streamed. Search runs in plan order on
+    #      this thread (Brave is 1 req/s); each newly-seen URL is handed to
+    #      the verify pool immediately and, if alive, straight on to the
+    #      extract pool, so liveness checks and LLM calls overlap the search
+    #      phase instead of waiting for it. A URL's metadata is fixed by the
+    #      first query that surfaces it, exactly as in the old batch loop.
+    stream = _stream_search_verify_extract(
+        plan,
+        subject_name=subject_name,
+        refresh=refresh,
+        verbose=verbose,
+    )
+    seen_urls = stream["seen_urls"]
+    liveness = stream["liveness"]
+    print(
+        f"  search: {stream['cache_hits']} cache-hits, {stream['live_calls']} live; "
+        f"{len(seen_urls)} unique URLs after filter"
+    )
 
-    # 2. Search (cached)
-    seen_urls: dict[str, dict] = {}  # url -> {role, query, title, snippet}
-    cache_hits = 0
-    live_calls = 0
-    for spec in plan:
-        q = spec["query"]
-        cache_key_path = (
-            search_mod.CACHE_DIR
-            / f"{search_mod.hashlib.sha256(q.strip().lower().encode()).hexdigest()}.json"
-        )
-        was_cached = cache_key_path.exists() and not refresh
-        try:
-            sr = search_mod.search(q, count=10, refresh=refresh)
-        except (RuntimeError, Exception) as e:
-            # Includes Brave RuntimeErrors and any unexpected requests errors
-            # from the live path. Skip the query, keep the subject going.
-            print(f"    [skip] {q!r}: {type(e).__name__}: {e}")
-            continue
-        if was_cached:
-            cache_hits += 1
-        else:
-            live_calls += 1
-        kept, dropped = search_mod.filter_results(sr.get("results") or [])
-        if verbose:
-            print(f"    [{spec['role']:<18}] {q[:60]:<60}  kept={len(kept)} dropped={len(dropped)}")
-        for r in kept:
-            url = r.get("url")
-            if not url or url in seen_urls:
-                continue
-            seen_urls[url] = {
-                "role_hint": spec["role"],
-                "query": q,
-                "title": r.get("title", ""),
-                "snippet": r.get("description", ""),
-            }
-    print(f"  search: {cache_hits} cache-hits, {live_calls} live; {len(seen_urls)} unique URLs after filter")
-
-    # 3. Verify URL liveness
-    liveness = verify_mod.verify_urls(list(seen_urls.keys()))
     alive = {u for u, info in liveness.items() if info["alive"]}
     dead = {u for u in seen_urls if u not in alive}
     print(f"  verify: {len(alive)} alive, {len(dead)} dead")
+    if stream["neardup"]["clusters"]:
+        print(f"  {_neardup.format_stats(stream['neardup'])}")
 
-    # 4. Extract candidate events from live URLs
     #    Seed with the structured-API candidates so they flow through the
     #    same dump + merge + validate pipeline as the LLM-extracted ones.
+    #    Extraction results are gathered per URL and appended in sorted URL
+    #    order, so completion order never leaks into the candidates dump.
     candidates: list[dict] = list(structured_candidates)
     extract_errors = 0
     for url in sorted(alive):
         meta = seen_urls[url]
-        try:
-            events = extract_mod.extract_events(
-                url=url,
-                title=meta["title"],
-                snippet=meta["snippet"],
-                role_hint=meta["role_hint"],
-                subject_name=subject_name,
-                refresh=refresh,
-            )
-        except RuntimeError as e:
+        events, err = stream["extracted"][url]
+        if err is not None:
             extract_errors += 1
             if verbose:
-                print(f"    [extract-skip] {_short(url)}: {e}")
+                print(f"    [extract-skip] {_short(url)}: {err}")
             continue
         for ev in events:
             ev["regen_query"] = meta["query"]
@@ -252,7 +548,7 @@ def run_one(
                 "subject_name": subject_name,
                 "run_id": run_id,
                 "candidates": candidates,
-                "dead_urls": sorted(dead),
+                "dead_urls": sorted(seen_urls[u]["url"] for u in dead),
                 "queries_used": [s["query"] for s in plan],
                 "structured_breakdown": structured_breakdown,
             },
@@ -269,6 +565,10 @@ def run_one(
             "urls_found": len(seen_urls),
             "alive": len(alive),
             "candidates": len(candidates),
+            "neardup": stream["neardup"],
+            "structured_latency_sec": structured_latency,
+            "rate_limit_wait": _ratelimit.wait_stats(),
+            "cache": cache.flush_stats(),
             "merged": False,
         }
 
@@ -355,6 +655,10 @@ def run_one(
         "added_sources": diff["added_sources_all"],
         "validate_errors": len(errs),
         "validate_warnings": len(warns),
+        "neardup": stream["neardup"],
+        "structured_latency_sec": structured_latency,
+        "rate_limit_wait": _ratelimit.wait_stats(),
+        "cache": cache.flush_stats(),
         "merged": not dry_run and not errs,
     }
 
@@ -422,6 +726,8 @@ def main(argv: list[str] | None = None) -> int:
             f"{s.get('candidates', 0):>5} "
             f"{s.get('validate_errors', 0):>4}  {status}"
         )
+    print(f"  {_http.format_stats()}")
+    print(f"  {cache.format_stats(cache.merge_stats(s.get('cache') for s in summaries))}")
     any_errors = any(s.get("validate_errors", 0) for s in summaries)
     return 1 if any_errors else 0
 
@@ -8,20 +8,21 @@ observable event. We treat each foundation→DAF transfer as a *lower
 bound*: money was moved into the opaque channel, even though we can't
 see where it ultimately lands.
 
-Source: ProPublica Nonprofit Explorer renders the IRS 990-PF Part XV
-(Supplementary Information — Grants and Contributions Paid) as HTML
-text at:
+Source: ProPublica Nonprofit Explorer serves each filed 990-PF as the
+IRS e-file XML and renders Part XV (Supplementary Information — Grants
+and Contributions Paid) as HTML text at:
     https://projects.propublica.org/nonprofits/full_text/<object_id>/IRS990PF
 
 The summary 990 endpoint already wired into `regen_v3/propublica.py`
 does NOT expose Schedule I, so this module fetches the org's filing
-list page, extracts (fiscal_year, object_id) pairs, then pulls the
-full text per filing and parses recipient names + amounts.
+list page, extracts (fiscal_year, object_id) pairs, then streams each
+filing (XML, falling back to the HTML) through `_irs990` and parses
+recipient names + amounts in one pass.
 
-Cache:
-  regen_v3/cache/dafs/<ein-9digits>_org.json
+Cache (`dafs` namespace of regen_v3.cache):
+  <ein-9digits>_org
       list of {fiscal_year, object_id} for the EIN
-  regen_v3/cache/dafs/<ein-9digits>_<fiscal_year>.json
+  <ein-9digits>_<fiscal_year>
       list of {recipient, amount_usd, foundation_status, purpose}
       parsed from Schedule I for that filing
 
@@ -34,7 +35,6 @@ from __future__ import annotations
 import json
 import re
 import sys
-import time
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
@@ -43,13 +43,15 @@ import requests
 
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-CACHE_DIR = HERE / "cache" / "dafs"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "dafs"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 from categories.foundations import normalize_ein  # noqa: E402
+from regen_v3 import _http  # noqa: E402
+from regen_v3 import _irs990  # noqa: E402
+from regen_v3 import cache  # noqa: E402
 from regen_v3.propublica import _eins_for_subject  # noqa: E402
 
 # ---------------------------------------------------------------------------
@@ -159,50 +161,45 @@ _UA = (
     "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
 )
 _REQ_TIMEOUT = 30
-_REQ_PAUSE = 0.4  # courtesy delay between live ProPublica fetches
 
 
 def _ein_digits(ein: str) -> str:
     return normalize_ein(ein).replace("-", "")
 
 
-def _org_cache_path(ein: str) -> Path:
-    return CACHE_DIR / f"{_ein_digits(ein)}_org.json"
+def _org_cache_key(ein: str) -> str:
+    return f"{_ein_digits(ein)}_org"
 
 
-def _filing_cache_path(ein: str, fiscal_year: int) -> Path:
-    return CACHE_DIR / f"{_ein_digits(ein)}_{fiscal_year}.json"
+def _filing_cache_key(ein: str, fiscal_year: int) -> str:
+    return f"{_ein_digits(ein)}_{fiscal_year}"
 
 
-def _load_json(path: Path):
-    if not path.exists():
-        return None
-    try:
-        return json.loads(path.read_text())
-    except Exception:
-        return None
+def _load_json(key: str):
+    return cache.get(CACHE_NS, key)
+
 
+def _load_rows(key: str) -> list[dict] | None:
+    """A cached Schedule I grant list, decoded element by element so the
+    whole inflated JSON text is never held next to the rows. None on a
+    miss or an unreadable entry, which is then refetched."""
+    return cache.get_array(CACHE_NS, key)
 
-def _save_json(path: Path, data) -> None:
-    path.write_text(json.dumps(data, indent=2))
+
+def _save_json(key: str, data, *, negative: bool = False, pin: bool = False) -> None:
+    # `dafs` and `dafs_downstream` run concurrently inside cli.run_one and
+    # both go through `_discover_filings`, so two threads can land on the
+    # same <ein>_org entry. The store's upsert is atomic.
+    cache.put(CACHE_NS, key, data, negative=negative, pin=pin)
 
 
 def _http_get(url: str) -> str:
     """Fetch a URL with a browser UA. ProPublica's CDN serves a different
     response shape if the request looks bot-like, but the URL pattern we hit
-    is plain HTML with gzip; we deliberately omit `br` from Accept-Encoding
-    so we don't depend on the optional `brotli` module — `requests` already
-    handles gzip + deflate transparently."""
-    resp = requests.get(
-        url,
-        headers={
-            "User-Agent": _UA,
-            "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
-            "Accept-Encoding": "gzip, deflate",
-            "Accept-Language": "en-US,en;q=0.9",
-        },
-        timeout=_REQ_TIMEOUT,
-    )
+    is plain HTML with gzip. Goes through the shared keep-alive Session for
+    projects.propublica.org; its default headers are the browser set and
+    only advertise `br` when the optional `brotli` module is installed."""
+    resp = _http.get(url, headers={"User-Agent": _UA}, timeout=_REQ_TIMEOUT)
     resp.raise_for_status()
     return resp.text
 
@@ -225,9 +222,9 @@ def _discover_filings(ein: str, *, refresh: bool = False) -> list[dict]:
     Scrapes ProPublica's organization page — the only place that maps
     fiscal years to electronic-filing object_ids.
     """
-    cache_p = _org_cache_path(ein)
+    cache_key = _org_cache_key(ein)
     if not refresh:
-        cached = _load_json(cache_p)
+        cached = _load_json(cache_key)
         if cached is not None:
             return cached
 
@@ -238,7 +235,7 @@ def _discover_filings(ein: str, *, refresh: bool = False) -> list[dict]:
     try:
         html = _http_get(url)
     except requests.RequestException:
-        _save_json(cache_p, [])
+        _save_json(cache_key, [], negative=True)
         return []
 
     out: list[dict] = []
@@ -253,7 +250,7 @@ def _discover_filings(ein: str, *, refresh: bool = False) -> list[dict]:
             out.append({"fiscal_year": fy, "object_id": oid})
 
     out.sort(key=lambda r: (r["fiscal_year"], r["object_id"]))
-    _save_json(cache_p, out)
+    _save_json(cache_key, out)
     return out
 
 
@@ -261,23 +258,21 @@ def _discover_filings(ein: str, *, refresh: bool = False) -> list[dict]:
 # Step 2 — parse Schedule I (Part XV) grants from the rendered IRS990PF page
 # ---------------------------------------------------------------------------
 
-# Each grant row in the rendered HTML contains a span with this id pattern
-# that wraps the recipient business-name text. We anchor the row to that
-# span and then pull the matching Amt[1] span by group index.
-_GRANT_NAME_RE = re.compile(
-    r'GrantOrContributionPdDurYrGrp\[(\d+)\]/RecipientBusinessName\[1\]/'
-    r'BusinessNameLine1Txt\[1\]"[^>]*>([^<]+)</span>'
-)
-_GRANT_AMT_RE_TMPL = (
-    r'GrantOrContributionPdDurYrGrp\[{idx}\]/Amt\[1\]"[^>]*>([0-9,]+)</span>'
-)
-_GRANT_STATUS_RE_TMPL = (
-    r'GrantOrContributionPdDurYrGrp\[{idx}\]/RecipientFoundationStatusTxt\[1\]"'
-    r'[^>]*>([^<]+)</span>'
-)
-_GRANT_PURPOSE_RE_TMPL = (
-    r'GrantOrContributionPdDurYrGrp\[{idx}\]/GrantOrContributionPurposeTxt\[1\]"'
-    r'[^>]*>([^<]+)</span>'
+# One grant per GrantOrContributionPdDurYrGrp element (XML) / span group
+# (HTML, ids like `...GrantOrContributionPdDurYrGrp[7]/Amt[1]`). Field
+# paths are relative to the group; see `_irs990`.
+_GRANT_GROUP = "GrantOrContributionPdDurYrGrp"
+_GRANT_FIELDS = {
+    "RecipientBusinessName/BusinessNameLine1Txt": "recipient",
+    "Amt": "_amount_raw",
+    "RecipientFoundationStatusTxt": "foundation_status",
+    "GrantOrContributionPurposeTxt": "purpose",
+}
+_GRANT_SPAN_RE = re.compile(
+    r'GrantOrContributionPdDurYrGrp\[(\d+)\]/'
+    r'((?:RecipientBusinessName\[1\]/)?'
+    r'(?:BusinessNameLine1Txt|Amt|RecipientFoundationStatusTxt'
+    r'|GrantOrContributionPurposeTxt))\[1\]"[^>]*>([^<]*)</span>'
 )
 
 
@@ -289,44 +284,42 @@ def _fetch_grants(
     ein: str, fiscal_year: int, object_id: str, *, refresh: bool = False
 ) -> list[dict]:
     """Return parsed Schedule I grants for one (EIN, fiscal_year)."""
-    cache_p = _filing_cache_path(ein, fiscal_year)
+    cache_key = _filing_cache_key(ein, fiscal_year)
     if not refresh:
-        cached = _load_json(cache_p)
+        cached = _load_rows(cache_key)
         if cached is not None:
             return cached
 
-    url = (
-        f"https://projects.propublica.org/nonprofits/full_text/"
-        f"{object_id}/IRS990PF"
-    )
     try:
-        html = _http_get(url)
+        groups = _irs990.fetch_groups(
+            object_id, form="IRS990PF", group=_GRANT_GROUP,
+            span_re=_GRANT_SPAN_RE, fields=_GRANT_FIELDS,
+            headers={"User-Agent": _UA}, timeout=_REQ_TIMEOUT,
+        )
     except requests.RequestException:
-        _save_json(cache_p, [])
+        _save_json(cache_key, [], negative=True)
         return []
 
     grants: list[dict] = []
-    for nm_m in _GRANT_NAME_RE.finditer(html):
-        idx = nm_m.group(1)
-        recipient = (nm_m.group(2) or "").strip()
-        if not recipient:
+    for g in groups:
+        if not g.get("recipient"):
             continue
-        amt_m = re.search(_GRANT_AMT_RE_TMPL.format(idx=idx), html)
-        if not amt_m:
+        try:
+            amount = _parse_amount(g.get("_amount_raw") or "0")
+        except ValueError:
             continue
-        amount = _parse_amount(amt_m.group(1))
         if amount <= 0:
             continue
-        status_m = re.search(_GRANT_STATUS_RE_TMPL.format(idx=idx), html)
-        purpose_m = re.search(_GRANT_PURPOSE_RE_TMPL.format(idx=idx), html)
         grants.append({
-            "recipient": recipient,
+            "recipient": g["recipient"],
             "amount_usd": amount,
-            "foundation_status": (status_m.group(1).strip() if status_m else ""),
-            "purpose": (purpose_m.group(1).strip() if purpose_m else ""),
+            "foundation_status": g.get("foundation_status", ""),
+            "purpose": g.get("purpose", ""),
         })
 
-    _save_json(cache_p, grants)
+    # A filed return's Schedule I never changes: pin it against expiry and
+    # eviction. (Amended returns get a new object_id and fiscal-year entry.)
+    _save_json(cache_key, grants, pin=True)
     return grants
 
 
@@ -387,7 +380,6 @@ def collect_candidates(record: dict, *, refresh: bool = False) -> list[dict]:
                 grants = _fetch_grants(ein, fy, object_id, refresh=refresh)
             except Exception:
                 continue
-            time.sleep(_REQ_PAUSE)
 
             # Aggregate by sponsor for this (foundation, fiscal year).
             agg: dict[str, dict] = {}  # sponsor.name -> {amount, count, ein}
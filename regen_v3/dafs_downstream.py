@@ -16,31 +16,46 @@ Two attribution modes:
      |grant−A|/A ≤ 0.10 (sponsors' FYs often close mid-CY). Multiple
      hits → ambiguous → skipped.
 
-Cache: regen_v3/cache/dafs_downstream/<sponsor_ein>_<fy>.json. Sch I
-files are 1-280MB; cache is mandatory for a re-run to be cheap.
+Matching: each sponsor-year's grant lines are sorted by amount once
+(`_GrantIndex`) and a transfer's ±10% band is two binary searches.
+`collect_cohort(records)` resolves many subjects' transfers in one pass
+grouped by sponsor-year, so Fidelity's 72k-line FY list is loaded and
+sorted once per cohort rather than once per subject (batch_runner runs
+it once over the batch and hands each worker its subject's slice);
+per-subject calls share the last MAX_INDEXES indexes within a process.
+
+Cache: `dafs_downstream` namespace of regen_v3.cache, keyed
+<sponsor_ein>_<fy>. Sch I pages are 1-280MB; cache is mandatory for a
+re-run to be cheap.
 """
 from __future__ import annotations
 
 import json
 import re
 import sys
+import threading
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
 from pathlib import Path
+from typing import Iterable
 
 import requests
 
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-CACHE_DIR = HERE / "cache" / "dafs_downstream"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "dafs_downstream"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from regen_v3 import _irs990  # noqa: E402
+from regen_v3 import cache  # noqa: E402
 from regen_v3.dafs import (  # noqa: E402
+    _REQ_TIMEOUT,
+    _UA,
     DAF_SPONSORS,
     _discover_filings,
     _ein_digits,
-    _http_get,
     _match_daf_sponsor,
 )
 
@@ -59,18 +74,22 @@ _FY_OFFSETS = (0, 1)  # sponsor FY may close mid-CY; widen to Y..Y+1
 
 # --- Schedule I parser --------------------------------------------------
 
-# Single-pass tokenizer over the rendered HTML. One regex captures
-# (row_idx, field_name, value) for every interesting span; we bucket
-# per row in one O(N) sweep. The naive per-row re.search approach is
-# O(N*M) and was unusable on Fidelity Sch I (280MB, 72k rows).
+# Single pass per filing, streamed from disk by `_irs990`: iterparse over
+# the e-file XML (one RecipientTable element per grant), or one regex over
+# the rendered HTML capturing (row_idx, field path, value) for every
+# interesting span. Per-row re.search is O(N*M) and was unusable on
+# Fidelity Sch I (280MB, 72k rows); holding that page as one string cost
+# ~1 GB per worker.
+_GROUP = "RecipientTable"
 _SPAN_RE = re.compile(
     r'IRS990ScheduleI\[1\]/RecipientTable\[(\d+)\]/'
-    r'(?:RecipientBusinessName\[1\]/)?'
-    r'(BusinessNameLine1Txt|CashGrantAmt|RecipientEIN|PurposeOfGrantTxt'
-    r'|DonorAdvisorTxt|GrantorAdvisorTxt|RecipientRelationshipTxt)'
+    r'((?:RecipientBusinessName\[1\]/)?'
+    r'(?:BusinessNameLine1Txt|CashGrantAmt|RecipientEIN|PurposeOfGrantTxt'
+    r'|DonorAdvisorTxt|GrantorAdvisorTxt|RecipientRelationshipTxt))'
     r'\[1\]"[^>]*>([^<]*)</span>'
 )
 _FIELD_KEY = {
+    "RecipientBusinessName/BusinessNameLine1Txt": "recipient",
     "BusinessNameLine1Txt": "recipient",
     "CashGrantAmt": "_cash_raw",
     "RecipientEIN": "recipient_ein",
@@ -85,22 +104,14 @@ def _parse_amount(s: str) -> float:
     return float(s.replace(",", "").strip() or 0)
 
 
-def _parse_schedule_i(html: str) -> list[dict]:
-    """One dict per RecipientTable[idx] with a positive cash grant."""
-    by_idx: dict[int, dict] = {}
-    for m in _SPAN_RE.finditer(html):
-        value = (m.group(3) or "").strip()
-        if not value:
-            continue
-        key = _FIELD_KEY.get(m.group(2))
-        if not key:
-            continue
-        by_idx.setdefault(int(m.group(1)), {}).setdefault(key, value)
-
+def _parse_schedule_i(groups: Iterable[dict]) -> list[dict]:
+    """One dict per RecipientTable group with a positive cash grant."""
     rows: list[dict] = []
-    for idx in sorted(by_idx):
-        row = by_idx[idx]
-        amount = _parse_amount(row.get("_cash_raw") or "0")
+    for row in groups:
+        try:
+            amount = _parse_amount(row.get("_cash_raw") or "0")
+        except ValueError:
+            continue
         if amount <= 0 or not row.get("recipient"):
             continue
         rows.append({
@@ -116,30 +127,34 @@ def _parse_schedule_i(html: str) -> list[dict]:
 def _fetch_sponsor_schedule_i(
     sponsor_ein: str, fiscal_year: int, *, refresh: bool = False
 ) -> list[dict]:
-    cache_p = CACHE_DIR / f"{_ein_digits(sponsor_ein)}_{fiscal_year}.json"
-    if not refresh and cache_p.exists():
-        try:
-            return json.loads(cache_p.read_text())
-        except Exception:
-            pass
+    cache_key = f"{_ein_digits(sponsor_ein)}_{fiscal_year}"
+    if not refresh:
+        # Streamed: a big sponsor-year is tens of MB of rows, and the
+        # inflated JSON text needn't sit in memory alongside them.
+        cached = cache.get_array(CACHE_NS, cache_key)
+        if cached is not None:
+            return cached
     filings = _discover_filings(sponsor_ein, refresh=refresh)
     match = next(
         (f for f in filings if int(f["fiscal_year"]) == fiscal_year), None
     )
     if match is None:
-        cache_p.write_text("[]")
+        # Not filed yet (or not yet on ProPublica): retry after the negative TTL.
+        cache.put(CACHE_NS, cache_key, [], negative=True)
         return []
-    url = (
-        f"https://projects.propublica.org/nonprofits/full_text/"
-        f"{match['object_id']}/IRS990ScheduleI"
-    )
     try:
-        html = _http_get(url)
+        groups = _irs990.fetch_groups(
+            match["object_id"], form="IRS990ScheduleI", group=_GROUP,
+            span_re=_SPAN_RE, fields=_FIELD_KEY,
+            headers={"User-Agent": _UA}, timeout=_REQ_TIMEOUT,
+        )
     except requests.RequestException:
-        cache_p.write_text("[]")
+        cache.put(CACHE_NS, cache_key, [], negative=True)
         return []
-    rows = _parse_schedule_i(html)
-    cache_p.write_text(json.dumps(rows, indent=2))
+    rows = _parse_schedule_i(groups)
+    # Deliberately unpinned: sponsor Schedule I lists are the biggest entries
+    # in the store and are re-fetchable, so they're what LRU eviction frees.
+    cache.put(CACHE_NS, cache_key, rows)
     return rows
 
 
@@ -191,97 +206,156 @@ def _name_tokens(*names: str) -> set[str]:
     return out
 
 
+class _GrantIndex:
+    """One sponsor-year's Schedule I lines, sorted by amount once so each
+    transfer's ±tolerance band is two binary searches instead of a scan
+    over every line (72k for Fidelity)."""
+
+    __slots__ = ("by_amount", "amounts", "advised")
+
+    def __init__(self, grants: list[dict]) -> None:
+        self.by_amount = sorted(grants, key=lambda g: g["amount_usd"])
+        self.amounts = [g["amount_usd"] for g in self.by_amount]
+        self.advised = [g for g in grants if g.get("donor_advisor")]
+
+    def in_band(self, lo: float, hi: float) -> list[dict]:
+        return self.by_amount[bisect_left(self.amounts, lo):bisect_right(self.amounts, hi)]
+
+
+# Indexes for the most recently used sponsor-years, kept across subjects
+# in one process: every subject with a Fidelity transfer queries the same
+# Fidelity FY lists. Bounded because a big sponsor-year is ~30 MB of rows.
+MAX_INDEXES = 8
+_indexes: OrderedDict[tuple[str, int], _GrantIndex] = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _grant_index(sponsor_ein: str, fiscal_year: int, *, refresh: bool = False) -> _GrantIndex:
+    key = (sponsor_ein, fiscal_year)
+    with _indexes_lock:
+        if not refresh and key in _indexes:
+            _indexes.move_to_end(key)
+            return _indexes[key]
+    index = _GrantIndex(_fetch_sponsor_schedule_i(sponsor_ein, fiscal_year, refresh=refresh))
+    with _indexes_lock:
+        _indexes[key] = index
+        _indexes.move_to_end(key)
+        while len(_indexes) > MAX_INDEXES:
+            _indexes.popitem(last=False)
+    return index
+
+
 def _attempt_attribution(
     transfer: dict,
-    grants: list[dict],
-    person_name: str,
+    index: _GrantIndex,
+    tokens: set[str],
 ) -> tuple[list[dict], str]:
     """Return (matched_grants, kind) where kind ∈ {'verified','statistical',''}.
     `verified` ⇒ donor-advisor field carries one of the subject's name
-    tokens. `statistical` ⇒ exactly one grant within ±10% of the
+    `tokens`. `statistical` ⇒ exactly one grant within ±10% of the
     transfer amount. Empty list + '' ⇒ no defensible attribution."""
-    tokens = _name_tokens(person_name, transfer["donor_entity"])
     verified = [
-        g for g in grants
-        if g.get("donor_advisor")
-        and any(t in g["donor_advisor"].lower() for t in tokens)
+        g for g in index.advised
+        if any(t in g["donor_advisor"].lower() for t in tokens)
     ]
     if verified:
         return verified, "verified"
 
     target = transfer["amount_usd"]
-    band_lo, band_hi = target * (1 - _AMOUNT_TOL), target * (1 + _AMOUNT_TOL)
-    statistical = [g for g in grants if band_lo <= g["amount_usd"] <= band_hi]
+    statistical = index.in_band(target * (1 - _AMOUNT_TOL), target * (1 + _AMOUNT_TOL))
     if len(statistical) == 1:
         return statistical, "statistical"
     return [], ""
 
 
+def _candidate(t: dict, g: dict, fy: int, kind: str, matched: list[dict]) -> dict:
+    conf = "medium" if kind == "verified" else "low"
+    ein_dig = _ein_digits(t["sponsor_ein"])
+    return {
+        "event_role": "grant_out",
+        "year": fy,
+        "date_precision": "year",
+        "donor_entity": t["donor_entity"],
+        "donor_ein": t["donor_ein"],
+        "recipient": g["recipient"],
+        "amount_usd": float(g["amount_usd"]),
+        "source_type": "990",
+        "source_url": (
+            f"https://projects.propublica.org/nonprofits/"
+            f"organizations/{ein_dig}"
+        ),
+        "confidence": conf,
+        "note": (
+            f"DAF downstream — {t['sponsor_name']} grant "
+            f"attributable to "
+            + (
+                f"donor advisor '{matched[0]['donor_advisor']}'"
+                if kind == "verified"
+                else f"statistical match (±10%) of "
+                     f"{t['donor_entity']} → {t['sponsor_name']} "
+                     f"${t['amount_usd']/1e6:.2f}M in {t['year']}"
+            )
+            + f". Sponsor FY{fy}; recipient EIN "
+            f"{g.get('recipient_ein') or 'n/a'}; "
+            f"purpose: {g.get('purpose') or 'n/a'}."
+        ),
+        "regen_source": "dafs_downstream",
+    }
+
+
 # --- Public contract ----------------------------------------------------
 
+def collect_cohort(records: list[dict], *, refresh: bool = False) -> list[list[dict]]:
+    """Candidates for many subjects at once, one list per record in order.
+
+    Every subject's transfers are resolved against each sponsor-year
+    index in one batch: queries are grouped by (sponsor_ein, fy) so each
+    Schedule I is fetched and sorted once per offset round, however many
+    subjects gave through that sponsor. A transfer tries FY Y first and
+    only falls through to Y+1 if Y had no defensible match (same as
+    resolving it alone)."""
+    # (record position, transfer order, transfer, subject name tokens)
+    pending: list[tuple[int, int, dict, set[str]]] = []
+    for pos, record in enumerate(records):
+        person_name = (record.get("person") or {}).get("name_display") or ""
+        for t in _subject_daf_transfers(record):
+            tokens = _name_tokens(person_name, t["donor_entity"])
+            pending.append((pos, len(pending), t, tokens))
+
+    found: list[list[tuple[int, dict]]] = [[] for _ in records]
+    refreshed: set[tuple[str, int]] = set()
+    for offset in _FY_OFFSETS:
+        by_key: dict[tuple[str, int], list[tuple[int, int, dict, set[str]]]] = {}
+        for q in pending:
+            by_key.setdefault((q[2]["sponsor_ein"], q[2]["year"] + offset), []).append(q)
+        unmatched = []
+        for key in sorted(by_key):
+            index = _grant_index(*key, refresh=refresh and key not in refreshed)
+            refreshed.add(key)
+            for q in by_key[key]:
+                pos, seq, t, tokens = q
+                matched, kind = _attempt_attribution(t, index, tokens)
+                if not matched:
+                    unmatched.append(q)
+                    continue
+                # Matched transfers don't try later offsets: no double-count.
+                found[pos].extend((seq, _candidate(t, g, key[1], kind, matched))
+                                  for g in matched)
+        pending = unmatched
+
+    out: list[list[dict]] = []
+    for rows in found:
+        # Transfer order breaks ties, as when transfers were resolved one by one.
+        rows.sort(key=lambda r: (r[1]["donor_ein"], r[1]["year"],
+                                 -r[1]["amount_usd"], r[0]))
+        out.append([c for _, c in rows])
+    return out
+
+
 def collect_candidates(record: dict, *, refresh: bool = False) -> list[dict]:
     """Return regen_v3 candidate events for DAF downstream grants
     attributable to this subject's foundation→DAF transfers."""
-    person_name = (record.get("person") or {}).get("name_display") or ""
-    transfers = _subject_daf_transfers(record)
-    if not transfers:
-        return []
-
-    # Cache parsed Sch I per (sponsor_ein, fy) within this call.
-    grant_cache: dict[tuple[str, int], list[dict]] = {}
-
-    candidates: list[dict] = []
-    for t in transfers:
-        for offset in _FY_OFFSETS:
-            fy = t["year"] + offset
-            key = (t["sponsor_ein"], fy)
-            if key not in grant_cache:
-                grant_cache[key] = _fetch_sponsor_schedule_i(
-                    t["sponsor_ein"], fy, refresh=refresh
-                )
-            grants = grant_cache[key]
-            matched, kind = _attempt_attribution(t, grants, person_name)
-            if not matched:
-                continue
-            for g in matched:
-                conf = "medium" if kind == "verified" else "low"
-                ein_dig = _ein_digits(t["sponsor_ein"])
-                candidates.append({
-                    "event_role": "grant_out",
-                    "year": fy,
-                    "date_precision": "year",
-                    "donor_entity": t["donor_entity"],
-                    "donor_ein": t["donor_ein"],
-                    "recipient": g["recipient"],
-                    "amount_usd": float(g["amount_usd"]),
-                    "source_type": "990",
-                    "source_url": (
-                        f"https://projects.propublica.org/nonprofits/"
-                        f"organizations/{ein_dig}"
-                    ),
-                    "confidence": conf,
-                    "note": (
-                        f"DAF downstream — {t['sponsor_name']} grant "
-                        f"attributable to "
-                        + (
-                            f"donor advisor '{matched[0]['donor_advisor']}'"
-                            if kind == "verified"
-                            else f"statistical match (±10%) of "
-                                 f"{t['donor_entity']} → {t['sponsor_name']} "
-                                 f"${t['amount_usd']/1e6:.2f}M in {t['year']}"
-                        )
-                        + f". Sponsor FY{fy}; recipient EIN "
-                        f"{g.get('recipient_ein') or 'n/a'}; "
-                        f"purpose: {g.get('purpose') or 'n/a'}."
-                    ),
-                    "regen_source": "dafs_downstream",
-                })
-            break  # don't double-count a transfer across offset years
-
-    candidates.sort(
-        key=lambda c: (c["donor_ein"], c["year"], -c["amount_usd"])
-    )
-    return candidates
+    return collect_cohort([record], refresh=refresh)[0]
 
 
 # --- CLI ----------------------------------------------------------------
@@ -290,17 +364,18 @@ if __name__ == "__main__":
     import argparse
 
     ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
-    ap.add_argument("--subject", required=True)
+    ap.add_argument("--subject", required=True, nargs="+",
+                    help="one or more subject ids; several are attributed as one cohort")
     ap.add_argument("--refresh", action="store_true")
     args = ap.parse_args()
 
-    rec_path = ROOT / "data" / f"{args.subject}.v3.json"
-    record = json.loads(rec_path.read_text())
-    cands = collect_candidates(record, refresh=args.refresh)
-    print(f"{args.subject}: {len(cands)} downstream candidates")
-    for c in cands:
-        kind = "VER" if c["confidence"] == "medium" else "stat"
-        print(
-            f"  [{kind}] {c['year']}  ${c['amount_usd']/1e6:>7.2f}M  "
-            f"{c['donor_entity'][:30]:<30} → {c['recipient'][:50]}"
-        )
+    records = [json.loads((ROOT / "data" / f"{sid}.v3.json").read_text())
+               for sid in args.subject]
+    for sid, cands in zip(args.subject, collect_cohort(records, refresh=args.refresh)):
+        print(f"{sid}: {len(cands)} downstream candidates")
+        for c in cands:
+            kind = "VER" if c["confidence"] == "medium" else "stat"
+            print(
+                f"  [{kind}] {c['year']}  ${c['amount_usd']/1e6:>7.2f}M  "
+                f"{c['donor_entity'][:30]:<30} → {c['recipient'][:50]}"
+            )
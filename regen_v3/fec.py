@@ -4,8 +4,8 @@ Wraps `categories.political` to produce candidate events from the FEC
 individual-contributions API. Tracks political giving — which the v3 schema
 treats as context (not charity), via the `political` event_role.
 
-Cache: regen_v3/cache/fec/<sha256(name|cycles)>.json — same name + same
-cycle list never re-hits the FEC unless `refresh=True`.
+Cache: `fec` namespace of regen_v3.cache, keyed sha256(name|cycles) — same
+name + same cycle list never re-hits the FEC unless `refresh=True`.
 
 API key: reads FEC_API_KEY from the environment. With no key set, the
 module returns [] and prints a one-line note (does not raise) so the
@@ -22,21 +22,19 @@ import hashlib
 import json
 import os
 import sys
-import time
 from pathlib import Path
 
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-CACHE_DIR = HERE / "cache" / "fec"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "fec"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
 try:
-    from regen_v3._atomic import atomic_write_json  # type: ignore
+    from regen_v3 import cache  # type: ignore
 except Exception:  # pragma: no cover - in-package fallback
-    from _atomic import atomic_write_json  # type: ignore
+    import cache  # type: ignore
 
 # Default election cycles to query. Override per-call if needed.
 DEFAULT_CYCLES = (2024, 2022, 2020, 2018, 2016)
@@ -51,26 +49,20 @@ def _cache_key(name: str, cycles: tuple[int, ...]) -> str:
     return hashlib.sha256(raw.encode()).hexdigest()
 
 
-def _cache_path(name: str, cycles: tuple[int, ...]) -> Path:
-    return CACHE_DIR / f"{_cache_key(name, cycles)}.json"
-
-
 def _load_cache(name: str, cycles: tuple[int, ...]) -> list[dict] | None:
-    p = _cache_path(name, cycles)
-    if not p.exists():
-        return None
-    try:
-        return json.loads(p.read_text()).get("contributions")
-    except Exception:
+    payload = cache.get(CACHE_NS, _cache_key(name, cycles))
+    if not isinstance(payload, dict):
         return None
+    return payload.get("contributions")
 
 
 def _save_cache(name: str, cycles: tuple[int, ...], contributions: list[dict]) -> None:
-    # Atomic write: cache key is sha(name|cycles); two subjects with the
-    # same legal-name string (rare but possible — e.g. shared family
-    # display names) would collide here.
-    atomic_write_json(
-        _cache_path(name, cycles),
+    # Cache key is sha(name|cycles); two subjects with the same legal-name
+    # string (rare but possible — e.g. shared family display names) share
+    # the entry. The store's upsert is atomic, so the last writer wins.
+    cache.put(
+        CACHE_NS,
+        _cache_key(name, cycles),
         {
             "name": name,
             "cycles": list(cycles),
@@ -131,7 +123,6 @@ def fetch_contributions(
         for c in contributions
     ]
     _save_cache(name, cycles, serial)
-    time.sleep(0.5)  # Be polite to the FEC API.
     return serial
 
 
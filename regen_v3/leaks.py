@@ -3,7 +3,8 @@
 No API keys. Loads ICIJ's freely-published Offshore Leaks Database
 (Panama, Paradise, Pandora, Bahamas, Offshore Leaks combined) from the
 official bulk CSV download, indexes it locally, and matches each
-subject's name(s) against the officer roster. Hits flow into
+subject's name(s) against the officer roster, following the relationship
+graph a few hops out from each matched officer. Hits flow into
 `sources_all` as `event_role: "reference_only"` candidates — presence
 of an offshore vehicle is a *signal of dark-giving capacity*, not
 proof of any specific dollar amount.
@@ -25,7 +26,13 @@ re-download. Otherwise the local copy is the cache — never re-fetched.
 Cache layout
 ------------
 - `regen_v3/data/icij/`              — extracted CSVs (gitignored)
-- `regen_v3/cache/leaks/<sha>.json`  — per-subject match results
+- `regen_v3/data/icij/index.sqlite3` — prebuilt lookup index (`_icij_index`),
+  built once from the CSVs and rebuilt automatically when they change;
+  processes open it read-only and memory-mapped instead of re-parsing
+  ~626 MB of CSV each
+- `regen_v3/data/icij/index.graph` — every ICIJ relationship as a CSR graph
+  (`_icij_graph`), for the multi-hop person -> entity -> entity search
+- `leaks` namespace of regen_v3.cache — per-name match results, keyed sha256(name)
 
 Output candidate shape (one per matched offshore entity)
 -------------------------------------------------------
@@ -44,13 +51,13 @@ Output candidate shape (one per matched offshore entity)
 """
 from __future__ import annotations
 
-import csv
 import hashlib
 import json
 import re
 import sys
 import zipfile
 from pathlib import Path
+from typing import Iterable
 
 try:
     import requests  # already a project dep via search/extract
@@ -58,15 +65,15 @@ except ImportError:  # pragma: no cover
     requests = None  # type: ignore
 
 HERE = Path(__file__).parent
-CACHE_DIR = HERE / "cache" / "leaks"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "leaks"
 ICIJ_DIR = HERE / "data" / "icij"
 ICIJ_DIR.mkdir(parents=True, exist_ok=True)
 
 try:
-    from regen_v3._atomic import atomic_write_json  # type: ignore
+    from regen_v3 import _icij_index, cache  # type: ignore
 except Exception:  # pragma: no cover - in-package fallback
-    from _atomic import atomic_write_json  # type: ignore
+    import _icij_index  # type: ignore
+    import cache  # type: ignore
 
 DOWNLOAD_URL = "https://offshoreleaks-data.icij.org/offshoreleaks/csv/full-oldb.LATEST.zip"
 ZIP_PATH = ICIJ_DIR / "full-oldb.zip"
@@ -77,11 +84,27 @@ RELATIONSHIPS_CSV = ICIJ_DIR / "relationships.csv"
 
 REQUIRED_FILES = (OFFICERS_CSV, ENTITIES_CSV, RELATIONSHIPS_CSV)
 
-# Allow CSVs with very long fields (some `note` columns are huge).
-csv.field_size_limit(sys.maxsize)
-
 # Cap hits per name so a wildly-collidant name doesn't blow up sources_all.
 MAX_HITS_PER_NAME = 25
+# Multi-hop: entities reached from a matched officer through the ICIJ
+# relationship graph (person -> holding company -> trust / foundation),
+# up to MAX_HOPS edges out, capped separately from direct hits.
+MAX_HOPS = 3
+MAX_HOP_HITS_PER_NAME = 10
+# Relationship types followed by the multi-hop search. registered_address
+# and the fuzzy name-similarity links (similar, same_name_as,
+# probably_same_officer_as) join unrelated parties, so they're left out.
+HOP_REL_TYPES = (
+    "officer_of", "intermediary_of", "connected_to", "same_as",
+    "same_company_as", "same_id_as", "same_intermediary_as",
+)
+# Optional narrowing (None = any): officer-role text the traversed
+# officer_of / intermediary_of links must contain ("shareholder",
+# "beneficiar"), and jurisdictions a reported entity must be in.
+HOP_ROLES: tuple[str, ...] | None = None
+HOP_JURISDICTIONS: tuple[str, ...] | None = None
+# Bump when the shape of cached per-name matches changes.
+_MATCH_VERSION = 2
 # Drop tokens this short from the matching key — almost always initials.
 MIN_TOKEN_LEN = 2
 
@@ -165,83 +188,66 @@ def _tokens(name: str) -> frozenset[str]:
 # Lazy-loaded indices.
 # ---------------------------------------------------------------------------
 
-# Token-set -> list[node_id] for officers AND intermediaries.
-# Token-set is the "canonical" key (frozenset of normalized tokens).
-_NAME_INDEX: dict[frozenset[str], list[str]] | None = None
-# node_id -> raw row dict for officers + intermediaries (for the role label
-# / leak source / country) -- both are people-shaped nodes that link via
-# `officer_of` / `intermediary_of` to entities.
-_PEOPLE: dict[str, dict] | None = None
-# entity node_id -> raw row dict (for caption / jurisdiction / source).
-_ENTITIES: dict[str, dict] | None = None
-# person node_id -> list[(entity_node_id, link_label, sourceID)]
-_REL_OUT: dict[str, list[tuple[str, str, str]]] | None = None
+# Everything is read from the prebuilt index on demand: the token-set name
+# keys (officers AND intermediaries; the key is the frozenset of
+# normalized tokens) through its inverted token index, person / entity
+# rows, and officer_of / intermediary_of links. Nothing is held per process.
+_INDEX_READY = False
+# Set in batch_runner pool workers (`attach_shared`): the parent already
+# downloaded / refreshed the CSVs and built the index, so workers only read.
+_SHARED = False
+# Set by `attach_shared(None)`: a preview batch with no built index; the
+# leaks stage is skipped rather than downloading / building in every worker.
+_OFF = False
 
 
 def _ensure_indices_loaded() -> bool:
-    """One-shot lazy load. Returns True on success."""
-    global _NAME_INDEX, _PEOPLE, _ENTITIES, _REL_OUT
-    if _NAME_INDEX is not None:
+    """One-shot check that the index exists and matches the CSVs. Returns
+    True on success."""
+    global _INDEX_READY
+    if _INDEX_READY:
         return True
     if not _download_and_extract():
         return False
+    if not _icij_index.ensure_built(_tokens, src_dir=ICIJ_DIR):
+        return False
+    _INDEX_READY = True
+    return True
 
-    name_index: dict[frozenset[str], list[str]] = {}
-    people: dict[str, dict] = {}
-    entities: dict[str, dict] = {}
-    rel_out: dict[str, list[tuple[str, str, str]]] = {}
 
-    # --- people (officers + intermediaries) ---
-    for csv_path in (OFFICERS_CSV, INTERMEDIARIES_CSV):
-        if not csv_path.exists():
-            continue
-        with open(csv_path, "r", encoding="utf-8", newline="") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                nid = row.get("node_id")
-                name = (row.get("name") or "").strip()
-                if not nid or not name:
-                    continue
-                people[nid] = row
-                key = _tokens(name)
-                # Single-token keys (e.g. "Acme") are too noisy — skip.
-                if len(key) < 2:
-                    continue
-                name_index.setdefault(key, []).append(nid)
-
-    # --- entities ---
-    if ENTITIES_CSV.exists():
-        with open(ENTITIES_CSV, "r", encoding="utf-8", newline="") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                nid = row.get("node_id")
-                if not nid:
-                    continue
-                entities[nid] = row
-
-    # --- relationships: only person -> entity links we care about ---
-    if RELATIONSHIPS_CSV.exists():
-        with open(RELATIONSHIPS_CSV, "r", encoding="utf-8", newline="") as fh:
-            reader = csv.DictReader(fh)
-            for row in reader:
-                rel_type = row.get("rel_type") or ""
-                if rel_type not in ("officer_of", "intermediary_of"):
-                    continue
-                start = row.get("node_id_start")
-                end = row.get("node_id_end")
-                if not start or not end:
-                    continue
-                rel_out.setdefault(start, []).append((
-                    end,
-                    (row.get("link") or rel_type).strip(),
-                    (row.get("sourceID") or "").strip(),
-                ))
-
-    _NAME_INDEX = name_index
-    _PEOPLE = people
-    _ENTITIES = entities
-    _REL_OUT = rel_out
-    return True
+def prepare_shared(*, refresh: bool = False, build: bool = True) -> str | None:
+    """Parent-side setup before a worker pool starts: fetch (or with
+    `refresh`, re-fetch) the CSVs, build the index if stale, and pre-load
+    it into the page cache. Returns the index path for `attach_shared`, or
+    None if the leaks source is unavailable; workers then bootstrap on
+    their own as before. With `build=False` nothing is fetched or built:
+    the index is used only if it's already current for the local CSVs."""
+    if not build:
+        if not _icij_index.is_current(ICIJ_DIR):
+            return None
+        _icij_index.warm()
+        return str(_icij_index.INDEX_PATH)
+    if refresh:
+        cache.clear(CACHE_NS)
+        if not _download_and_extract(refresh=True):
+            return None
+    if not _ensure_indices_loaded():
+        return None
+    _icij_index.warm()
+    return str(_icij_index.INDEX_PATH)
+
+
+def attach_shared(index_path: str | None) -> None:
+    """Worker-side counterpart of `prepare_shared`: read `index_path`
+    as-is. `collect_candidates(refresh=True)` no longer re-downloads or
+    rebuilds in this process, since the parent already did. None turns
+    the leaks stage off in this process (no index, none to be built)."""
+    global _INDEX_READY, _SHARED, _OFF
+    if index_path is None:
+        _OFF = True
+        return
+    _icij_index.INDEX_PATH = Path(index_path)
+    _INDEX_READY = _SHARED = True
 
 
 # ---------------------------------------------------------------------------
@@ -289,10 +295,16 @@ def _lookup_by_name(query_name: str, surname_anchor: str | None = None) -> list[
 
     The >=2-tokens floor (enforced both at index-build time and on the
     query side) keeps single-name rows from matching everyone.
+
+    Candidates come from the index's token -> keys posting lists: every
+    match shares at least two query tokens (the smaller side has >=2 and
+    sits inside the other), one of them the anchor when there is one, so
+    `_icij_index.candidate_keys` intersects the lists in SQL and the rule
+    above runs on those keys only.
+    `_lookup_by_name_scan` is the exhaustive reference implementation.
     """
     if not _ensure_indices_loaded():
         return []
-    assert _NAME_INDEX is not None
     qkey = _tokens(query_name)
     if len(qkey) < 2:
         return []
@@ -300,18 +312,28 @@ def _lookup_by_name(query_name: str, surname_anchor: str | None = None) -> list[
         # Caller passed an anchor that isn't in the normalized token set
         # (e.g. punctuation/honorific weirdness) -- fall back to no anchor.
         surname_anchor = None
+    return _collect_ids(_icij_index.candidate_keys(qkey, surname_anchor), qkey, surname_anchor)
+
+
+def _key_matches(ikey: frozenset[str], qkey: frozenset[str], anchor: str | None) -> bool:
+    if len(ikey) < 2:
+        return False
+    if ikey == qkey:
+        return True
+    if ikey.issubset(qkey) or qkey.issubset(ikey):
+        return (anchor is None) or (anchor in ikey)
+    return False
+
+
+def _collect_ids(
+    keys: Iterable[tuple[frozenset[str], list[str]]],
+    qkey: frozenset[str],
+    anchor: str | None,
+) -> list[str]:
     out: list[str] = []
     seen: set[str] = set()
-    for ikey, ids in _NAME_INDEX.items():
-        if len(ikey) < 2:
-            continue
-        if ikey == qkey:
-            ok = True
-        elif ikey.issubset(qkey) or qkey.issubset(ikey):
-            ok = (surname_anchor is None) or (surname_anchor in ikey)
-        else:
-            ok = False
-        if not ok:
+    for ikey, ids in keys:
+        if not _key_matches(ikey, qkey, anchor):
             continue
         for nid in ids:
             if nid not in seen:
@@ -320,6 +342,19 @@ def _lookup_by_name(query_name: str, surname_anchor: str | None = None) -> list[
     return out
 
 
+def _lookup_by_name_scan(query_name: str, surname_anchor: str | None = None) -> list[str]:
+    """`_lookup_by_name` by checking every indexed name. Same result, far
+    slower; kept as the reference for `--bench`."""
+    if not _ensure_indices_loaded():
+        return []
+    qkey = _tokens(query_name)
+    if len(qkey) < 2:
+        return []
+    if surname_anchor and surname_anchor not in qkey:
+        surname_anchor = None
+    return _collect_ids(_icij_index.iter_name_keys(), qkey, surname_anchor)
+
+
 def _names_to_search(record: dict) -> list[str]:
     """name_display + name_legal + aliases (when distinct).
 
@@ -351,39 +386,42 @@ def _cache_key(name: str) -> str:
     return hashlib.sha256(name.strip().lower().encode()).hexdigest()
 
 
-def _cache_path(name: str) -> Path:
-    return CACHE_DIR / f"{_cache_key(name)}.json"
-
-
 def _load_cache(name: str) -> list[dict] | None:
-    p = _cache_path(name)
-    if not p.exists():
-        return None
-    try:
-        return json.loads(p.read_text()).get("matches")
-    except Exception:
+    payload = cache.get(CACHE_NS, _cache_key(name))
+    if not isinstance(payload, dict) or payload.get("v") != _MATCH_VERSION:
         return None
+    return payload.get("matches")
 
 
 def _save_cache(name: str, matches: list[dict]) -> None:
-    # Atomic write: parent/child or husband/wife pairs hashing to the
-    # same surname-anchored key can race on this cache.
-    atomic_write_json(
-        _cache_path(name),
-        {"name": name, "matches": matches},
-    )
+    # Parent/child or husband/wife pairs hashing to the same key can race
+    # on this entry; the store's upsert is atomic.
+    cache.put(CACHE_NS, _cache_key(name),
+              {"name": name, "matches": matches, "v": _MATCH_VERSION})
 
 
-def _matches_for_name(name: str, surname_anchor: str | None = None) -> list[dict]:
-    """Return raw match dicts (one per (person, entity) pair) for a name.
+def _matches_for_name(
+    name: str, surname_anchor: str | None = None,
+) -> tuple[list[dict], bool]:
+    """Return raw match dicts (one per (person, entity) pair) for a name,
+    and whether they're complete enough to cache.
     Each dict: {person_id, person_name, entity_id, entity_name, role,
-    leak_source, jurisdiction, person_country}."""
-    assert _PEOPLE is not None and _ENTITIES is not None and _REL_OUT is not None
+    leak_source, jurisdiction, person_country}. Direct officer_of /
+    intermediary_of links come first, then entities further out in the
+    relationship graph (`_hop_matches`), which also carry `hops` and
+    `path`. Not complete when people matched but the graph is missing or
+    from another build (mid-rebuild): the hop matches are absent."""
+    pids = _lookup_by_name(name, surname_anchor)
+    links = {pid: _icij_index.links_from(pid) for pid in pids}
+    rows = _icij_index.nodes(
+        pids + [eid for ls in links.values() for eid, _, _ in ls])
     out: list[dict] = []
-    for pid in _lookup_by_name(name, surname_anchor):
-        prow = _PEOPLE.get(pid) or {}
-        for eid, role, src in _REL_OUT.get(pid, []):
-            erow = _ENTITIES.get(eid) or {}
+    for pid in pids:
+        prow = rows.get(pid) or {}
+        for eid, role, src in links[pid]:
+            erow = rows.get(eid) or {}
+            if erow.get("kind") != "entity":
+                erow = {}
             out.append({
                 "person_id": pid,
                 "person_name": (prow.get("name") or "").strip(),
@@ -391,14 +429,47 @@ def _matches_for_name(name: str, surname_anchor: str | None = None) -> list[dict
                 "entity_id": eid,
                 "entity_name": (erow.get("name") or "(unnamed entity)").strip(),
                 "role": role,
-                "leak_source": src or (prow.get("sourceID") or "").strip(),
-                "jurisdiction": (
-                    erow.get("jurisdiction_description")
-                    or erow.get("jurisdiction")
-                    or erow.get("countries")
-                    or ""
-                ).strip(),
+                "leak_source": src or (prow.get("source") or "").strip(),
+                "jurisdiction": (erow.get("jurisdiction") or "").strip(),
             })
+    hops = _hop_matches([rows[pid]["idx"] for pid in pids if pid in rows])
+    if hops is None:
+        return out, False
+    out.extend(hops)
+    return out, True
+
+
+def _hop_matches(seeds: list[int]) -> list[dict] | None:
+    """Entities 2..MAX_HOPS edges from the matched people (graph idx),
+    nearest first, as raw match dicts with the path that reached them.
+    None if there are seeds but no graph of the current build."""
+    if not seeds:
+        return []
+    graph = _icij_index.graph()
+    if graph is None:
+        return None
+    hops = [h for h in graph.bfs(seeds, max_depth=MAX_HOPS, rel_types=HOP_REL_TYPES,
+                                 roles=HOP_ROLES, kinds=("entity",),
+                                 jurisdictions=HOP_JURISDICTIONS)
+            if h.depth >= 2][:MAX_HOP_HITS_PER_NAME]
+    rows = _icij_index.nodes_at({p.node for h in hops for p in h.path()})
+    out: list[dict] = []
+    for h in hops:
+        path = h.path()
+        prow, erow = rows.get(path[0].node) or {}, rows.get(h.node) or {}
+        out.append({
+            "person_id": prow.get("node_id") or "",
+            "person_name": (prow.get("name") or "").strip(),
+            "person_country": (prow.get("countries") or "").strip(),
+            "entity_id": erow.get("node_id") or "",
+            "entity_name": (erow.get("name") or "(unnamed entity)").strip(),
+            "role": path[1].label,
+            "leak_source": (erow.get("source") or prow.get("source") or "").strip(),
+            "jurisdiction": (erow.get("jurisdiction") or "").strip(),
+            "hops": h.depth,
+            "path": [[(rows.get(p.node, {}).get("name") or "?").strip(), p.label]
+                     for p in path],
+        })
     return out
 
 
@@ -410,9 +481,15 @@ def _to_candidate(subject_name: str, m: dict) -> dict:
     entity_name = m.get("entity_name") or "(unnamed entity)"
     person_country = m.get("person_country") or ""
     person_country_clause = f" (officer listed in {person_country})" if person_country else ""
+    if m.get("hops", 1) > 1:
+        # [[name, link into it], ...], seed first (its link is "").
+        chain = "".join(f" —{via}→ {name}" if via else name for name, via in m["path"])
+        relation = f"{m['hops']} hops from matched officer: {chain}"
+    else:
+        relation = f"officer role: {role}"
     note = (
         f"ICIJ {leak} — {entity_name} in {juris}; "
-        f"officer role: {role}{person_country_clause}. "
+        f"{relation}{person_country_clause}. "
         f"Matched on subject name; presence of an offshore vehicle is a "
         f"capacity signal, not proof of giving."
     )
@@ -434,28 +511,30 @@ def collect_candidates(record: dict, *, refresh: bool = False) -> list[dict]:
     """Top-level entry point — same shape as fec/sec/propublica.
 
     `refresh=True` forces a re-download of the ICIJ bulk CSVs (the per-
-    subject JSON cache is also re-computed). Otherwise the on-disk CSVs
+    subject match cache is also re-computed). Otherwise the on-disk CSVs
     are treated as the cache and never re-downloaded.
     """
+    if _OFF:
+        print("    [leaks-skip] no built ICIJ index (preview runs don't download or build it)")
+        return []
     if requests is None and not all(p.exists() for p in REQUIRED_FILES):
         print("    [leaks-skip] `requests` not installed and no local CSVs — skipping")
         return []
+    # Under batch_runner the parent has already refreshed (`prepare_shared`).
+    refresh = refresh and not _SHARED
     if refresh:
-        # Wipe per-name JSON cache so we re-match against the new CSVs.
-        for p in CACHE_DIR.glob("*.json"):
-            try:
-                p.unlink()
-            except Exception:
-                pass
+        # Wipe per-name match cache so we re-match against the new CSVs.
+        cache.clear(CACHE_NS)
     if not _ensure_indices_loaded() and not refresh:
         # Bootstrap failed AND we don't have local CSVs.
         return []
     if refresh and not _download_and_extract(refresh=True):
         return []
     if refresh:
-        # Force index rebuild after the fresh download.
-        global _NAME_INDEX, _PEOPLE, _ENTITIES, _REL_OUT
-        _NAME_INDEX = _PEOPLE = _ENTITIES = _REL_OUT = None
+        # Re-check after the fresh download; the new CSVs' sizes / mtimes
+        # no longer match the index, so it's rebuilt first.
+        global _INDEX_READY
+        _INDEX_READY = False
         if not _ensure_indices_loaded():
             return []
 
@@ -473,39 +552,82 @@ def collect_candidates(record: dict, *, refresh: bool = False) -> list[dict]:
         per_anchor = anchor or _surname_token(name)
         cached = _load_cache(name)
         if cached is None:
-            raw = _matches_for_name(name, per_anchor)
-            _save_cache(name, raw)
+            raw, complete = _matches_for_name(name, per_anchor)
+            if complete:
+                _save_cache(name, raw)
+            else:
+                print(f"    [leaks] ICIJ graph unavailable; {name!r} hop matches "
+                      "skipped and not cached")
         else:
             raw = cached
-        kept = 0
+        kept = {"direct": 0, "hops": 0}
         for m in raw:
-            if kept >= MAX_HITS_PER_NAME:
-                break
+            bucket = "hops" if m.get("hops", 1) > 1 else "direct"
+            if kept[bucket] >= (MAX_HOP_HITS_PER_NAME if bucket == "hops" else MAX_HITS_PER_NAME):
+                continue
             cand = _to_candidate(subject_display or name, m)
             dedupe = (cand["recipient"].lower(), cand["source_url"])
             if dedupe in seen_keys:
                 continue
             seen_keys.add(dedupe)
             candidates.append(cand)
-            kept += 1
+            kept[bucket] += 1
     return candidates
 
 
+def _bench(names: list[str]) -> int:
+    """Time `_lookup_by_name_scan` vs `_lookup_by_name` over `names` and
+    check they return identical node lists. Returns a process exit code."""
+    import time
+
+    if not _ensure_indices_loaded():
+        return 2
+    timings = {}
+    results = {}
+    for label, fn in (("inverted", _lookup_by_name), ("scan", _lookup_by_name_scan)):
+        t0 = time.perf_counter()
+        results[label] = [fn(n, _surname_token(n)) for n in names]
+        timings[label] = time.perf_counter() - t0
+    mismatched = [n for n, a, b in zip(names, results["scan"], results["inverted"]) if a != b]
+    hits = sum(len(r) for r in results["scan"])
+    print(f"[leaks bench] {len(names)} names, {hits} person matches")
+    for label, sec in timings.items():
+        print(f"  {label:<9} {sec:8.3f}s total  {1e6 * sec / max(1, len(names)):10.0f} us/name")
+    print(f"  speedup   {timings['scan'] / max(timings['inverted'], 1e-9):.0f}x")
+    for n in mismatched[:10]:
+        print(f"  [MISMATCH] {n!r}")
+    print(f"  identical match sets: {'yes' if not mismatched else f'NO ({len(mismatched)})'}")
+    return 1 if mismatched else 0
+
+
 # Tiny CLI for ad-hoc probing: `python3 -m regen_v3.leaks <subject>`
+# Benchmark the name lookup: `python3 -m regen_v3.leaks --bench 500`
 if __name__ == "__main__":
     import argparse
 
     ap = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
-    ap.add_argument("subject", help="Subject id (e.g. henry_kravis)")
+    ap.add_argument("subject", nargs="?", help="Subject id (e.g. henry_kravis)")
     ap.add_argument("--refresh", action="store_true",
                     help="Force re-download of ICIJ bulk CSVs.")
+    ap.add_argument("--bench", type=int, metavar="N",
+                    help="Compare scan vs inverted-index lookup on N sampled ICIJ "
+                         "names (plus the subject's names, if given).")
     args = ap.parse_args()
-
-    rec_path = HERE.parent / "data" / f"{args.subject}.v3.json"
-    if not rec_path.exists():
-        print(f"no record at {rec_path}")
-        sys.exit(2)
-    rec = json.loads(rec_path.read_text())
+    if args.subject is None and args.bench is None:
+        ap.error("give a subject id or --bench N")
+
+    rec = None
+    if args.subject:
+        rec_path = HERE.parent / "data" / f"{args.subject}.v3.json"
+        if not rec_path.exists():
+            print(f"no record at {rec_path}")
+            sys.exit(2)
+        rec = json.loads(rec_path.read_text())
+    if args.bench is not None:
+        if not _ensure_indices_loaded():
+            sys.exit(2)
+        names = (_names_to_search(rec) if rec else []) + _icij_index.sample_person_names(args.bench)
+        sys.exit(_bench(names))
     cands = collect_candidates(rec, refresh=args.refresh)
     print(f"{args.subject}: {len(cands)} candidates")
     for c in cands:
@@ -34,10 +34,10 @@ Match logic
 
 Cache
 -----
-`regen_v3/cache/llcs/<subject_id>.json` — purely the assembled candidate
-list. The catalog is hardcoded so there's no live network call to cache,
-but persisting per-subject keeps the cli.py cache-hit accounting
-consistent with the other structured modules.
+`llcs` namespace of regen_v3.cache, keyed <subject_id> — purely the
+assembled candidate list. The catalog is hardcoded so there's no live
+network call to cache, but persisting per-subject keeps the cli.py
+cache-hit accounting consistent with the other structured modules.
 """
 from __future__ import annotations
 
@@ -49,12 +49,13 @@ from typing import Optional
 
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-CACHE_DIR = HERE / "cache" / "llcs"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "llcs"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from regen_v3 import cache  # noqa: E402
+
 
 # ---------------------------------------------------------------------------
 # Catalog
@@ -420,22 +421,12 @@ KNOWN_PHILANTHROPIC_LLCS: dict[str, list[LLCCommitment]] = {
 # ---------------------------------------------------------------------------
 
 
-def _cache_path(subject_id: str) -> Path:
-    return CACHE_DIR / f"{subject_id}.json"
-
-
 def _load_cache(subject_id: str) -> list[dict] | None:
-    p = _cache_path(subject_id)
-    if not p.exists():
-        return None
-    try:
-        return json.loads(p.read_text())
-    except Exception:
-        return None
+    return cache.get(CACHE_NS, subject_id)
 
 
 def _save_cache(subject_id: str, candidates: list[dict]) -> None:
-    _cache_path(subject_id).write_text(json.dumps(candidates, indent=2))
+    cache.put(CACHE_NS, subject_id, candidates)
 
 
 def _subject_id(record: dict) -> str:
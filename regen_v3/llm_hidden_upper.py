@@ -25,12 +25,13 @@ from typing import Any
 
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-CACHE_DIR = HERE / "cache" / "llm_hidden_upper"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "llm_hidden_upper"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from regen_v3 import cache  # noqa: E402
+
 try:
     import anthropic
 except ImportError:  # pragma: no cover
@@ -197,9 +198,8 @@ def _canonical_input_json(record: dict) -> str:
     return json.dumps(payload, sort_keys=True, default=str)
 
 
-def _cache_path(record: dict) -> Path:
-    h = hashlib.sha256(_canonical_input_json(record).encode()).hexdigest()
-    return CACHE_DIR / f"{h}.json"
+def _cache_key(record: dict) -> str:
+    return hashlib.sha256(_canonical_input_json(record).encode()).hexdigest()
 
 
 def _existing_total(record: dict) -> int:
@@ -227,33 +227,32 @@ def generate_hidden_upper(record: dict, *, refresh: bool = False) -> dict | None
     if not refresh and isinstance(existing, dict) and len(existing) > 0:
         return existing
 
-    cache_path = _cache_path(record)
-    if not refresh and cache_path.exists():
-        try:
-            cached = json.loads(cache_path.read_text())
+    cache_key = _cache_key(record)
+    if not refresh:
+        cached = cache.get(CACHE_NS, cache_key)
+        if cached is not None:
             record.setdefault("rollup", {})["hidden_upper_usd"] = cached
             return cached
-        except Exception:
-            pass
 
     if not _have_key() or anthropic is None:
         name = (record.get("person") or {}).get("name_display", "?")
         print(f"  [hidden_upper-skip] {name}: ANTHROPIC_API_KEY not set")
         return None
 
-    client = anthropic.Anthropic()
+    from regen_v3._llm_client import cached_system, cached_tools, get_client
+    client = get_client()
     try:
         from regen_v3._llm_retry import with_retry
         resp = with_retry(lambda: client.messages.create(
             model=MODEL,
             max_tokens=MAX_TOKENS,
             temperature=0,
-            system=_SYSTEM_PROMPT,
-            tools=[{
+            system=cached_system(_SYSTEM_PROMPT),
+            tools=cached_tools([{
                 "name": "emit_hidden_upper",
                 "description": "Emit hidden_upper_usd component breakdown.",
                 "input_schema": _tool_schema(),
-            }],
+            }]),
             tool_choice={"type": "tool", "name": "emit_hidden_upper"},
             messages=[{"role": "user", "content": _build_user_prompt(record)}],
         ))
@@ -275,7 +274,7 @@ def generate_hidden_upper(record: dict, *, refresh: bool = False) -> dict | None
     ]
     components["total_usd"] = int(sum(int(components.get(k) or 0) for k in channel_keys))
 
-    cache_path.write_text(json.dumps(components, indent=2))
+    cache.put(CACHE_NS, cache_key, components)
     record.setdefault("rollup", {})["hidden_upper_usd"] = components
     # Best-effort token logging (helps cost tuning).
     usage = getattr(resp, "usage", None)
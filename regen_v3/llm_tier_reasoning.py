@@ -32,12 +32,13 @@ from typing import Any
 HERE = Path(__file__).parent
 ROOT = HERE.parent
 DATA_DIR = ROOT / "data"
-CACHE_DIR = HERE / "cache" / "llm_tier_reasoning"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "llm_tier_reasoning"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from regen_v3 import cache  # noqa: E402
+
 try:
     import anthropic
 except ImportError:  # pragma: no cover
@@ -171,7 +172,8 @@ def generate_tier_reasoning(record: dict, *, refresh: bool = False) -> str:
 
     Skips (returns existing) if record.rollup.tier_reasoning (or the legacy
     tier_published_caveat) is already set.
-    Cached at regen_v3/cache/llm_tier_reasoning/<sha256(record)>.json.
+    Cached in the llm_tier_reasoning namespace of regen_v3.cache, keyed
+    sha256(record).
     Returns empty string on failure (no key, API error).
     """
     if not refresh:
@@ -180,18 +182,18 @@ def generate_tier_reasoning(record: dict, *, refresh: bool = False) -> str:
             return existing
 
     payload = _summarize_inputs(record)
-    cache_path = CACHE_DIR / f"{_cache_key(payload)}.json"
-    if not refresh and cache_path.exists():
-        try:
-            return json.loads(cache_path.read_text()).get("tier_reasoning", "")
-        except Exception:
-            pass
+    cache_key = _cache_key(payload)
+    if not refresh:
+        cached = cache.get(CACHE_NS, cache_key)
+        if isinstance(cached, dict):
+            return cached.get("tier_reasoning", "")
 
     if not _have_key() or anthropic is None:
         print("  [tier_reasoning] ANTHROPIC_API_KEY not set — [skip]")
         return ""
 
-    client = anthropic.Anthropic()
+    from regen_v3._llm_client import cached_system, cached_tools, get_client
+    client = get_client()
     user_prompt = (
         "Subject record (only these fields — do not invent others):\n\n"
         + json.dumps(payload, indent=2, default=str)
@@ -203,12 +205,12 @@ def generate_tier_reasoning(record: dict, *, refresh: bool = False) -> str:
             model=MODEL,
             max_tokens=MAX_TOKENS,
             temperature=0,
-            system=_SYSTEM_PROMPT,
-            tools=[{
+            system=cached_system(_SYSTEM_PROMPT),
+            tools=cached_tools([{
                 "name": "record_tier_reasoning",
                 "description": "Emit the tier_reasoning paragraph.",
                 "input_schema": _tool_schema(),
-            }],
+            }]),
             tool_choice={"type": "tool", "name": "record_tier_reasoning"},
             messages=[{"role": "user", "content": user_prompt}],
         ))
@@ -223,7 +225,7 @@ def generate_tier_reasoning(record: dict, *, refresh: bool = False) -> str:
     out = (dict(block.input).get("tier_reasoning") or "").strip()
     if not out:
         return ""
-    cache_path.write_text(json.dumps({"tier_reasoning": out}, indent=2))
+    cache.put(CACHE_NS, cache_key, {"tier_reasoning": out})
     return out
 
 
@@ -39,7 +39,6 @@ import sys
 from datetime import datetime, timezone
 from pathlib import Path
 from typing import Any
-from urllib.parse import urlparse
 
 # Make the parent scrooge/ importable when this module is run with
 # `python3 -m regen_v3.merge` from the project root.
@@ -79,6 +78,7 @@ _CONFIDENCE_RANK = {"high": 3, "medium": 2, "low": 1}
 # source of truth shared with `search.py`. To add or remove a fabrication,
 # edit DEAD_URLS.md (the loader picks it up at next interpreter start).
 from regen_v3._fabricated import LIKELY_FABRICATED  # noqa: E402, F401
+from regen_v3._urlcanon import canonical, host  # noqa: E402
 
 # URLs known to 404 because the subject never signed the Giving Pledge.
 # Allowed through (the absence is the citation) but stamped accordingly.
@@ -211,11 +211,9 @@ def _retrieved_at_from_run_id(run_id: str) -> str | None:
 
 
 def _publisher_for(url: str) -> str:
-    try:
-        netloc = urlparse(url).netloc.lower()
-        return netloc.removeprefix("www.")
-    except Exception:
-        return ""
+    """Canonical host, so `m.` / `amp.` renderings of one outlet count as
+    one corroborating domain, not two."""
+    return host(url)
 
 
 def _add_corroborating_url(kept: dict, candidate_url: str | None) -> None:
@@ -227,10 +225,11 @@ def _add_corroborating_url(kept: dict, candidate_url: str | None) -> None:
     if not isinstance(candidate_url, str) or not candidate_url:
         return
     kept_url = kept.get("source_url")
-    if candidate_url == kept_url:
+    key = canonical(candidate_url)
+    if isinstance(kept_url, str) and key == canonical(kept_url):
         return
     bag = kept.setdefault("_corroborating_urls", [])
-    if candidate_url not in bag:
+    if all(canonical(u) != key for u in bag):
         bag.append(candidate_url)
 
 
@@ -508,10 +507,10 @@ def merge_candidates(
 
     # ---- Phase 2: bibliography (sources_all) ------------------------------
     retrieved_at = _retrieved_at_from_run_id(run_id)
-    existing_urls = set()
+    existing_urls = set()  # canonical; the first spelling seen is cited
     for src in new_record["sources_all"]:
         if isinstance(src, dict) and isinstance(src.get("url"), str):
-            existing_urls.add(src["url"])
+            existing_urls.add(canonical(src["url"]))
 
     for cand in candidates:
         if not isinstance(cand, dict):
@@ -522,7 +521,7 @@ def merge_candidates(
         if url in LIKELY_FABRICATED:
             # already counted in skipped_fabricated; never let it into bib
             continue
-        if url in existing_urls:
+        if canonical(url) in existing_urls:
             continue
         bib_entry: dict[str, Any] = {
             "publisher": _publisher_for(url),
@@ -536,7 +535,7 @@ def merge_candidates(
         if status:
             bib_entry["source_verification_status"] = status
         new_record["sources_all"].append(bib_entry)
-        existing_urls.add(url)
+        existing_urls.add(canonical(url))
         diff_report["added_sources_all"] += 1
 
     # ---- Phase 3: top-level provenance / generated-by --------------------
@@ -8,8 +8,8 @@ For each EIN attached to a subject's record (under
 hand-curated `categories.foundations.KNOWN_FOUNDATIONS`), we fetch all
 available 990-PF filings and emit one `grant_out` candidate per fiscal year.
 
-Cache: regen_v3/cache/propublica/<ein-9digits>.json — same EIN never
-hits ProPublica twice unless `refresh=True`.
+Cache: `propublica` namespace of regen_v3.cache, keyed <ein-9digits> — same
+EIN never hits ProPublica twice unless `refresh=True`.
 
 Reproducibility: ProPublica returns historical filings; output is stable for
 fiscal years that have already closed.
@@ -24,8 +24,7 @@ from pathlib import Path
 
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-CACHE_DIR = HERE / "cache" / "propublica"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "propublica"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
@@ -37,33 +36,23 @@ from categories.foundations import (  # noqa: E402
 )
 
 try:
-    from regen_v3._atomic import atomic_write_json  # type: ignore
+    from regen_v3 import cache  # type: ignore
 except Exception:  # pragma: no cover - in-package fallback
-    from _atomic import atomic_write_json  # type: ignore
+    import cache  # type: ignore
 
 
 def _ein_digits(ein: str) -> str:
     return normalize_ein(ein).replace("-", "")
 
 
-def _cache_path(ein: str) -> Path:
-    return CACHE_DIR / f"{_ein_digits(ein)}.json"
-
-
 def _load_cache(ein: str) -> list[dict] | None:
-    p = _cache_path(ein)
-    if not p.exists():
-        return None
-    try:
-        return json.loads(p.read_text())
-    except Exception:
-        return None
+    return cache.get(CACHE_NS, _ein_digits(ein))
 
 
 def _save_cache(ein: str, filings: list[dict]) -> None:
-    # Atomic write: two workers sharing an EIN (e.g. Walton family) can
-    # race here. tmp + os.replace prevents half-written cache files.
-    atomic_write_json(_cache_path(ein), filings)
+    # Two workers sharing an EIN (e.g. Walton family) can race here; the
+    # store's upsert is atomic, so readers never see a half-written entry.
+    cache.put(CACHE_NS, _ein_digits(ein), filings)
 
 
 _RECIPIENT_PHRASES = (
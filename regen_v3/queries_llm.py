@@ -34,22 +34,23 @@ from __future__ import annotations
 import hashlib
 import json
 import logging
-import os
 import sys
 from pathlib import Path
 from typing import Any
 
-from anthropic import Anthropic
 
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-CACHE_DIR = HERE / "cache" / "queries_llm"
+CACHE_NS = "queries_llm"
 
 if str(HERE) not in sys.path:
     sys.path.insert(0, str(HERE))
 
 # Source-of-truth import. Mirrors how queries.py duplicates these inline.
 from queries import CANONICAL_EVENT_ROLES  # noqa: E402
+from regen_v3 import cache  # noqa: E402
+from regen_v3._llm_client import cached_system, cached_tools, get_client  # noqa: E402
+from regen_v3._llm_retry import with_retry  # noqa: E402
 
 MODEL = "claude-haiku-4-5"
 MAX_TOKENS = 1500
@@ -153,22 +154,14 @@ def _tool_schema() -> dict[str, Any]:
 
 
 def _canonical_record_key(record: dict) -> str:
-    """Cache key. Same record -> same hex digest -> same cache file."""
+    """Cache key. Same record -> same hex digest -> same cache entry."""
     blob = json.dumps(record, sort_keys=True, separators=(",", ":")).encode("utf-8")
     return hashlib.sha256(blob).hexdigest()
 
 
-def _cache_path(key: str) -> Path:
-    return CACHE_DIR / f"{key}.json"
-
-
 def _read_cache(key: str) -> list[dict] | None:
-    p = _cache_path(key)
-    if not p.exists():
-        return None
-    try:
-        payload = json.loads(p.read_text())
-    except (OSError, json.JSONDecodeError):
+    payload = cache.get(CACHE_NS, key)
+    if not isinstance(payload, dict):
         return None
     queries = payload.get("queries")
     if not isinstance(queries, list):
@@ -177,16 +170,11 @@ def _read_cache(key: str) -> list[dict] | None:
 
 
 def _write_cache(key: str, queries: list[dict]) -> None:
-    CACHE_DIR.mkdir(parents=True, exist_ok=True)
-    path = _cache_path(key)
-    payload = {
+    cache.put(CACHE_NS, key, {
         "input_key": key,
         "model": MODEL,
         "queries": queries,
-    }
-    tmp = path.with_suffix(".json.tmp")
-    tmp.write_text(json.dumps(payload, indent=2, sort_keys=True))
-    os.replace(tmp, path)
+    })
 
 
 def _build_user_prompt(record: dict) -> str:
@@ -230,30 +218,20 @@ def _validate_query(item: Any) -> dict | None:
 
 def _call_anthropic(record: dict) -> list[dict]:
     """One forced-tool-use call to Claude. Returns validated query dicts."""
-    api_key = os.environ.get("ANTHROPIC_API_KEY")
-    if not api_key:
-        raise RuntimeError("ANTHROPIC_API_KEY not set")
-
-    client = Anthropic(api_key=api_key)
+    client = get_client()  # raises RuntimeError if ANTHROPIC_API_KEY is unset
     tool = _tool_schema()
     user_prompt = _build_user_prompt(record)
 
-    response = client.messages.create(
+    response = with_retry(lambda: client.messages.create(
         model=MODEL,
         max_tokens=MAX_TOKENS,
         temperature=TEMPERATURE,
-        system=[
-            {
-                "type": "text",
-                "text": SYSTEM_PROMPT,
-                # Cache the system prompt across cohort subjects -> cheap repeat hits.
-                "cache_control": {"type": "ephemeral"},
-            }
-        ],
-        tools=[tool],
+        # Cache the system prompt + tool schema across cohort subjects -> cheap repeat hits.
+        system=cached_system(SYSTEM_PROMPT),
+        tools=cached_tools([tool]),
         tool_choice={"type": "tool", "name": "emit_queries"},
         messages=[{"role": "user", "content": user_prompt}],
-    )
+    ))
 
     raw: list[dict] = []
     for block in response.content:
@@ -307,7 +285,8 @@ def build_llm_query_plan(record: dict, *, refresh: bool = False) -> list[dict]:
 
     Each spec: ``{"role": <CANONICAL_EVENT_ROLE>, "query": <str>, "rationale": <str>}``.
 
-    Cached at ``regen_v3/cache/queries_llm/<sha256(canonical_record)>.json``.
+    Cached in the ``queries_llm`` namespace of ``regen_v3.cache``, keyed
+    ``sha256(canonical_record)``.
     Same record -> byte-identical output across runs.
 
     Returns ``[]`` (with a one-line skip log) if ``ANTHROPIC_API_KEY`` is
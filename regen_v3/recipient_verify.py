@@ -9,9 +9,9 @@ received are consistent with the gift amount, then stamp:
     recipient_filing_url         URL to the recipient's 990 on ProPublica
     recipient_verification_note  1-line explanation
 
-Caches:
-    cache/recipient_verify/name_<sha256(name)>.json   EIN lookup
-    cache/recipient_verify/<ein9>_<year>.json         filing snapshot
+Caches (`recipient_verify` namespace of regen_v3.cache):
+    name_<sha256(name)>   EIN lookup
+    <ein9>_<year>         filing snapshot
 """
 from __future__ import annotations
 
@@ -21,12 +21,9 @@ import re
 import sys
 from pathlib import Path
 
-import requests
-
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-CACHE_DIR = HERE / "cache" / "recipient_verify"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "recipient_verify"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
@@ -36,9 +33,10 @@ from categories.foundations import (  # noqa: E402
 )
 
 try:
-    from regen_v3._atomic import atomic_write_json  # type: ignore
+    from regen_v3 import _http, cache  # type: ignore
 except Exception:  # pragma: no cover - in-package fallback
-    from _atomic import atomic_write_json  # type: ignore
+    import _http  # type: ignore
+    import cache  # type: ignore
 
 _GIFT_ROLES = {"direct_gift", "corporate_gift"}
 _FOUNDATION_TRANSFER_ROLES = {"grant_out"}
@@ -73,36 +71,31 @@ def _is_nonspecific(name: str) -> bool:
     return any(tok in low for tok in _NONSPECIFIC)
 
 
-def _load(p: Path):
-    if not p.exists():
-        return None
-    try:
-        return json.loads(p.read_text())
-    except Exception:
-        return None
+def _load(key: str):
+    return cache.get(CACHE_NS, key)
 
 
-def _save(p: Path, data) -> None:
-    # Atomic write: many subjects share recipient names (Harvard,
-    # Stanford, Red Cross) and EIN-by-name lookups, so the
-    # name_<sha>.json and <ein>_<year>.json caches both see contention.
-    atomic_write_json(p, data)
+def _save(key: str, data, *, negative: bool = False, pin: bool = False) -> None:
+    # Many subjects share recipient names (Harvard, Stanford, Red Cross)
+    # and EIN-by-name lookups, so the name_<sha> and <ein>_<year> entries
+    # both see contention. The store's upsert is atomic.
+    cache.put(CACHE_NS, key, data, negative=negative, pin=pin)
 
 
 # ---------------------------------------------------------------------------
 # EIN resolution
 # ---------------------------------------------------------------------------
 
-def _ein_cache_path(name: str) -> Path:
+def _ein_cache_key(name: str) -> str:
     h = hashlib.sha256(name.strip().lower().encode()).hexdigest()[:32]
-    return CACHE_DIR / f"name_{h}.json"
+    return f"name_{h}"
 
 
 def _resolve_ein(recipient_name: str, *, refresh: bool = False) -> dict:
     """Return {ein, name, status, note}. status ∈ {resolved, ambiguous, not_found, skip}."""
-    cache_p = _ein_cache_path(recipient_name)
+    cache_key = _ein_cache_key(recipient_name)
     if not refresh:
-        cached = _load(cache_p)
+        cached = _load(cache_key)
         if cached is not None:
             return cached
 
@@ -110,7 +103,7 @@ def _resolve_ein(recipient_name: str, *, refresh: bool = False) -> dict:
     if not cleaned or _is_nonspecific(recipient_name):
         out = {"ein": "", "name": "", "status": "skip",
                "note": "nonspecific or aggregate recipient"}
-        _save(cache_p, out)
+        _save(cache_key, out)
         return out
 
     try:
@@ -148,7 +141,7 @@ def _resolve_ein(recipient_name: str, *, refresh: bool = False) -> dict:
             out = {"ein": "", "name": cleaned, "status": "ambiguous",
                    "note": f"{len(matches)} candidates, none with revenue data"}
 
-    _save(cache_p, out)
+    _save(cache_key, out, negative=out["status"] != "resolved")
     return out
 
 
@@ -156,31 +149,31 @@ def _resolve_ein(recipient_name: str, *, refresh: bool = False) -> dict:
 # 990 fetch
 # ---------------------------------------------------------------------------
 
-def _filing_cache_path(ein9: str, year) -> Path:
+def _filing_cache_key(ein9: str, year) -> str:
     suffix = "all" if year is None else str(int(year))
-    return CACHE_DIR / f"{ein9}_{suffix}.json"
+    return f"{ein9}_{suffix}"
 
 
 def _filing_snapshot(ein9: str, *, year=None, refresh: bool = False) -> dict:
     """Return a snapshot of the recipient's filings. With `year`, returns
     the matching filing (±1 yr tolerance); otherwise an org summary."""
-    cache_p = _filing_cache_path(ein9, year)
+    cache_key = _filing_cache_key(ein9, year)
     if not refresh:
-        cached = _load(cache_p)
+        cached = _load(cache_key)
         if cached is not None:
             return cached
 
     try:
         url = f"https://projects.propublica.org/nonprofits/api/v2/organizations/{ein9}.json"
-        resp = requests.get(url, timeout=15)
+        resp = _http.get(url, timeout=15)
         if resp.status_code != 200:
             out = {"ok": False, "error": f"http_{resp.status_code}"}
-            _save(cache_p, out)
+            _save(cache_key, out, negative=True)
             return out
         data = resp.json()
     except Exception as e:
         out = {"ok": False, "error": f"{type(e).__name__}: {e}"}
-        _save(cache_p, out)
+        _save(cache_key, out, negative=True)
         return out
 
     org = data.get("organization") or {}
@@ -192,7 +185,7 @@ def _filing_snapshot(ein9: str, *, year=None, refresh: bool = False) -> dict:
         "filing_url": f"https://projects.propublica.org/nonprofits/organizations/{ein9}",
     }
     if year is None:
-        _save(cache_p, out)
+        _save(cache_key, out)
         return out
 
     target = int(year)
@@ -204,7 +197,7 @@ def _filing_snapshot(ein9: str, *, year=None, refresh: bool = False) -> dict:
                 chosen = f
     if chosen is None:
         out["filing_found"] = False
-        _save(cache_p, out)
+        _save(cache_key, out, negative=True)
         return out
 
     # 990 → totcntrbgfts; 990-PF → grscontrgifts; 990-EZ → totcntrbs.
@@ -217,7 +210,9 @@ def _filing_snapshot(ein9: str, *, year=None, refresh: bool = False) -> dict:
         "contributions_received": float(contrib or 0),
         "total_revenue": float(chosen.get("totrevenue") or 0),
     })
-    _save(cache_p, out)
+    # The target year's own return is final once filed; a ±1 stand-in may
+    # be superseded when the exact year lands, so it stays evictable.
+    _save(cache_key, out, pin=out["fiscal_year"] == target)
     return out
 
 
@@ -2,7 +2,7 @@
 
 Reads existing data/<subject>.v3.json records, identifies entries flagged
 `source_verification_status: dead_link_likely_fabricated`, and surfaces
-candidate replacement URLs from regen_v3/cache/search/.
+candidate replacement URLs from the regen_v3 search cache.
 
 Output: regen_v3/REPLACEMENT_CANDIDATES.md — one section per affected
 subject with the broken URL, the original event/source it cited, and
@@ -23,9 +23,14 @@ from urllib.parse import urlparse
 HERE = Path(__file__).parent
 ROOT = HERE.parent
 DATA_DIR = ROOT / "data"
-SEARCH_CACHE = HERE / "cache" / "search"
+SEARCH_NS = "search"
 OUT_PATH = HERE / "REPLACEMENT_CANDIDATES.md"
 
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from regen_v3 import cache  # noqa: E402
+
 # Domains whose URLs we trust most for sourcing dollar-bearing events.
 HIGH_SIGNAL = (
     "philanthropy.com",
@@ -115,15 +120,8 @@ def _fabricated_entries(rec: dict) -> list[dict]:
 
 def _load_subject_caches(subject_id: str) -> list[dict]:
     """Load all search-cache entries whose query mentions the subject's tokens.
-    Cheap heuristic: just load every cache file; we'll match by query text."""
-    out = []
-    for fp in SEARCH_CACHE.glob("*.json"):
-        try:
-            d = json.loads(fp.read_text())
-        except Exception:
-            continue
-        out.append(d)
-    return out
+    Cheap heuristic: just load every cache entry; we'll match by query text."""
+    return [d for d in cache.values(SEARCH_NS) if isinstance(d, dict)]
 
 
 def _candidate_urls(rec: dict, caches: list[dict], target_amount: int | None,
@@ -135,13 +133,13 @@ def _candidate_urls(rec: dict, caches: list[dict], target_amount: int | None,
 
     seen: set[str] = set()
     rows: list[tuple[int, str, str, str]] = []
-    for cache in caches:
-        q = cache.get("query") or ""
+    for entry in caches:
+        q = entry.get("query") or ""
         # Crude relevance: at least one of the subject's name tokens in the query.
         ql = q.lower()
         if not any(t in ql for t in tokens):
             continue
-        for r in cache.get("results") or []:
+        for r in entry.get("results") or []:
             url = r.get("url") or ""
             if not url or url in seen:
                 continue
@@ -210,7 +208,7 @@ def main(argv: list[str] | None = None) -> int:
 
     header = (
         "# Fabricated-URL Replacement Candidates\n\n"
-        f"Generated by `regen_v3.report` from {SEARCH_CACHE.relative_to(ROOT)}.\n\n"
+        f"Generated by `regen_v3.report` from the `{SEARCH_NS}` cache namespace.\n\n"
         "For each event/source flagged `dead_link_likely_fabricated`, this lists\n"
         "high-signal replacement candidates pulled from the regen_v3 search cache.\n"
         "Score = domain reputation (0-2) + dollar-amount-mentioned (0-1) + year-match (0-1)\n"
@@ -1,7 +1,8 @@
-"""Brave Search REST wrapper with disk-cache.
+"""Brave Search REST wrapper with a persistent cache.
 
 Stage 2 of the regen_v3 pipeline (see SPEC.md). Deterministic by design:
-sha256(normalized query) keys the cache; same input -> identical JSON.
+sha256(normalized query) keys the `search` namespace of `regen_v3.cache`;
+same input -> identical JSON.
 
 No CLI here. The host (`regen_v3.cli`) owns argument parsing and
 orchestration. This module exposes two callables:
@@ -12,7 +13,6 @@ orchestration. This module exposes two callables:
 from __future__ import annotations
 
 import hashlib
-import json
 import os
 import time
 from datetime import datetime, timezone
@@ -24,10 +24,9 @@ import requests
 
 
 HERE = Path(__file__).parent
-CACHE_DIR = HERE / "cache" / "search"
+CACHE_NS = "search"
 BRAVE_ENDPOINT = "https://api.search.brave.com/res/v1/web/search"
 PROVIDER = "brave-search-api-v1"
-RATE_LIMIT_SECONDS = 1.05  # Brave free tier: 1 req/sec; pad slightly.
 
 # Reuse Safari UA pattern from check_urls.py so anti-bot defenses don't
 # distort what Brave returns to us. Brave itself only needs the auth header,
@@ -99,6 +98,7 @@ BLOCKLIST_DOMAINS: frozenset[str] = frozenset({
 # Re-exported from `_fabricated` so search.py and merge.py share one
 # canonical refusal list. To add or remove a fabrication, edit DEAD_URLS.md
 # (the loader picks it up at next interpreter start).
+from regen_v3 import _http, _urlcanon, cache  # noqa: E402
 from regen_v3._fabricated import LIKELY_FABRICATED as FABRICATED_URLS  # noqa: E402
 
 
@@ -133,10 +133,6 @@ def _cache_key(query: str) -> str:
     return hashlib.sha256(normalized.encode("utf-8")).hexdigest()
 
 
-def _cache_path(key: str) -> Path:
-    return CACHE_DIR / f"{key}.json"
-
-
 def _api_key() -> str | None:
     """Accept either BRAVE_SEARCH_API_KEY (canonical) or BRAVE_API_KEY (the
     name used by Jonah's brave-search MCP config). First non-empty wins."""
@@ -147,54 +143,9 @@ def _api_key() -> str | None:
     return None
 
 
-def _atomic_write_json(path: Path, payload: dict[str, Any]) -> None:
-    path.parent.mkdir(parents=True, exist_ok=True)
-    tmp = path.with_suffix(path.suffix + ".tmp")
-    # sort_keys for byte-identical re-runs on cache-hit re-serialization callers.
-    tmp.write_text(json.dumps(payload, indent=2, sort_keys=True), encoding="utf-8")
-    os.replace(tmp, path)
-
-
-# Process-local timestamp of the last live (non-cached) Brave call. Used to
-# enforce the 1 req/sec rate limit only when we actually hit the network.
-_last_live_call_ts: float = 0.0
-
-# Shared cross-worker rate-limit state when running under multiprocessing.
-# batch_runner.py installs an mp.Value (timestamp) + mp.Lock via the pool
-# initializer so all workers share a single Brave 1-req/sec budget. Falls
-# through to the local global when workers=1.
-_shared_ts = None  # type: ignore
-_shared_lock = None  # type: ignore
-
-
-def install_shared_rate_limiter(ts_value, lock) -> None:
-    """Called by parent via Pool initializer. Workers atomically read+update
-    the shared mp.Value timestamp instead of the local global."""
-    global _shared_ts, _shared_lock
-    _shared_ts = ts_value
-    _shared_lock = lock
-
-
-def _rate_limit() -> None:
-    global _last_live_call_ts
-    if _shared_ts is not None and _shared_lock is not None:
-        # Cross-worker: lock + read shared ts + sleep + update.
-        with _shared_lock:
-            now = time.monotonic()
-            elapsed = now - _shared_ts.value
-            if _shared_ts.value > 0 and elapsed < RATE_LIMIT_SECONDS:
-                time.sleep(RATE_LIMIT_SECONDS - elapsed)
-            _shared_ts.value = time.monotonic()
-        return
-    now = time.monotonic()
-    elapsed = now - _last_live_call_ts
-    if _last_live_call_ts > 0 and elapsed < RATE_LIMIT_SECONDS:
-        time.sleep(RATE_LIMIT_SECONDS - elapsed)
-    _last_live_call_ts = time.monotonic()
-
-
 def _call_brave(query: str, count: int, api_key: str) -> list[dict[str, Any]]:
-    _rate_limit()
+    # Brave's 1 req/sec budget is the "brave" bucket in _ratelimit, taken by
+    # _http per attempt and shared across batch_runner workers.
     headers = {
         **BASE_HEADERS,
         "X-Subscription-Token": api_key,
@@ -207,7 +158,7 @@ def _call_brave(query: str, count: int, api_key: str) -> list[dict[str, Any]]:
     last_exc: Exception | None = None
     for attempt_timeout in (15, 30):
         try:
-            resp = requests.get(
+            resp = _http.get(
                 BRAVE_ENDPOINT, headers=headers, params=params, timeout=attempt_timeout
             )
             resp.raise_for_status()
@@ -233,33 +184,33 @@ def _call_brave(query: str, count: int, api_key: str) -> list[dict[str, Any]]:
 def search(query: str, *, count: int = 10, refresh: bool = False) -> dict[str, Any]:
     """Cached Brave Search lookup. See module docstring for cache shape."""
     key = _cache_key(query)
-    path = _cache_path(key)
+    cached = cache.get(CACHE_NS, key)
 
-    if path.exists() and not refresh:
-        return json.loads(path.read_text(encoding="utf-8"))
+    if cached is not None and not refresh:
+        return cached
 
     api_key = _api_key()
     if not api_key:
         # Permitted fallback: if a refresh was requested but we have no key,
         # serve the cached copy if one exists.
-        if path.exists():
-            return json.loads(path.read_text(encoding="utf-8"))
+        if cached is not None:
+            return cached
         raise RuntimeError(
             f"BRAVE_SEARCH_API_KEY (or BRAVE_API_KEY) not set and no cache for query: {query!r}"
         )
 
     results = _call_brave(query, count=count, api_key=api_key)
-    # Cache files are content-addressed by query hash; we deliberately
+    # Cache entries are content-addressed by query hash; we deliberately
     # omit `retrieved_at` from the payload so two cohort runs produce
     # byte-identical caches when the upstream returns the same results.
-    # If you need fetch-time provenance, the file's mtime carries it.
+    # If you need fetch-time provenance, the entry's updated_at carries it.
     payload = {
         "query": query,
         "results": results,
         "_cache_key": key,
         "_provider": PROVIDER,
     }
-    _atomic_write_json(path, payload)
+    cache.put(CACHE_NS, key, payload)
     return payload
 
 
@@ -270,7 +221,9 @@ def filter_results(
 
     Drop precedence (highest first): exact fabricated-URL match, blocklisted
     domain. Allowlisted domains get a free pass and an `_allowlisted` marker.
-    Everything else passes through unchanged.
+    Every kept result gains `canonical_url` (`_urlcanon.canonical`), the
+    key downstream dedup and caches use; `url` stays as returned, for
+    fetching and citation.
     """
     kept: list[dict[str, Any]] = []
     dropped: list[dict[str, Any]] = []
@@ -291,13 +244,11 @@ def filter_results(
             dropped.append(d)
             continue
 
+        k = dict(r)
+        k["canonical_url"] = _urlcanon.canonical(url)
         if root in ALLOWLIST_DOMAINS or host in ALLOWLIST_DOMAINS or host.endswith(".edu"):
-            k = dict(r)
             k["_allowlisted"] = True
-            kept.append(k)
-            continue
-
-        kept.append(dict(r))
+        kept.append(k)
     return kept, dropped
 
 
@@ -341,6 +292,7 @@ def _run_filter_test() -> None:
 
     pass_through = next(r for r in kept if "example.com" in r["url"])
     assert "_allowlisted" not in pass_through, "example.com should pass through"
+    assert forbes["canonical_url"] == "https://forbes.com/profile/henry-kravis"
 
     blocklisted = next(r for r in dropped if "insidephilanthropy.com" in r["url"])
     assert blocklisted["_dropped_reason"].startswith("blocklisted_domain"), \
@@ -358,8 +310,7 @@ def _run_filter_test() -> None:
 def _run_live_tests() -> None:
     q = "Henry Kravis foundation 990-PF"
     key = _cache_key(q)
-    path = _cache_path(key)
-    pre_existed = path.exists()
+    pre_existed = cache.contains(CACHE_NS, key)
 
     t0 = time.monotonic()
     result1 = search(q)
@@ -385,8 +336,8 @@ if __name__ == "__main__":
 
     if not _api_key():
         # Per the contract: degrade gracefully when key is absent.
-        any_cached = any(CACHE_DIR.glob("*.json")) if CACHE_DIR.exists() else False
+        any_cached = cache.counts().get(CACHE_NS, 0) > 0
         print("[skip] BRAVE_SEARCH_API_KEY/BRAVE_API_KEY not set — skipping live search tests. "
-              f"(cache files present: {any_cached})")
+              f"(cache entries present: {any_cached})")
     else:
         _run_live_tests()
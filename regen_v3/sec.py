@@ -11,8 +11,9 @@ plus an opportunistic SEC EDGAR atom-feed search by name. Subjects with no
 public-company insider role (private fund managers, family offices, etc.)
 return zero candidates.
 
-Cache: regen_v3/cache/sec/<cik>.json — same CIK never re-parses Form 4s
-unless `refresh=True`. Each cache file is a list of gift-transaction dicts.
+Cache: `sec` namespace of regen_v3.cache, keyed <cik> — same CIK never
+re-parses Form 4s unless `refresh=True`. Each entry is a list of
+gift-transaction dicts.
 
 Reproducibility: SEC filings are append-only and historical filings never
 change, so a cached run always reproduces.
@@ -21,14 +22,12 @@ from __future__ import annotations
 
 import json
 import sys
-import time
 from dataclasses import asdict
 from pathlib import Path
 
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-CACHE_DIR = HERE / "cache" / "sec"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "sec"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
@@ -41,9 +40,9 @@ from categories.securities import (  # noqa: E402
 )
 
 try:
-    from regen_v3._atomic import atomic_write_json  # type: ignore
+    from regen_v3 import cache  # type: ignore
 except Exception:  # pragma: no cover - in-package fallback
-    from _atomic import atomic_write_json  # type: ignore
+    import cache  # type: ignore
 
 # Price lookup for Form 4 G-transactions (which report $0/share).
 # Self-contained: if yfinance / network are unavailable, value_gift()
@@ -60,24 +59,16 @@ _FORM4_LIMIT = 100  # how many recent filings to scan per CIK
 _GIFT_PARSE_LIMIT = 60  # how many of those to parse for code-G transactions
 
 
-def _cache_path(cik: str) -> Path:
-    return CACHE_DIR / f"{cik}.json"
-
-
 def _load_cache(cik: str) -> list[dict] | None:
-    p = _cache_path(cik)
-    if not p.exists():
-        return None
-    try:
-        return json.loads(p.read_text())
-    except Exception:
-        return None
+    return cache.get(CACHE_NS, cik)
 
 
 def _save_cache(cik: str, gifts: list[dict]) -> None:
-    # Atomic write: two subjects who share a CIK (co-founders, family
-    # members at the same issuer) can race on this cache.
-    atomic_write_json(_cache_path(cik), gifts)
+    # Two subjects who share a CIK (co-founders, family members at the
+    # same issuer) can race on this entry; the store's upsert is atomic.
+    # Pinned: parsed Form 4 filings are authoritative and slow to rebuild
+    # (EDGAR's 10 req/s cap); `refresh=True` is how new filings get picked up.
+    cache.put(CACHE_NS, cik, gifts, pin=True)
 
 
 def _resolve_cik(record: dict) -> str | None:
@@ -143,7 +134,6 @@ def fetch_gifts(cik: str, *, refresh: bool = False) -> list[dict]:
                 continue
             seen.add(key)
             all_gifts.append(d)
-        time.sleep(0.15)  # SEC fair-use rate
 
     _save_cache(cik, all_gifts)
     return all_gifts
@@ -8,12 +8,15 @@ closing price on the transaction date. This module provides:
   get_close_price(ticker, date)            -> float | None
   value_gift(gift)                         -> float | None
 
-Caches:
-  regen_v3/cache/tickers/<sha1(source_url)>.json   -> {"ticker": "META"}
-  regen_v3/cache/prices/<TICKER>_<YYYY-MM-DD>.json -> {"close": 596.6, ...}
+Caches (namespaces of regen_v3.cache):
+  tickers / <sha1(source_url)>       -> {"ticker": "META"}
+  prices  / <TICKER>_<YYYY-MM-DD>    -> {"close": 596.6, ...}
 
-Determinism: once cached, (ticker, date) always returns the same close.
-We cache misses too (so we don't keep retrying the same dead ticker).
+Determinism: once cached, (ticker, date) always returns the same close —
+found prices are pinned in the store. Misses are cached as negative
+entries (so we don't keep retrying the same dead ticker) and expire after
+the `prices.negative` / `tickers.negative` TTL, so a provider outage
+doesn't leave a permanent hole.
 
 Provider order:
   1. yfinance (no API key). May rate-limit; we tolerate failures.
@@ -26,21 +29,15 @@ to Stooq directly. The pipeline never breaks on missing deps.
 from __future__ import annotations
 
 import hashlib
-import json
 import re
-import time
 from datetime import datetime, timedelta
-from pathlib import Path
 from typing import Optional
 from xml.etree import ElementTree as ET
 
-import requests
+from regen_v3 import _http, cache
 
-HERE = Path(__file__).parent
-CACHE_PRICES = HERE / "cache" / "prices"
-CACHE_TICKERS = HERE / "cache" / "tickers"
-CACHE_PRICES.mkdir(parents=True, exist_ok=True)
-CACHE_TICKERS.mkdir(parents=True, exist_ok=True)
+PRICES_NS = "prices"
+TICKERS_NS = "tickers"
 
 _USER_AGENT = "Scrooge Research Bot (research@example.com)"
 
@@ -120,24 +117,18 @@ def _ticker_cache_key(source_url: str) -> str:
 
 
 def _load_ticker_cache(source_url: str) -> Optional[dict]:
-    p = CACHE_TICKERS / f"{_ticker_cache_key(source_url)}.json"
-    if not p.exists():
-        return None
-    try:
-        return json.loads(p.read_text())
-    except Exception:
-        return None
+    return cache.get(TICKERS_NS, _ticker_cache_key(source_url))
 
 
 def _save_ticker_cache(source_url: str, payload: dict) -> None:
-    p = CACHE_TICKERS / f"{_ticker_cache_key(source_url)}.json"
-    p.write_text(json.dumps(payload, indent=2))
+    cache.put(TICKERS_NS, _ticker_cache_key(source_url), payload,
+              negative=payload.get("ticker") is None)
 
 
 def _fetch_ticker_from_form4(source_url: str) -> Optional[str]:
     """Read the Form 4 XML and return its issuerTradingSymbol."""
     try:
-        resp = requests.get(
+        resp = _http.get(
             source_url,
             headers={"User-Agent": _USER_AGENT},
             timeout=15,
@@ -172,7 +163,6 @@ def resolve_ticker(company: str, source_url: str = "") -> Optional[str]:
     # 3. Fetch the Form 4 XML and read issuerTradingSymbol
     t = _fetch_ticker_from_form4(source_url)
     _save_ticker_cache(source_url, {"ticker": t, "company": company})
-    time.sleep(0.15)  # SEC fair-use rate
     return t
 
 
@@ -180,23 +170,19 @@ def resolve_ticker(company: str, source_url: str = "") -> Optional[str]:
 # Price lookup
 # ---------------------------------------------------------------------------
 
-def _price_cache_path(ticker: str, date: str) -> Path:
+def _price_cache_key(ticker: str, date: str) -> str:
     safe_ticker = re.sub(r"[^A-Z0-9.\-]", "_", ticker.upper())
-    return CACHE_PRICES / f"{safe_ticker}_{date}.json"
+    return f"{safe_ticker}_{date}"
 
 
 def _load_price_cache(ticker: str, date: str) -> Optional[dict]:
-    p = _price_cache_path(ticker, date)
-    if not p.exists():
-        return None
-    try:
-        return json.loads(p.read_text())
-    except Exception:
-        return None
+    return cache.get(PRICES_NS, _price_cache_key(ticker, date))
 
 
 def _save_price_cache(ticker: str, date: str, payload: dict) -> None:
-    _price_cache_path(ticker, date).write_text(json.dumps(payload, indent=2))
+    found = payload.get("close") is not None
+    cache.put(PRICES_NS, _price_cache_key(ticker, date), payload,
+              negative=not found, pin=found)
 
 
 def _next_business_day(date_str: str, max_step: int = 5) -> list[str]:
@@ -235,7 +221,7 @@ def _stooq_lookup(ticker: str, date: str) -> Optional[float]:
     sym = ticker.lower().replace("-", "-") + ".us"
     url = f"https://stooq.com/q/d/l/?s={sym}&i=d"
     try:
-        resp = requests.get(url, timeout=15, headers={"User-Agent": _USER_AGENT})
+        resp = _http.get(url, timeout=15, headers={"User-Agent": _USER_AGENT})
         if resp.status_code != 200 or not resp.text:
             return None
         lines = resp.text.strip().splitlines()
@@ -261,8 +247,8 @@ def _stooq_lookup(ticker: str, date: str) -> Optional[float]:
 def get_close_price(ticker: str, date: str) -> Optional[float]:
     """Return historical closing price for `ticker` at-or-after `date`.
 
-    Cached forever per (ticker, date). Misses are also cached so we
-    don't hammer the providers on every run."""
+    Cached per (ticker, date): found closes are pinned, misses expire
+    after the negative TTL so we don't hammer the providers every run."""
     if not ticker or not date or len(date) < 10:
         return None
     date = date[:10]
@@ -295,8 +281,8 @@ def get_close_price(ticker: str, date: str) -> Optional[float]:
 
 def value_gift(gift: dict) -> Optional[float]:
     """Return the USD value of a Form 4 G-transaction, or None if we
-    can't price it. The input dict is one entry from the sec.py cache
-    (`regen_v3/cache/sec/<cik>.json`)."""
+    can't price it. The input dict is one gift from a sec.py cache entry
+    (`sec` namespace, keyed <cik>)."""
     shares = gift.get("shares") or 0
     if shares <= 0:
         return None
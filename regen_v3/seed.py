@@ -41,12 +41,13 @@ from typing import Any
 HERE = Path(__file__).parent
 ROOT = HERE.parent
 DATA_DIR = ROOT / "data"
-CACHE_DIR = HERE / "cache" / "seed"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "seed"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
+from regen_v3 import cache  # noqa: E402
+
 try:
     import anthropic
 except ImportError:  # pragma: no cover
@@ -173,10 +174,6 @@ def _cache_key(name: str, nw_b: float, country: str) -> str:
     return hashlib.sha256(raw.encode()).hexdigest()
 
 
-def _cache_path(name: str, nw_b: float, country: str) -> Path:
-    return CACHE_DIR / f"{_cache_key(name, nw_b, country)}.json"
-
-
 def _have_key() -> bool:
     return bool(os.environ.get("ANTHROPIC_API_KEY"))
 
@@ -185,18 +182,18 @@ def call_llm_seed(
     name: str, nw_b: float, country: str, *, refresh: bool = False
 ) -> dict | None:
     """Return the LLM-extracted seed dict, or None on failure."""
-    cache_path = _cache_path(name, nw_b, country)
-    if not refresh and cache_path.exists():
-        try:
-            return json.loads(cache_path.read_text())
-        except Exception:
-            pass
+    cache_key = _cache_key(name, nw_b, country)
+    if not refresh:
+        cached = cache.get(CACHE_NS, cache_key)
+        if cached is not None:
+            return cached
 
     if not _have_key() or anthropic is None:
         print("  [seed] ANTHROPIC_API_KEY not set — cannot LLM-seed.")
         return None
 
-    client = anthropic.Anthropic()
+    from regen_v3._llm_client import cached_system, cached_tools, get_client
+    client = get_client()
     user_prompt = (
         f"NAME: {name}\n"
         f"NET WORTH: ${nw_b:.1f}B\n"
@@ -209,12 +206,12 @@ def call_llm_seed(
             model=MODEL,
             max_tokens=MAX_TOKENS,
             temperature=0,
-            system=_SYSTEM_PROMPT,
-            tools=[{
+            system=cached_system(_SYSTEM_PROMPT),
+            tools=cached_tools([{
                 "name": "record_seed",
                 "description": "Emit the seed record.",
                 "input_schema": _tool_schema(),
-            }],
+            }]),
             tool_choice={"type": "tool", "name": "record_seed"},
             messages=[{"role": "user", "content": user_prompt}],
         ))
@@ -227,7 +224,7 @@ def call_llm_seed(
         print("  [seed] no tool_use block in response")
         return None
     seed = dict(block.input)
-    cache_path.write_text(json.dumps(seed, indent=2))
+    cache.put(CACHE_NS, cache_key, seed)
     return seed
 
 
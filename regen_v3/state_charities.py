@@ -24,7 +24,7 @@ Confidence:
              searched token, but FEIN didn't reconcile).
 
 Cache:
-  regen_v3/cache/state_charities/<sha>.json
+  `state_charities` namespace of regen_v3.cache.
   Key = sha256(state + "|" + lowercased search term). Same subject +
   same caches → identical output. Failures (WAF / 403 / timeout) write
   an empty cache so re-runs don't hammer the registry; pass
@@ -42,7 +42,6 @@ import json
 import re
 import ssl
 import sys
-import time
 import urllib.error
 import urllib.parse
 import urllib.request
@@ -80,8 +79,7 @@ except ImportError:  # pragma: no cover
 
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-CACHE_DIR = HERE / "cache" / "state_charities"
-CACHE_DIR.mkdir(parents=True, exist_ok=True)
+CACHE_NS = "state_charities"
 
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
@@ -89,9 +87,13 @@ if str(ROOT) not in sys.path:
 from categories.foundations import normalize_ein  # noqa: E402
 
 try:
-    from regen_v3._atomic import atomic_write_json  # type: ignore
+    from regen_v3 import _ratelimit, cache  # type: ignore
 except Exception:  # pragma: no cover - in-package fallback
-    from _atomic import atomic_write_json  # type: ignore
+    import _ratelimit  # type: ignore
+    import cache  # type: ignore
+
+if requests is not None:
+    from regen_v3 import _http  # noqa: E402
 
 # ---------------------------------------------------------------------------
 # HTTP
@@ -102,7 +104,6 @@ _UA = (
     "AppleWebKit/537.36 (KHTML, like Gecko) Chrome/124.0 Safari/537.36"
 )
 _TIMEOUT = 25
-_PAUSE = 0.6   # courtesy delay between live calls
 _MAX_HITS_PER_TERM = 12  # cap so a generic surname doesn't flood sources_all
 
 # Public landing pages used as `source_url` for emitted candidates. The
@@ -129,24 +130,16 @@ def _cache_key(state: str, term: str) -> str:
     return hashlib.sha256(f"{state.upper()}|{term.strip().lower()}".encode()).hexdigest()
 
 
-def _cache_path(state: str, term: str) -> Path:
-    return CACHE_DIR / f"{_cache_key(state, term)}.json"
-
-
 def _load_cache(state: str, term: str) -> dict | None:
-    p = _cache_path(state, term)
-    if not p.exists():
-        return None
-    try:
-        return json.loads(p.read_text())
-    except Exception:
-        return None
+    return cache.get(CACHE_NS, _cache_key(state, term))
 
 
 def _save_cache(state: str, term: str, payload: dict) -> None:
-    # Atomic write: cache key is sha(state|term); two subjects sharing
-    # a surname or org-prefix search term will race here.
-    atomic_write_json(_cache_path(state, term), payload)
+    # Cache key is sha(state|term); two subjects sharing a surname or
+    # org-prefix search term will race here. The store's upsert is atomic.
+    # Unreachable-registry answers expire (`state_charities.negative` TTL).
+    cache.put(CACHE_NS, _cache_key(state, term), payload,
+              negative=not payload.get("ok"))
 
 
 # ---------------------------------------------------------------------------
@@ -282,6 +275,8 @@ def _ca_http(url: str, *, data: bytes | None = None, cookie: str | None = None)
     if cookie:
         headers["Cookie"] = cookie
     req = urllib.request.Request(url, data=data, headers=headers, method=("POST" if data else "GET"))
+    # urllib bypasses _http, so take the registry's rate-limit token here.
+    _ratelimit.acquire("ca_registry", "regen_v3.state_charities._ca_http")
     with urllib.request.urlopen(req, context=_CA_TLS_CTX, timeout=_TIMEOUT) as resp:
         body = resp.read().decode("utf-8", "ignore")
         new_cookie = resp.headers.get("Set-Cookie")
@@ -384,7 +379,7 @@ def _ny_search(term: str) -> tuple[bool, list[dict]]:
         return False, []
     url = _NY_API_TMPL.format(q=quote_plus(term))
     try:
-        r = requests.get(
+        r = _http.get(
             url,
             headers={
                 "User-Agent": _UA,
@@ -508,8 +503,8 @@ def _deeplink_fallback(state: str, subject_name: str, term: str) -> dict:
 
 def _fetch_state(state: str, term: str, *, refresh: bool) -> dict:
     """Return cached payload {ok, rows} for (state, term). Live call on
-    miss or refresh; failures cache as {ok: False, rows: []} so reruns
-    don't re-hammer the registry. The collector emits a deep-link
+    miss or refresh; failures cache as {ok: False, rows: []} for the
+    negative TTL so reruns don't re-hammer the registry. The collector emits a deep-link
     fallback iff *every* term for a state failed to reach the registry."""
     if not refresh:
         cached = _load_cache(state, term)
@@ -552,9 +547,7 @@ def collect_candidates(record: dict, *, refresh: bool = False) -> list[dict]:
     network_ok: dict[str, bool] = {"CA": False, "NY": False}
 
     for state in ("CA", "NY"):
-        for i, term in enumerate(terms):
-            if i > 0:
-                time.sleep(_PAUSE)
+        for term in terms:
             payload = _fetch_state(state, term, refresh=refresh)
             if payload.get("ok"):
                 network_ok[state] = True
@@ -1,9 +1,17 @@
 """URL liveness pre-filter for regen_v3.
 
-Uses check_urls.check_one (browser UA, HEAD-with-GET-fallback) to filter the
-search-result URL stream before extraction. Dead URLs are not extracted from;
-they get annotated with a `dead_link_<reason>` status string for downstream
-provenance.
+Filters the search-result URL stream before extraction. `verify_urls` and
+the streaming `Verifier` (cli.run_one) probe URLs on a `_liveness.Prober`:
+one asyncio loop, hundreds of probes in flight, a few per host, browser UA
+with HEAD-then-GET. The prober remembers each status in the `liveness`
+namespace of `regen_v3.cache` for a status-dependent TTL (30 days for
+2xx/3xx, hours for TIMEOUT/CONN), so re-verifying a cohort's allowlisted
+forbes / nytimes / sec.gov URLs costs no requests until they expire.
+`max_age=` (seconds) narrows that per call; `max_age=0` re-checks. Only
+the dead URLs go on to the Wayback lookup. They are not extracted from;
+each is annotated with a `dead_link_<reason>` status string for
+downstream provenance. `verify_url` is the blocking single-URL form
+(check_urls.check_cached).
 
 Reason mapping mirrors DEAD_URLS.md vocabulary:
   404                -> dead_link_rotted
@@ -12,38 +20,57 @@ Reason mapping mirrors DEAD_URLS.md vocabulary:
   401/403/406/429    -> alive (bot-blocked or paywalled — URL exists)
   any 2xx/3xx        -> alive
 
-Wayback fallback: any URL that fails the live check is queried against
-the Wayback Machine `available` API. If a snapshot exists, the URL is
-promoted to alive with `wayback_url` set; the snapshot URL becomes the
-canonical citation downstream. Lookups are cached at
-`regen_v3/cache/wayback/<sha256(url)>.json` so the same URL is queried
-once and never again unless `refresh=True`.
+Wayback fallback: any URL that fails the live check is looked up in the
+Wayback Machine CDX index (newest 2xx capture). If a snapshot exists, the
+URL is promoted to alive with `wayback_url` set; the snapshot URL becomes
+the canonical citation downstream. `Verifier` collects a run's dead URLs
+and resolves them together (`lookup_wayback_many`: concurrent CDX queries
+under the shared "wayback" rate limit, results written back in bulk)
+instead of one serial round trip per URL. Lookups are cached in the
+`wayback` namespace of `regen_v3.cache`, keyed sha256(url), so the same URL
+is queried once and never again unless `refresh=True`.
+
+Prefer-snapshot mode (`prefer_snapshot=True`, or
+REGEN_WAYBACK_PREFER_SNAPSHOT=1): URLs on a host that already has
+known-rotted URLs (merge.DEAD_LINK_ROTTED) are looked up in Wayback
+first. A snapshot skips the live check (status ROTTED, cited via the
+snapshot); no snapshot means the URL is probed like any other, since the
+host list also covers live sites (cnbc.com, philanthropy.com) whose fresh
+articles aren't archived yet.
 """
 from __future__ import annotations
 
 import concurrent.futures as cf
+import functools
 import hashlib
-import json
+import os
 import sys
 from pathlib import Path
-from typing import Iterable
-
-import requests
+from typing import Callable, Iterable
 
 # Reuse the canonical liveness checker from check_urls.py at the repo root.
 HERE = Path(__file__).parent
 ROOT = HERE.parent
-WAYBACK_CACHE = HERE / "cache" / "wayback"
-WAYBACK_CACHE.mkdir(parents=True, exist_ok=True)
+WAYBACK_NS = "wayback"
 if str(ROOT) not in sys.path:
     sys.path.insert(0, str(ROOT))
 
-from check_urls import check_one  # noqa: E402
+from check_urls import check_cached  # noqa: E402
+from regen_v3 import _http, _liveness, _urlcanon, cache  # noqa: E402
 
 
 _ALIVE_NONOK_CODES = frozenset({401, 403, 406, 429})  # bot/paywall, URL real
-_WAYBACK_ENDPOINT = "https://archive.org/wayback/available"
+_WAYBACK_CDX = "https://web.archive.org/cdx/search/cdx"
 _WAYBACK_TIMEOUT = 8  # seconds
+# Concurrent CDX queries in `lookup_wayback_many`; the shared "wayback"
+# token bucket in _ratelimit sets the actual request rate.
+WAYBACK_WORKERS = 8
+# Try Wayback before the live check for hosts with known-rotted URLs (see
+# `rotted_hosts`); probe as usual when there is no snapshot.
+PREFER_SNAPSHOT = os.environ.get("REGEN_WAYBACK_PREFER_SNAPSHOT", "") not in ("", "0")
+# Status recorded for URLs not probed because PREFER_SNAPSHOT found a
+# snapshot; classify() maps it to dead_link_rotted.
+ROTTED = "ROTTED"
 
 
 def classify(status: int | str) -> tuple[bool, str | None]:
@@ -66,99 +93,252 @@ def classify(status: int | str) -> tuple[bool, str | None]:
     return False, f"dead_link_{str(status).lower()}"
 
 
-def _wayback_cache_path(url: str) -> Path:
-    h = hashlib.sha256(url.encode("utf-8")).hexdigest()
-    return WAYBACK_CACHE / f"{h}.json"
+def _wayback_cache_key(url: str) -> str:
+    return hashlib.sha256(_urlcanon.canonical(url).encode("utf-8")).hexdigest()
 
 
-def lookup_wayback(url: str, *, refresh: bool = False) -> str | None:
-    """Return a Wayback Machine snapshot URL for `url`, or None.
+@functools.lru_cache(maxsize=1)
+def rotted_hosts() -> frozenset[str]:
+    """Canonical hosts of the URLs in merge.DEAD_LINK_ROTTED."""
+    from regen_v3.merge import DEAD_LINK_ROTTED
 
-    Caches result indefinitely — Wayback snapshots don't disappear once
-    written, so a "found" or "missing" answer is stable. Network failures
-    are NOT cached so they can be retried on next run.
-    """
-    cache_path = _wayback_cache_path(url)
-    if not refresh and cache_path.exists():
-        try:
-            cached = json.loads(cache_path.read_text())
-            return cached.get("wayback_url")
-        except Exception:
-            pass
-
-    try:
-        resp = requests.get(
-            _WAYBACK_ENDPOINT,
-            params={"url": url},
-            timeout=_WAYBACK_TIMEOUT,
-            headers={"User-Agent": "scrooge-regen-v3 (research)"},
-        )
-        if resp.status_code != 200:
-            return None
-        data = resp.json()
-        snap = (data.get("archived_snapshots") or {}).get("closest") or {}
-        if snap.get("available") and snap.get("url"):
-            wb_url = snap["url"]
-            # Normalize Wayback URLs to https; their default mix of http/https
-            # is annoying for downstream exact-match dedupe.
-            if wb_url.startswith("http://web.archive.org/"):
-                wb_url = "https" + wb_url[4:]
-            cache_path.write_text(json.dumps({"src": url, "wayback_url": wb_url}))
-            return wb_url
-        # Snapshot doesn't exist — cache the negative answer too.
-        cache_path.write_text(json.dumps({"src": url, "wayback_url": None}))
-        return None
-    except Exception:
-        # Don't cache transient network failures.
+    return frozenset(_urlcanon.host(u) for u in DEAD_LINK_ROTTED) - {""}
+
+
+def _wayback_snapshot(url: str) -> str | None:
+    """Latest 2xx capture of `url` per the Wayback CDX API, as an https
+    snapshot URL, or None if it was never captured. Raises on transport
+    errors and non-200 answers."""
+    resp = _http.get(
+        _WAYBACK_CDX,
+        params={
+            "url": url,
+            "output": "json",
+            "fl": "timestamp,original",
+            "filter": "statuscode:2..",
+            "collapse": "digest",   # one row per distinct capture body
+            "limit": "-1",          # newest only
+            "fastLatest": "true",
+        },
+        timeout=_WAYBACK_TIMEOUT,
+        headers={"User-Agent": "scrooge-regen-v3 (research)"},
+    )
+    resp.raise_for_status()
+    rows = resp.json() if resp.content.strip() else []
+    # rows[0] is the field-name header.
+    if len(rows) < 2:
         return None
+    timestamp, original = rows[-1][:2]
+    return f"https://web.archive.org/web/{timestamp}/{original}"
+
+
+def lookup_wayback_many(
+    urls: Iterable[str],
+    *,
+    refresh: bool = False,
+    workers: int = WAYBACK_WORKERS,
+) -> dict[str, str | None]:
+    """{url: Wayback snapshot URL or None} for every distinct URL.
+
+    Cached answers are used as-is (unless `refresh`); the rest are queried
+    against the CDX API `workers` at a time and written back in two bulk
+    `cache.put_many` calls. A "found" answer is cached without expiry —
+    Wayback snapshots don't disappear once written. A "missing" answer is
+    cached as a negative entry and expires after the `wayback.negative`
+    TTL, since the URL may be archived later. Network failures are NOT
+    cached so they can be retried on next run.
+    """
+    unique = list(dict.fromkeys(u for u in urls if u))
+    out: dict[str, str | None] = {}
+    todo: list[str] = []
+    for url in unique:
+        cached = None if refresh else cache.get(WAYBACK_NS, _wayback_cache_key(url))
+        if isinstance(cached, dict):
+            out[url] = cached.get("wayback_url")
+        else:
+            todo.append(url)
+    found: list[tuple[str, dict]] = []
+    missing: list[tuple[str, dict]] = []
+    if todo:
+        with cf.ThreadPoolExecutor(max_workers=max(1, min(workers, len(todo)))) as ex:
+            futs = {ex.submit(_wayback_snapshot, url): url for url in todo}
+            for fut in cf.as_completed(futs):
+                url = futs[fut]
+                try:
+                    snap = fut.result()
+                except Exception:
+                    # Don't cache transient network failures.
+                    out[url] = None
+                    continue
+                out[url] = snap
+                (found if snap else missing).append(
+                    (_wayback_cache_key(url), {"src": url, "wayback_url": snap}))
+    cache.put_many(WAYBACK_NS, found)
+    cache.put_many(WAYBACK_NS, missing, negative=True)
+    return {url: out.get(url) for url in unique}
+
+
+def lookup_wayback(url: str, *, refresh: bool = False) -> str | None:
+    """Return a Wayback Machine snapshot URL for `url`, or None. Single-URL
+    form of `lookup_wayback_many`, same caching."""
+    return lookup_wayback_many([url], refresh=refresh).get(url)
 
 
-def _check_with_wayback(url: str, timeout: int, refresh_wayback: bool) -> dict:
-    status, _note = check_one(url, timeout)
+def _result(status: int | str, wayback_url: str | None = None) -> dict:
     alive, reason = classify(status)
     out: dict = {"alive": alive, "status": status, "dead_link_reason": reason, "wayback_url": None}
-    if not alive:
-        wb = lookup_wayback(url, refresh=refresh_wayback)
-        if wb:
-            out["wayback_url"] = wb
-            out["alive"] = True  # promote: a snapshot exists, the citation is recoverable
-            out["dead_link_reason"] = "alive_via_wayback"
+    if not alive and wayback_url:
+        out["wayback_url"] = wayback_url
+        out["alive"] = True  # promote: a snapshot exists, the citation is recoverable
+        out["dead_link_reason"] = "alive_via_wayback"
     return out
 
 
+def verify_url(
+    url: str,
+    *,
+    timeout: int = 8,
+    use_wayback: bool = True,
+    refresh_wayback: bool = False,
+    max_age: float | None = None,
+    prefer_snapshot: bool = PREFER_SNAPSHOT,
+) -> dict:
+    """Single-URL form of `verify_urls`. Same result dict shape, blocking
+    check. Streaming callers use `Verifier` instead."""
+    if use_wayback and prefer_snapshot and _urlcanon.host(url) in rotted_hosts():
+        snap = lookup_wayback(url, refresh=refresh_wayback)
+        if snap:
+            return _result(ROTTED, snap)
+    status, _note = check_cached(url, timeout, max_age=max_age)
+    if use_wayback and not classify(status)[0]:
+        return _result(status, lookup_wayback(url, refresh=refresh_wayback))
+    return _result(status)
+
+
+class Verifier:
+    """Streaming form of `verify_urls` for callers that find URLs over time
+    (cli's search -> verify -> extract stream). `submit(url, on_alive)`
+    starts the liveness probe at once on a shared `_liveness.Prober` (same
+    concurrency / per-host caps, one client); `on_alive(url)` runs as soon
+    as the probe says alive, on the prober's loop thread, so keep it to a
+    quick hand-off. `results()` waits for every probe and resolves all the
+    dead URLs in one `lookup_wayback_many` batch. With `prefer_snapshot`,
+    URLs on `rotted_hosts()` are held back instead of probed and looked up
+    in that batch first: a snapshot makes them ROTTED (cited via Wayback),
+    no snapshot sends them to the normal probe. Use as a context manager."""
+
+    def __init__(
+        self,
+        *,
+        timeout: int = 8,
+        use_wayback: bool = True,
+        refresh_wayback: bool = False,
+        max_age: float | None = None,
+        concurrency: int = _liveness.CONCURRENCY,
+        per_host: int = _liveness.PER_HOST,
+        prefer_snapshot: bool = PREFER_SNAPSHOT,
+        workers: int = WAYBACK_WORKERS,
+    ) -> None:
+        self.use_wayback = use_wayback
+        self.refresh_wayback = refresh_wayback
+        self.prefer_snapshot = prefer_snapshot
+        self.workers = workers
+        self._prober = _liveness.Prober(timeout=timeout, max_age=max_age,
+                                        concurrency=concurrency, per_host=per_host)
+        self._statuses: dict[str, cf.Future] = {}
+        self._held: list[str] = []  # prefer_snapshot URLs, not probed yet
+
+    def submit(self, url: str, on_alive: Callable[[str], None] | None = None) -> None:
+        if url in self._statuses or url in self._held:
+            return
+        if self.use_wayback and self.prefer_snapshot and _urlcanon.host(url) in rotted_hosts():
+            self._held.append(url)
+            return
+        self._probe(url, on_alive)
+
+    def _probe(self, url: str, on_alive: Callable[[str], None] | None) -> None:
+        done: cf.Future = cf.Future()
+        self._statuses[url] = done
+
+        def _probed(fut: cf.Future) -> None:
+            try:
+                status = fut.result()[0]
+                if on_alive is not None and classify(status)[0]:
+                    on_alive(url)
+                done.set_result(status)
+            except BaseException as e:
+                done.set_exception(e)
+        self._prober.submit(url).add_done_callback(_probed)
+
+    def results(self) -> dict[str, dict]:
+        """{url: verify_urls-style result} for every submitted URL."""
+        snaps: dict[str, str | None] = {}
+        statuses: dict[str, int | str] = {}
+        if self._held:
+            snaps = lookup_wayback_many(self._held, refresh=self.refresh_wayback,
+                                        workers=self.workers)
+            for url in self._held:
+                if snaps[url]:
+                    statuses[url] = ROTTED
+                else:
+                    self._probe(url, None)
+            self._held = []
+        statuses.update((url, fut.result()) for url, fut in self._statuses.items())
+        if self.use_wayback:
+            dead = [u for u, st in statuses.items() if not classify(st)[0] and u not in snaps]
+            snaps.update(lookup_wayback_many(dead, refresh=self.refresh_wayback,
+                                             workers=self.workers))
+        return {url: _result(status, snaps.get(url)) for url, status in statuses.items()}
+
+    def close(self) -> None:
+        self._prober.close()
+
+    def __enter__(self) -> "Verifier":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+
 def verify_urls(
     urls: Iterable[str],
     *,
     timeout: int = 8,
-    workers: int = 8,
+    workers: int = WAYBACK_WORKERS,
     use_wayback: bool = True,
     refresh_wayback: bool = False,
+    max_age: float | None = None,
+    concurrency: int = _liveness.CONCURRENCY,
+    per_host: int = _liveness.PER_HOST,
+    prefer_snapshot: bool = PREFER_SNAPSHOT,
 ) -> dict[str, dict]:
     """Return {url: {"alive", "status", "dead_link_reason", "wayback_url"}}.
 
-    Dedupes input. Concurrent. Same URL checked once even if passed twice.
-    When `use_wayback=True` (default), URLs that fail the live check are
-    looked up against archive.org/wayback; if a snapshot exists, the URL is
-    promoted to alive and `wayback_url` is set.
+    Dedupes input. Same URL checked once even if passed twice, or under
+    several spellings with one `_urlcanon.canonical` form. Liveness
+    probes run `concurrency` at a time, at most `per_host` per host;
+    remembered results are reused unless older than `max_age` seconds.
+    When `use_wayback=True` (default), every URL that fails the live check
+    is resolved in one `lookup_wayback_many` batch (`workers` CDX queries
+    at a time); if a snapshot exists, the URL is promoted to alive and
+    `wayback_url` is set. With `prefer_snapshot`, URLs on `rotted_hosts()`
+    are looked up in Wayback first and only probed when there is no
+    snapshot (see `Verifier`).
     """
     unique = sorted(set(u for u in urls if u))
-    out: dict[str, dict] = {}
     if not unique:
-        return out
-
-    def _do(url: str) -> dict:
-        if use_wayback:
-            return _check_with_wayback(url, timeout, refresh_wayback)
-        status, _note = check_one(url, timeout)
-        alive, reason = classify(status)
-        return {"alive": alive, "status": status, "dead_link_reason": reason, "wayback_url": None}
-
-    with cf.ThreadPoolExecutor(max_workers=workers) as ex:
-        fut_to_url = {ex.submit(_do, url): url for url in unique}
-        for fut in cf.as_completed(fut_to_url):
-            url = fut_to_url[fut]
-            out[url] = fut.result()
-    return out
+        return {}
+    # One representative (first in sort order) per canonical form.
+    rep: dict[str, str] = {}
+    for url in unique:
+        rep.setdefault(_urlcanon.canonical(url), url)
+    with Verifier(timeout=timeout, use_wayback=use_wayback, refresh_wayback=refresh_wayback,
+                  max_age=max_age, concurrency=concurrency, per_host=per_host,
+                  prefer_snapshot=prefer_snapshot, workers=workers) as verifier:
+        for url in sorted(rep.values()):
+            verifier.submit(url)
+        results = verifier.results()
+    return {url: dict(results[rep[_urlcanon.canonical(url)]]) for url in unique}
 
 
 if __name__ == "__main__":